@@ -0,0 +1,58 @@
+"""Measure how long the CLI takes to start.
+
+Runs `python -m allianz_bonusdrive_client.cli --help` a number of times and
+reports the wall time, plus the cumulative import time of the CLI module as
+reported by `python -X importtime`.
+
+    python benchmarks/cli_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+ENV = {k: v for k, v in os.environ.items() if k != "TGT"}
+
+
+def wall_time() -> list[float]:
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "allianz_bonusdrive_client.cli", "--help"],
+            stdout=subprocess.DEVNULL, stdin=subprocess.DEVNULL, env=ENV, check=True,
+        )
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def baseline() -> list[float]:
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def import_time() -> float:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import allianz_bonusdrive_client.cli"],
+        capture_output=True, text=True, stdin=subprocess.DEVNULL, env=ENV, check=True,
+    )
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if line.rstrip().endswith(" allianz_bonusdrive_client.cli"):
+            return int(line.split("|")[1]) / 1000
+    raise RuntimeError("allianz_bonusdrive_client.cli not found in -X importtime output")
+
+
+if __name__ == "__main__":
+    interpreter = statistics.median(baseline())
+    cli = statistics.median(wall_time())
+    print(f"python -c pass:     {interpreter:7.1f} ms (median of {RUNS})")
+    print(f"cli --help:         {cli:7.1f} ms (median of {RUNS})")
+    print(f"cli overhead:       {cli - interpreter:7.1f} ms")
+    print(f"import cli module:  {import_time():7.1f} ms (cumulative, -X importtime)")
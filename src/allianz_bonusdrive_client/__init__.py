@@ -1,18 +1,29 @@
-from .client import BonusdriveAPIClient
-from .utils.dataclasses import (
-    Trip, EventData, Events, SnappedGeometry, Vehicle, User, TripScores, Scores, Badge, BadgeLevel
-)
+import importlib
 
-__all__ = [
-    "BonusdriveAPIClient",
-    "Trip",
-    "EventData",
-    "Events",
-    "SnappedGeometry",
-    "Vehicle",
-    "User",
-    "TripScores",
-    "Scores",
-    "Badge",
-    "BadgeLevel",
-]
\ No newline at end of file
+# Imported on first access, so that e.g. the CLI's --help doesn't pay for
+# importing requests and polyline.
+_exports = {
+    "BonusdriveAPIClient": ".client",
+    "Trip": ".utils.dataclasses",
+    "EventData": ".utils.dataclasses",
+    "Events": ".utils.dataclasses",
+    "SnappedGeometry": ".utils.dataclasses",
+    "Vehicle": ".utils.dataclasses",
+    "User": ".utils.dataclasses",
+    "TripScores": ".utils.dataclasses",
+    "Scores": ".utils.dataclasses",
+    "Badge": ".utils.dataclasses",
+    "BadgeLevel": ".utils.dataclasses",
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    if name in _exports:
+        return getattr(importlib.import_module(_exports[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,169 @@
+import json
+import mmap
+import os
+import struct
+
+try:
+    import numpy as np
+except ImportError as e:  # optional, pip install allianz-bonusdrive-client[geo]
+    raise ImportError("The point archive needs numpy, install allianz-bonusdrive-client[geo]") from e
+
+from .utils.geometry import PRECISION, decode_array
+
+_MAGIC = b"BDPARCH1"
+# magic, index offset, index length
+_HEADER = struct.Struct("<8sQQ")
+_SCALE = 10**PRECISION
+_DTYPES = {2: np.dtype("<i2"), 4: np.dtype("<i4")}
+
+
+class ArchiveWriter:
+    """Write decoded trip points into one archive file for PointArchive.
+
+    Every line (the geometry and each snapped segment) is stored as the
+    differences between consecutive points in millionths of a degree. Lines
+    whose steps all fit into 16 bit take 4 bytes per point, others 8. The
+    first point and the position of each line are kept in a JSON index at
+    the end of the file.
+
+    Archives are written in one go, to add trips write a new archive (e.g.
+    with build() from a TripStore).
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = path
+        self._f = open(path, "wb")
+        self._f.write(_HEADER.pack(_MAGIC, 0, 0))
+        self._index: dict[str, list[list]] = {}
+
+    def _write_line(self, points) -> list:
+        coordinates = np.rint(np.asarray(points, dtype=np.float64).reshape(-1, 2) * _SCALE).astype(np.int64)
+        if len(coordinates) == 0:
+            return [0, 0, 2, 0, 0]
+        deltas = np.diff(coordinates, axis=0)
+        itemsize = 2 if len(deltas) == 0 or np.abs(deltas).max() <= np.iinfo(np.int16).max else 4
+        offset = self._f.tell()
+        self._f.write(deltas.astype(_DTYPES[itemsize]).tobytes())
+        # keep every line aligned for its dtype
+        self._f.write(b"\0" * (-self._f.tell() % 4))
+        return [offset, len(coordinates), itemsize, int(coordinates[0, 0]), int(coordinates[0, 1])]
+
+    def add(self, tripId: str, points, snapped: list | None = None) -> None:
+        """Add a trip's points and optionally its snapped segments, all as (latitude, longitude) pairs."""
+        self._index[str(tripId)] = [self._write_line(line) for line in [points, *(snapped or [])]]
+
+    def add_trip(self, trip_data: dict) -> None:
+        """Add a raw trip dict (e.g. from a TripStore), decoding geometry and snappedGeometry."""
+        snapped = [decode_array(part.get("geometry")) for part in trip_data.get("snappedGeometry") or []]
+        self.add(trip_data["tripId"], decode_array(trip_data.get("geometry")), snapped)
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        index = json.dumps(self._index, separators=(",", ":")).encode()
+        index_offset = self._f.tell()
+        self._f.write(index)
+        self._f.seek(0)
+        self._f.write(_HEADER.pack(_MAGIC, index_offset, len(index)))
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PointArchive:
+    """Read-only access to an archive written by ArchiveWriter.
+
+    The file is memory mapped, so opening a trip reads nothing but its own
+    points, and processes reading the same archive share one copy in the
+    page cache. deltas() returns views straight into the mapping;
+    points() adds the deltas up into coordinates, which are copies.
+
+    A mapping can't be unmapped while views into it exist, so if arrays from
+    deltas() are still around on close(), the archive only lets go of the
+    mapping and it is unmapped once the last of them is gone.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, index_length = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or index_offset == 0 or index_offset + index_length > len(self._mmap):
+            self._mmap.close()
+            raise ValueError(f"{path} is not a complete point archive")
+        self._index = json.loads(self._mmap[index_offset:index_offset + index_length])
+
+    def __contains__(self, tripId) -> bool:
+        return str(tripId) in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def ids(self) -> list[str]:
+        return list(self._index)
+
+    def _lines(self, tripId) -> list[list]:
+        if self._mmap is None:
+            raise ValueError("archive is closed")
+        try:
+            return self._index[str(tripId)]
+        except KeyError:
+            raise KeyError(f"Trip {tripId} is not in the archive") from None
+
+    def _entry(self, tripId, line: int) -> list:
+        return self._lines(tripId)[line]
+
+    def deltas(self, tripId, line: int = 0) -> tuple[tuple[int, int], "np.ndarray"]:
+        """First point and the (n - 1, 2) steps in millionths of a degree, without copying.
+
+        Args:
+            line: 0 for the geometry, 1 and up for the snapped segments.
+        """
+        offset, count, itemsize, latitude, longitude = self._entry(tripId, line)
+        steps = np.frombuffer(self._mmap, dtype=_DTYPES[itemsize], count=max(count - 1, 0) * 2, offset=offset)
+        return (latitude, longitude), steps.reshape(-1, 2)
+
+    def points(self, tripId, line: int = 0) -> "np.ndarray":
+        """(n, 2) array of latitude, longitude."""
+        offset, count, *_ = self._entry(tripId, line)
+        if count == 0:
+            return np.empty((0, 2))
+        first, steps = self.deltas(tripId, line)
+        coordinates = np.empty((count, 2), dtype=np.int64)
+        coordinates[0] = first
+        np.cumsum(steps, axis=0, out=coordinates[1:])
+        coordinates[1:] += coordinates[0]
+        return coordinates / _SCALE
+
+    def snapped(self, tripId) -> list["np.ndarray"]:
+        """The trip's snapped segments as point arrays."""
+        return [self.points(tripId, line) for line in range(1, len(self._lines(tripId)))]
+
+    def close(self) -> None:
+        if self._mmap is None:
+            return
+        try:
+            self._mmap.close()
+        except BufferError:
+            # views from deltas() still use it, they keep it alive until they are freed
+            pass
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build(path: str | os.PathLike, trips) -> int:
+    """Write an archive of raw trip dicts, e.g. a TripStore. Returns the number of trips."""
+    count = 0
+    with ArchiveWriter(path) as writer:
+        for trip_data in trips:
+            writer.add_trip(trip_data)
+            count += 1
+    return count
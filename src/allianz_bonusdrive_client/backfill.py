@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable
+
+import requests
+
+from .client import BonusdriveAPIClient
+from .store import TripStore
+from .utils.ratelimit import THROTTLE_STATUS_CODES, AimdLimiter, parse_retry_after
+
+
+@dataclass
+class BackfillResult:
+    listed: int = 0
+    fetched: int = 0
+    skipped: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+    complete: bool = False
+
+
+class Backfill:
+    """Download the whole logbook and every trip's details into a TripStore.
+
+    Logbook pages are walked one after another, trip details are fetched
+    concurrently. Concurrency follows an AIMD limiter: it grows while the
+    server is happy and halves on 429/5xx or connection errors, honouring
+    Retry-After.
+
+    Progress is checkpointed to <store>/backfill.json. Running the backfill
+    again resumes where it stopped: trips already in the store are skipped,
+    trips that were listed but not fetched yet are fetched first. Since the
+    logbook is sorted newest first, trips added in the meantime only shift
+    the old ones down, so resuming at the saved offset can't miss any.
+    """
+
+    CHECKPOINT_FILE = "backfill.json"
+
+    def __init__(
+        self,
+        client: BonusdriveAPIClient,
+        store: TripStore | str | os.PathLike,
+        page_size: int = 50,
+        limiter: AimdLimiter | None = None,
+        max_retries: int = 8,
+        on_progress: Callable[[BackfillResult], None] | None = None,
+    ):
+        self.client = client
+        self.store = store if isinstance(store, TripStore) else TripStore(store)
+        self.page_size = page_size
+        self.limiter = limiter or AimdLimiter()
+        self.max_retries = max_retries
+        self.on_progress = on_progress
+        self.checkpoint_path = self.store.root / self.CHECKPOINT_FILE
+        self._lock = threading.Lock()
+
+    def load_checkpoint(self) -> dict:
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"offset": 0, "pending": [], "complete": False}
+
+    def _save_checkpoint(self, offset: int, pending: set, complete: bool) -> None:
+        tmp_path = self.checkpoint_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"offset": offset, "pending": sorted(pending), "complete": complete}, f
+            )
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _call(self, func, *args):
+        """Call func under the limiter, retrying throttled attempts with backoff."""
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            with self.limiter:
+                try:
+                    result = func(*args)
+                except requests.HTTPError as e:
+                    status = e.response.status_code if e.response is not None else None
+                    if status not in THROTTLE_STATUS_CODES or attempt == self.max_retries:
+                        raise
+                    retry_after = parse_retry_after(e.response.headers.get("Retry-After"))  # pyright: ignore[reportOptionalMemberAccess]
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt == self.max_retries:
+                        raise
+                else:
+                    self.limiter.on_success()
+                    return result
+            self.limiter.on_throttle(retry_after)
+            time.sleep(retry_after if retry_after is not None else min(30.0, 0.5 * 2**attempt))
+
+    def _fetch(self, tripId, vehicleId: str, pending: set, result: BackfillResult) -> None:
+        try:
+            trip_data = self._call(self.client.get_trip_details_raw, tripId, vehicleId)
+            self.store.add(trip_data)
+        except Exception as e:
+            # e.g. a failed request, an odd payload or a full disk; stays
+            # pending, a later run will try again
+            with self._lock:
+                result.failed[str(tripId)] = f"{type(e).__name__}: {e}"
+            return
+        with self._lock:
+            pending.discard(str(tripId))
+            result.fetched += 1
+        if self.on_progress:
+            self.on_progress(result)
+
+    def run(self) -> BackfillResult:
+        """Run (or resume) the backfill and return what was done."""
+        if not self.client.authenticated:
+            raise RuntimeError("Client is not authenticated. Call authenticate() first.")
+
+        checkpoint = self.load_checkpoint()
+        done = self.store.ids()
+        pending = {str(tripId) for tripId in checkpoint["pending"]} - done
+        offset = checkpoint["offset"]
+        complete = checkpoint["complete"]
+        if complete and not pending:
+            # finished before, walk the logbook again to pick up new trips
+            offset, complete = 0, False
+        result = BackfillResult()
+
+        vehicleId = self._call(self.client.get_vehicleId)
+        max_outstanding = self.page_size * 4
+
+        with ThreadPoolExecutor(max_workers=int(self.limiter.maximum)) as executor:
+            futures = {
+                executor.submit(self._fetch, tripId, vehicleId, pending, result)
+                for tripId in list(pending)
+            }
+
+            while not complete:
+                # don't list far ahead of the detail fetchers
+                while len(futures) > max_outstanding:
+                    _, futures = wait(futures, return_when=FIRST_COMPLETED)
+
+                page = self._call(self.client.get_trips_raw, self.page_size, offset)
+                offset += len(page)
+                complete = len(page) < self.page_size
+                result.listed += len(page)
+
+                new_ids = []
+                for item in page:
+                    tripId = str(item["trip"]["tripId"])
+                    if tripId in done or tripId in pending:
+                        result.skipped += 1
+                        continue
+                    new_ids.append(tripId)
+                with self._lock:
+                    pending.update(new_ids)
+                    self._save_checkpoint(offset, pending, complete=False)
+                futures |= {
+                    executor.submit(self._fetch, tripId, vehicleId, pending, result)
+                    for tripId in new_ids
+                }
+
+            wait(futures)
+
+        with self._lock:
+            result.complete = not pending
+            self._save_checkpoint(offset, pending, complete=complete)
+        return result
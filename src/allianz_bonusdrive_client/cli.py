@@ -1,36 +1,82 @@
 import argparse
-from dataclasses import asdict
-from datetime import datetime
-import json
-from dotenv import load_dotenv, set_key, find_dotenv
 import os
-from colorama import init
-from getpass import getpass
 import pathlib
+import sys
 
-from .client import BonusdriveAPIClient
-from .utils.constants import BASE_URL
-from .print import print_scores, print_trip_details, print_badge
-from importlib.metadata import version
-# Load environment variables from .env file
-load_dotenv()
+# Keep this module cheap to import: requests, polyline, colorama and dotenv are
+# only imported once an action actually runs, so --help and --version are instant.
 
-# Colorama
-init(autoreset=True)
 
-parser = argparse.ArgumentParser(
-    prog="Allianz BonusDrive Client",
-    description=f"API Client for Allianz BonusDrive, version {version('allianz-bonusdrive-client')}",
-)
-parser.add_argument("action",choices=["last-trip","badges-daily","badges-monthly","scores","details","trips"], help="Action to perform")
-#parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose output")
-parser.add_argument("--geo-lookup", "-g", action="store_true", help="Enable geolocation lookup using Photon API (for last-trip and trips actions)")
-parser.add_argument("--raw", "-r", action="store_true", help="Output raw JSON data")
-parser.add_argument('-v', '--version', action='version', version=version('allianz-bonusdrive-client'))
+class LazyVersionAction(argparse.Action):
+    """--version that only looks up the installed version when it is used."""
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS, help="show program's version number and exit"):
+        super().__init__(option_strings=option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        from importlib.metadata import version
+
+        parser.exit(message=f"{version('allianz-bonusdrive-client')}\n")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="Allianz BonusDrive Client",
+        description="API Client for Allianz BonusDrive",
+    )
+    parser.add_argument("action",nargs="+",choices=["last-trip","badges-daily","badges-monthly","scores","details","trips","backfill","follow","daemon","places","hotspots","export","serve","exporter"], help="Action(s) to perform, several actions share one login and are fetched in parallel")
+    #parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose output")
+    parser.add_argument("--geo-lookup", "-g", action="store_true", help="Enable geolocation lookup using Photon API (for last-trip and trips actions)")
+    parser.add_argument("--gazetteer", default=None, help="Look up places offline in this gazetteer file (GeoNames .txt, .csv or .bin) instead of Photon, defaults to $GAZETTEER_PATH")
+    parser.add_argument("--progressive", "-p", action="store_true", help="With --geo-lookup: print trips right away and add the place names once they are looked up")
+    parser.add_argument("--places", default=None, help="File with the frequent places learned from trip endpoints, trips starting or ending there show the place name (for last-trip, trips and places actions)")
+    parser.add_argument("--label", action="append", default=[], metavar="ID=NAME", help="Name a place (for places action), can be given multiple times")
+    parser.add_argument("--simplify", type=float, default=None, metavar="METERS", help="Simplify trip geometries to this tolerance in meters, for trip details and backfill (needs the geo extra)")
+    parser.add_argument("--raw", "-r", action="store_true", help="Output raw JSON data")
+    parser.add_argument("--format", "-f", choices=["pretty", "ndjson"], default="pretty", help="Output format for raw data: indented JSON, or one compact JSON record per line, streamed as it arrives (implies --raw)")
+    parser.add_argument("--limit", "-n", type=int, default=8, help="Number of trips for the trips and export actions, 0 for the whole logbook")
+    parser.add_argument("--output", "-o", default="bonusdrive-data", help="Directory to store trips in (for backfill action, read by hotspots)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum number of parallel requests (for backfill action)")
+    parser.add_argument("--export-file", default=None, metavar="FILE", help="File to export trips to, GeoJSON, GPX or a Parquet dataset directory by extension (.geojson, .gpx, .parquet) (for export action)")
+    parser.add_argument("--from-store", action="store_true", help="Export the trips stored by backfill in --output instead of fetching them (for export action)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (for serve and exporter actions)")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (for serve and exporter actions)")
+    parser.add_argument("--record", default=None, metavar="FILE", help="Append every server and Photon response to this archive (.jsonl.gz)")
+    parser.add_argument("--replay", default=None, metavar="FILE", help="Answer all requests from an archive written with --record, without network")
+    parser.add_argument("--profile", action="store_true", help="Print how long login, requests, JSON decoding, parsing, geocoding and printing took (to stderr)")
+    parser.add_argument("--profile-output", default=None, metavar="FILE", help="With --profile: write the phases as folded stacks for flamegraph.pl/speedscope, or cProfile stats if FILE ends in .prof (main thread only, e.g. for snakeviz)")
+    parser.add_argument("--use-daemon", "-d", action="store_true", help="Run the action in a running daemon (see daemon action) to skip the login")
+    parser.add_argument("--socket", default=None, help="Unix socket of the daemon")
+    parser.add_argument('-v', '--version', action=LazyVersionAction)
+    return parser
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    args = build_parser().parse_args(argv)
+    if args.format == "ndjson":
+        args.raw = True
+    if args.profile_output:
+        args.profile = True
+    if "places" in args.action and not args.places:
+        build_parser().error("the places action needs --places")
+    labels = []
+    for label in args.label:
+        place_id, _, name = label.partition("=")
+        if not place_id.strip().isdigit():
+            build_parser().error(f"--label erwartet ID=NAME mit der Nummer eines Ortes, nicht {label!r}")
+        labels.append((int(place_id), name or None))
+    args.label = labels
+    if args.record and args.replay:
+        build_parser().error("--record and --replay can't be combined")
+    if "export" in args.action and not args.export_file:
+        build_parser().error("the export action needs --export-file")
+    return args
 
 
 def save_tgt_to_env(tgt: str) -> None:
     """Save the TGT to a .env file in the current directory."""
+    from dotenv import find_dotenv, set_key
+
     env_path = find_dotenv()
     if not env_path:
         # Create .env file if it doesn't exist
@@ -41,92 +87,421 @@ def save_tgt_to_env(tgt: str) -> None:
     print(f"TGT saved to {env_path}")
 
 
-TGT = os.getenv("TGT") # TODO check how long the TGT is valid
-PHOTON_URL = os.getenv("PHOTON_URL")
+def create_client(gazetteer: str | None = None, adapter=None):
+    """Create an authenticated client from .env / environment, asking for credentials if needed.
 
-if not TGT:
-    EMAIL = input("Enter your email: ")
-    PASSWORD = getpass("Enter your password: ")
-else:
-    EMAIL = ""
-    PASSWORD = ""
+    Args:
+        gazetteer: Gazetteer file for offline place lookups, overrides GAZETTEER_PATH.
+        adapter: Transport to use, e.g. a RecordingAdapter or ReplayAdapter.
+    """
+    from dotenv import load_dotenv
+    from getpass import getpass
 
-if __name__ == "__main__":
-    client = BonusdriveAPIClient(BASE_URL, EMAIL, PASSWORD, TGT, PHOTON_URL)
+    from .client import BonusdriveAPIClient
+    from .utils.constants import BASE_URL
+
+    # Load environment variables from .env file
+    load_dotenv()
+    tgt = os.getenv("TGT") # TODO check how long the TGT is valid
+    photon_url = os.getenv("PHOTON_URL")
+    gazetteer = gazetteer or os.getenv("GAZETTEER_PATH")
+    geocoder = None
+    if gazetteer:
+        from .utils.gazetteer import OfflineGeocoder
+
+        geocoder = OfflineGeocoder.open(gazetteer)
+
+    if not tgt:
+        email = input("Enter your email: ")
+        password = getpass("Enter your password: ")
+    else:
+        email = ""
+        password = ""
+
+    client = BonusdriveAPIClient(BASE_URL, email, password, tgt, photon_url, adapter=adapter, geocoder=geocoder)
 
     # Request TGT if not present and save it to .env
-    if not TGT:
+    if not tgt:
         new_tgt = client.request_tgt()
         save_tgt_to_env(new_tgt)
 
     # Authenticate the client
     client.authenticate()
+    return client
+
+
+# actions that do their own printing while they run, they can't be fetched ahead
+INTERACTIVE_ACTIONS = {"backfill", "follow", "export", "serve", "exporter"}
+
+
+def apply_places(place_index, trips: list) -> None:
+    """Learn the trips' endpoints and name those at a known place, unless they already have a name."""
+    for trip in trips:
+        place_index.learn(trip)
+        start, end = place_index.endpoints(trip)
+        if start and not trip.start_point_string:
+            trip.start_point_string = start.display_name()
+        if end and not trip.end_point_string:
+            trip.end_point_string = end.display_name()
+
 
-    args = parser.parse_args()
-    match args.action:
+def fetch_action(client, action: str, args: argparse.Namespace, place_index=None):
+    """Get the data for one action. Runs concurrently with other actions, so it must not print."""
+    from dataclasses import asdict
+
+    match action:
         case "last-trip":
             if args.raw:
                 trip = client.get_trips_raw(amount=1)[0]["trip"]
                 if args.geo_lookup:
-                    trip = client.get_trip_details(tripId=trip["tripId"])
-                    print(json.dumps(asdict(trip), indent=4))
-                else:
-                    print(json.dumps(trip, indent=4))
-                exit(0)
+                    return asdict(client.get_trip_details(tripId=trip["tripId"], simplify_tolerance=args.simplify))
+                return trip
             trip = client.get_trips(amount=1)[0]
-            if args.geo_lookup:
-                trip = client.get_trip_details(tripId=trip.tripId)
-            print_trip_details(trip)
+            if args.geo_lookup and not args.progressive:
+                trip = client.get_trip_details(tripId=trip.tripId, simplify_tolerance=args.simplify)
+            if place_index:
+                apply_places(place_index, [trip])
+            return trip
         case "trips":
+            limit = args.limit or None
             if args.raw:
-                trips = client.get_trips_raw(amount=8)
-                for trip in trips:
-                    if args.geo_lookup:
-                        trip = client.get_trip_details(tripId=trip["trip"]["tripId"])
-                        print(json.dumps(asdict(trip), indent=4))
-                    else:
-                        print(json.dumps(trip, indent=4))
-                    print("-" * 20)
-                exit(0)
-            trips = client.get_trips(amount=8)
-            for trip in trips:
+                trips = client.iter_trips_raw(limit=limit)
                 if args.geo_lookup:
-                    trip = client.get_trip_details(tripId=trip.tripId)
-                print_trip_details(trip)
-                print("-" * 20)
+                    trips = (client.get_trip_details(tripId=trip["trip"]["tripId"], simplify_tolerance=args.simplify) for trip in trips)
+                if args.format == "ndjson":
+                    # consumed while printing, so the first trips show up after the first page
+                    return trips
+                return [asdict(trip) if args.geo_lookup else trip for trip in trips]
+            from .client import parse_trip
+
+            trips = [parse_trip(item["trip"]) for item in client.iter_trips_raw(limit=limit)]
+            if args.geo_lookup and not args.progressive:
+                trips = [client.get_trip_details(tripId=trip.tripId, simplify_tolerance=args.simplify) for trip in trips]
+            if place_index:
+                apply_places(place_index, trips)
+            return trips
         case "badges-daily":
+            from .client import date_range
+
             if args.raw:
-                badges = client.get_badges_raw(type="daily")
-                print(json.dumps(badges, indent=4))
-                exit(0)
-            badges = client.get_badges(type="daily")
-            for badge in badges:
-                print_badge(badge)
-                print("-" * 20)
+                return client.get_badges_raw("daily", *date_range())
+            return client.get_badges("daily", *date_range())
         case "badges-monthly":
+            from .client import date_range
+
+            if args.raw:
+                return client.get_badges_raw("monthly", *date_range())
+            return client.get_badges("monthly", *date_range())
+        case "scores": # this is probably not useful since the scores are already included in trips, but hey, the API endpoint exists, so why not
+            from .client import date_range
+
             if args.raw:
-                badges = client.get_badges_raw(type="monthly")
-                print(json.dumps(badges, indent=4))
-                exit(0)
-            badges = client.get_badges(type="monthly")
-            for badge in badges:
+                return client.get_scores_raw(*date_range())
+            return client.get_scores(*date_range())
+        case "details":
+            trip = client.get_trip_details(tripId=None, simplify_tolerance=args.simplify) # Pass None to get the latest trip, TODO make parameter for tripId
+            return asdict(trip) if args.raw else trip
+        case "places":
+            for place_id, name in args.label:
+                place_index.set_label(place_id, name)
+            places = place_index.known()
+            return [asdict(place) for place in places] if args.raw else places
+        case "hotspots":
+            from .hotspots import HotspotIndex
+            from .store import TripStore
+
+            hotspot_index = HotspotIndex(os.path.join(args.output, "hotspots.json"))
+            hotspot_index.update(TripStore(args.output))
+            hotspot_index.save()
+            hotspots = hotspot_index.ranked(limit=args.limit or None)
+            return [asdict(hotspot) for hotspot in hotspots] if args.raw else hotspots
+    return None
+
+
+def render_trips_progressive(client, trips: list) -> None:
+    """Print each trip right away and the place names as soon as their lookups finish.
+
+    The lookups run in the background, so the Photon server's latency doesn't
+    hold up the trip summaries. The trips come from the logbook, which already
+    includes the geometry, so no trip details request is needed either.
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .print import print_trip_details, print_trip_places
+    from .utils.geometry import decode
+
+    # keeps the place lines from ending up in the middle of a trip
+    print_lock = threading.Lock()
+
+    def lookup(trip):
+        points = decode(trip.geometry)
+        if not points:
+            return
+        start = client.lookup_place(*points[0])
+        end = client.lookup_place(*points[-1])
+        with print_lock:
+            print_trip_places(trip, start, end)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for trip in trips:
+            with print_lock:
+                print_trip_details(trip)
+                print("-" * 20, flush=True)
+            # only now, so the places never show up before their trip
+            executor.submit(lookup, trip)
+
+
+def render_action(client, action: str, data, args: argparse.Namespace) -> None:
+    """Print the data fetched for one action (or run an interactive action)."""
+    from datetime import datetime
+    import json
+
+    from .print import print_scores, print_trip_details, print_badge
+
+    if args.format == "ndjson" and action not in INTERACTIVE_ACTIONS:
+        from .utils.jsonio import NDJSONWriter
+
+        with NDJSONWriter() as writer:
+            if isinstance(data, dict):
+                writer.write(data)
+            else:
+                writer.write_all(data)
+        return
+
+    if args.geo_lookup and args.progressive and action in ("last-trip", "trips") and not args.raw:
+        render_trips_progressive(client, data if isinstance(data, list) else [data])
+        return
+
+    match action:
+        case "last-trip" | "details":
+            if args.raw:
+                print(json.dumps(data, indent=4))
+                return
+            print_trip_details(data)
+        case "trips":
+            for trip in data:
+                if args.raw:
+                    print(json.dumps(trip, indent=4))
+                else:
+                    print_trip_details(trip)
+                print("-" * 20)
+        case "badges-daily" | "badges-monthly":
+            if args.raw:
+                print(json.dumps(data, indent=4))
+                return
+            for badge in data:
                 print_badge(badge)
                 print("-" * 20)
-        case "scores": # this is probably not useful since the scores are already included in trips, but hey, the API endpoint exists, so why not
+        case "scores":
             if args.raw:
-                scores = client.get_scores_raw()
-                print(json.dumps(scores, indent=4))
-                exit(0)
-            scores = client.get_scores()
-            for score_date, scores in scores.items(): # pyright: ignore[reportAttributeAccessIssue]
+                print(json.dumps(data, indent=4))
+                return
+            for score_date, scores in data.items(): # pyright: ignore[reportAttributeAccessIssue]
                 print(f"Datum: {datetime.fromtimestamp(int(score_date) / 1000).strftime('%Y-%m-%d')}")
                 print_scores(scores)
-        case "details":
+        case "places":
+            from .utils.geometry import format_coordinates
+
+            if args.raw:
+                print(json.dumps(data, indent=4))
+                return
+            for place in data:
+                print(f"Ort {place.id}: {place.display_name()} ({place.visits} Besuche, {format_coordinates(place.latitude, place.longitude)})")
+        case "hotspots":
+            from .hotspots import EVENT_TYPES
+            from .utils.geometry import format_coordinates
+
             if args.raw:
-                trip = client.get_trip_details(tripId=None) # Pass None to get the latest trip, TODO make parameter for tripId
-                print(json.dumps(asdict(trip), indent=4))
-                exit(0)
-            trip = client.get_trip_details(tripId=None) # Pass None to get the latest trip, TODO make parameter for tripId
-            print_trip_details(trip)
+                print(json.dumps(data, indent=4))
+                return
+            names = {EVENT_TYPES["harsh_braking"]: "Bremsen", EVENT_TYPES["harsh_cornering"]: "Kurven"}
+            for hotspot in data:
+                place = client.lookup_place(hotspot.latitude, hotspot.longitude) if args.geo_lookup else None
+                place = place or format_coordinates(hotspot.latitude, hotspot.longitude)
+                print(f"{names.get(hotspot.event_type, hotspot.event_type)}: {place} ({hotspot.events} Ereignisse in {hotspot.trips} Fahrten, Gewicht {hotspot.weight:g})")
+        case "backfill":
+            from .backfill import Backfill
+            from .utils.ratelimit import AimdLimiter
+
+            def show_progress(result):
+                print(f"\r{result.fetched} Fahrten geladen, {len(result.failed)} Fehler", end="", flush=True)
+
+            from .store import TripStore
+
+            backfill = Backfill(
+                client,
+                TripStore(args.output, simplify_tolerance=args.simplify),
+                limiter=AimdLimiter(maximum=args.concurrency),
+                on_progress=show_progress,
+            )
+            result = backfill.run()
+            print()
+            print(f"{result.listed} Fahrten im Fahrtenbuch, {result.fetched} neu geladen, {result.skipped} schon vorhanden")
+            if result.failed:
+                print(f"{len(result.failed)} Fahrten fehlgeschlagen, nochmal ausführen zum Fortsetzen")
+        case "export":
+            from .export import export
+
+            if args.from_store:
+                from .store import TripStore
+
+                trips = TripStore(args.output)
+            else:
+                trips = client.iter_trips_raw(limit=args.limit or None)
+            if args.export_file.endswith(".parquet"):
+                from .columnar import write_parquet
+
+                count = write_parquet(trips, args.export_file)
+            else:
+                count = export(
+                    trips,
+                    args.export_file,
+                    simplify_tolerance=args.simplify,
+                    lookup_place=client.lookup_place if args.geo_lookup else None,
+                )
+            print(f"{count} Fahrten nach {args.export_file} exportiert")
+        case "serve":
+            from .server import TripService
+
+            print(f"Serving on http://{args.host}:{args.port}/default/trips", flush=True)
+            try:
+                TripService({"default": client}).serve_forever(args.host, args.port)
+            except KeyboardInterrupt:
+                pass
+        case "exporter":
+            from .exporter import MetricsExporter
+
+            print(f"Prometheus metrics on http://{args.host}:{args.port}/metrics", flush=True)
+            try:
+                MetricsExporter(client).serve_forever(args.host, args.port)
+            except KeyboardInterrupt:
+                pass
+        case "follow":
+            from .watch import TripWatcher
+
+            from .utils.jsonio import NDJSONWriter
+
+            watcher = TripWatcher(client)
+            writer = NDJSONWriter(flush_each=True) if args.raw else None
+            try:
+                for trip in watcher.watch():
+                    if writer:
+                        writer.write(trip)
+                        continue
+                    print_trip_details(trip)
+                    print("-" * 20, flush=True)
+            except KeyboardInterrupt:
+                pass
         case _:
-            print("Unknown action")
\ No newline at end of file
+            print("Unknown action")
+
+
+def run_actions(client, args: argparse.Namespace) -> None:
+    """Run all requested actions on one client.
+
+    The data for all actions is fetched concurrently, the output is printed in
+    the order the actions were given, each as soon as it and the ones before
+    it are done.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    place_index = None
+    if args.places:
+        from .places import PlaceIndex
+
+        place_index = PlaceIndex(args.places)
+        if "places" in args.action:
+            unknown = [str(place_id) for place_id, _ in args.label if place_id not in place_index.places]
+            if unknown:
+                build_parser().error(f"Unbekannte Orte: {', '.join(unknown)} (die Nummern zeigt die places-Aktion)")
+
+    actions = args.action
+    with ThreadPoolExecutor(max_workers=len(actions)) as executor:
+        futures = [
+            None if action in INTERACTIVE_ACTIONS else executor.submit(fetch_action, client, action, args, place_index)
+            for action in actions
+        ]
+        for action, future in zip(actions, futures):
+            if len(actions) > 1 and not args.raw:
+                print(f"=== {action} ===")
+            render_action(client, action, future.result() if future else None, args)
+
+    if place_index:
+        place_index.save()
+
+
+def transport_from_args(args: argparse.Namespace):
+    """The transport for --record / --replay, None for the default one."""
+    if args.replay:
+        from .utils.recording import ReplayAdapter
+
+        return ReplayAdapter(args.replay)
+    if args.record:
+        from .utils.recording import RecordingAdapter
+
+        return RecordingAdapter(args.record)
+    return None
+
+
+def run_client(args: argparse.Namespace) -> None:
+    client = create_client(args.gazetteer, transport_from_args(args))
+    try:
+        run_actions(client, args)
+    finally:
+        # writes out the rest of a recording
+        client.adapter.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    args = parse_args(argv)
+
+    if args.use_daemon or "daemon" in args.action:
+        from .daemon import CLIDaemon, default_socket_path, forward, local_only
+
+        socket_path = args.socket or default_socket_path()
+        if "daemon" in args.action:
+            if len(args.action) > 1:
+                build_parser().error("daemon can't be combined with other actions")
+            client = create_client(args.gazetteer, transport_from_args(args))
+            print(f"Listening on {socket_path}")
+            CLIDaemon(client, socket_path).serve_forever()
+            return
+        # profiles are taken in this process, not in the daemon
+        if not local_only(args) and not args.profile:
+            response = forward(socket_path, argv)
+            if response is not None:
+                sys.stdout.write(response["stdout"])
+                sys.stderr.write(response["stderr"])
+                sys.exit(response["status"])
+            print("No daemon answering, running locally", file=sys.stderr)
+
+    # Colorama
+    from colorama import init
+    init(autoreset=True)
+
+    if not args.profile:
+        run_client(args)
+        return
+
+    from .utils.profiling import profile
+
+    output = args.profile_output
+    profiler = None
+    try:
+        with profile(cprofile=bool(output and output.endswith(".prof"))) as profiler:
+            run_client(args)
+    finally:
+        # also for failed and interrupted runs, that's when it's interesting
+        if profiler:
+            print(profiler.report(), file=sys.stderr)
+            if output and profiler.cprofile:
+                profiler.cprofile.dump_stats(output)
+            elif output:
+                pathlib.Path(output).write_text(profiler.folded())
+
+
+if __name__ == "__main__":
+    main()
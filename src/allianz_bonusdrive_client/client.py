@@ -1,10 +1,16 @@
 import requests
+import threading
 from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
 from requests.cookies import RequestsCookieJar
 from datetime import datetime, timedelta
-import polyline
+from typing import Iterator
 
-from .utils.photon import PhotonClient
+from .utils.geometry import decode, format_coordinates
+from .utils.photon import PhotonClient, place_name
+from .utils.profiling import phase, timed
+from .utils.singleflight import SingleFlight
+from .utils.transport import create_adapter, create_session
 from .utils.dataclasses import (
     Trip,
     Vehicle,
@@ -17,6 +23,18 @@ from .utils.dataclasses import (
 
 # logging.basicConfig(level=print)
 
+TRIP_EXPANDS = ("vehicle", "user", "events", "points", "scores", "alerts")
+
+
+def date_range(days: int = 30, today: datetime | None = None) -> tuple[str, str]:
+    """(endDate, startDate) of the last `days` days up to today, for the badges and scores endpoints.
+
+    The methods' default dates are fixed when the module is imported, so
+    anything running longer than a day has to pass the dates explicitly.
+    """
+    today = today or datetime.today()
+    return today.strftime("%Y-%m-%d"), (today - timedelta(days=days)).strftime("%Y-%m-%d")
+
 
 class BonusdriveAPIClient:
     def __init__(
@@ -26,17 +44,54 @@ class BonusdriveAPIClient:
         password: str | None,
         tgt: str | None = None,
         photon_url: str | None = None,
+        adapter: HTTPAdapter | None = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        timeout: float | tuple[float, float] | None = None,
+        keep_alive: bool = True,
+        warm_up: int = 0,
+        geocoder=None,
     ):
+        """
+        Args:
+            base_url: BonusDrive server, e.g. https://bonusdrive.drivesync.com
+            email: Login email, only needed if no TGT is given.
+            password: Login password, only needed if no TGT is given.
+            tgt: Ticket granting ticket from a previous login.
+            photon_url: Photon server used for reverse geocoding.
+            adapter: Connection pool to use. Pass the same adapter (see
+                utils.transport.create_adapter) to several clients to share one
+                pool between them; cookies stay per client.
+            pool_connections: Number of per-host pools (ignored if adapter is given).
+            pool_maxsize: Connections kept open per host (ignored if adapter is given).
+            timeout: requests timeout for every call, seconds or (connect, read).
+            keep_alive: Reuse connections between requests.
+            warm_up: Number of connections to open in the background while
+                authenticate() runs, so concurrent fetchers don't all pay for
+                a TLS handshake afterwards.
+            geocoder: Reverse geocoder to use instead of Photon, anything with
+                a PhotonClient-style reverse_geocode(), e.g.
+                utils.gazetteer.OfflineGeocoder.
+        """
         self.base_url = base_url
         self.username = email
         self.password = password
         self.tgt = tgt
-        self.photon = PhotonClient(photon_url) if photon_url else None
-        self.session = requests.Session()
+        self.timeout = timeout
+        self.warm_up_connections = warm_up
+        self.adapter = adapter or create_adapter(pool_connections, pool_maxsize)
+        self.photon = geocoder or (
+            PhotonClient(photon_url, adapter=self.adapter, timeout=timeout)
+            if photon_url
+            else None
+        )
+        self.session = create_session(self.adapter)
         self.session.cookies = (
             RequestsCookieJar()
         )  # Use RequestsCookieJar to store cookies
         self.authenticated = False
+        self.vehicleId: str | None = None
+        connection = "Keep-Alive" if keep_alive else "close"
 
         # Default headers
         self.headers = {
@@ -44,7 +99,7 @@ class BonusdriveAPIClient:
             "Accept-Encoding": "gzip",
             "Accept-Language": "en-US",
             "App-Version": "4.1.0",
-            "Connection": "Keep-Alive",
+            "Connection": connection,
             "Content-Type": "application/x-www-form-urlencoded",
             "Host": self.base_url.replace("https://", "").replace("http://", ""),
             "Platform": "Android",
@@ -52,6 +107,20 @@ class BonusdriveAPIClient:
             "X-Requested-With": "XMLHttpRequest",
         }
 
+        # Headers for the JSON API endpoints, mimicking the app's okhttp client
+        self.api_headers = {
+            "Accept-Encoding": "gzip",
+            "Accept-Language": "en-US",
+            "Connection": connection,
+            "Platform": "Android",
+            "User-Agent": "okhttp/4.12.0",
+        }
+
+        # Concurrent identical GETs share one request
+        self._inflight = SingleFlight()
+        self._warm_up_started = False
+
+    @timed("login")
     def request_tgt(self) -> str:
         """Request a new TGT using the provided username and password.
         
@@ -73,6 +142,7 @@ class BonusdriveAPIClient:
                     }
                 ),
                 headers=self.headers,
+                timeout=self.timeout,
             )
             tgt_response.raise_for_status()
             if tgt_response.status_code != 201:
@@ -101,8 +171,80 @@ class BonusdriveAPIClient:
             return (True, retry_func(*args, **kwargs))
         return (False, response)
 
+    def _get_json(self, url: str):
+        """GET an API endpoint and return the parsed JSON body.
+
+        Concurrent callers asking for the same URL (including its query
+        parameters) share a single in-flight request and get the same parsed
+        result. Returns None for 204 No Content.
+        """
+        return self._inflight.do(("GET", url), self._fetch_json, url)
+
+    def _fetch_json(self, url: str):
+        with phase("transfer") as timing:
+            response = self.session.get(
+                url,
+                headers=self.api_headers,
+                cookies=self.session.cookies,
+                timeout=self.timeout,
+            )
+            timing.bytes = len(response.content)
+        retried, result = self._handle_response(response, self._fetch_json, url)
+        if retried:
+            return result
+        response = result
+        response.raise_for_status()
+        if response.status_code == 204:
+            return None
+        with phase("json"):
+            return response.json()
+
+    def warm_up(self, connections: int, wait: bool = True) -> None:
+        """Open connections to the server (and Photon) ahead of time.
+
+        Idle connections go back into the pool, so later requests skip the
+        TCP/TLS handshake. Failures are ignored, this is best effort only.
+
+        Args:
+            connections: Number of concurrent connections to open.
+            wait: Block until all connections are open.
+        """
+
+        def open_connection():
+            try:
+                self.session.head(
+                    f"{self.base_url}/",
+                    headers=self.headers,
+                    timeout=self.timeout,
+                    allow_redirects=False,
+                )
+            except requests.RequestException:
+                pass
+
+        def open_photon_connection():
+            try:
+                self.photon.warm_up()  # pyright: ignore[reportOptionalMemberAccess]
+            except requests.RequestException:
+                pass
+
+        targets = [open_connection] * connections
+        if self.photon:
+            targets.append(open_photon_connection)
+        threads = [threading.Thread(target=target, daemon=True) for target in targets]
+        for thread in threads:
+            thread.start()
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    @timed("login")
     def authenticate(self):
         """Authenticate the user and store session cookies."""
+        if self.warm_up_connections and not self._warm_up_started:
+            # runs alongside the login requests below
+            self._warm_up_started = True
+            self.warm_up(self.warm_up_connections, wait=False)
+
         if not self.tgt:
             self.request_tgt()
 
@@ -117,6 +259,7 @@ class BonusdriveAPIClient:
                     }
                 ),
                 headers=self.headers,
+                timeout=self.timeout,
                 #cookies=self.session.cookies,  # Use cookies from the cookiejar
             )
             if st_response.status_code == 404:
@@ -140,6 +283,7 @@ class BonusdriveAPIClient:
             headers=self.headers,
             cookies=self.session.cookies,  # Use cookies from the cookiejar
             allow_redirects=False,  # Follow the redirect to capture the cookie
+            timeout=self.timeout,
         )
         self.session.cookies.update(cookies_response.cookies)
 
@@ -147,146 +291,84 @@ class BonusdriveAPIClient:
             f"{self.base_url}/ipaid/api/v2/session",
             headers=self.headers,
             cookies=self.session.cookies,  # Use cookies from the cookiejar
+            timeout=self.timeout,
         )
         userId_response.raise_for_status()
 
         self.userId = userId_response.json().get("userId")
+        self.vehicleId = None
         self.session.cookies.set("User-ID", str(self.userId))
 
         # Store cookies in the RequestsCookieJar
         self.session.cookies.update(cookies_response.cookies)
         self.authenticated = True
 
-    def get_trips_raw(self, amount: int = 10, offset: int = 0) -> list[dict]:
-        """Query the trips endpoint and return the raw JSON response."""
+    @timed("logbook")
+    def get_trips_raw(
+        self, amount: int = 10, offset: int = 0, expand: tuple[str, ...] = TRIP_EXPANDS
+    ) -> list[dict]:
+        """Query the trips endpoint and return the raw JSON response.
+
+        Args:
+            amount: Number of trips per page.
+            offset: Number of trips to skip, newest first.
+            expand: Sub-resources to include. Leave some out for a smaller
+                response, e.g. () when only IDs and timestamps are needed. Trips
+                without vehicle, user and scores can't be turned into Trip objects.
+        """
         if not self.authenticated:
             raise RuntimeError(
                 "Client is not authenticated. Call authenticate() first."
             )
 
-        url = f"{self.base_url}/ipaid/api/v2/users/{self.userId}/logbook/trips?offset={offset}&limit={amount}&sort=local_startdate%3Bdesc&expand=vehicle&expand=user&expand=events&expand=points&expand=scores&expand=alerts"
-        response = self.session.get(
-            url,
-            headers={
-                "Accept-Encoding": "gzip",
-                "Accept-Language": "en-US",
-                "Connection": "Keep-Alive",
-                "Platform": "Android",
-                "User-Agent": "okhttp/4.12.0",
-            },
-            cookies=self.session.cookies,
-        )
-        retried, result = self._handle_response(response, self.get_trips_raw, amount, offset)
-        if retried:
-            return result
-        response = result
-        response.raise_for_status()
-        trips_data = response.json()["items"]
+        expand_params = "".join(f"&expand={name}" for name in expand)
+        url = f"{self.base_url}/ipaid/api/v2/users/{self.userId}/logbook/trips?offset={offset}&limit={amount}&sort=local_startdate%3Bdesc{expand_params}"
+        trips_data = self._get_json(url)["items"]
         return trips_data
 
-    def get_trips(self, amount: int = 10, offset: int = 0) -> list[Trip]:
-        trips_data = [item["trip"] for item in self.get_trips_raw(amount, offset)]
-
-        trips = []
-        for trip_data in trips_data:
-            vehicle_data = trip_data["vehicle"]
-            user_data = trip_data["user"]
-            trip_scores_data = trip_data["tripScores"]
-
-            vehicle = Vehicle(
-                vehicleId=vehicle_data["vehicleId"],
-                make=vehicle_data["make"],
-                model=vehicle_data["model"],
-                nickname=vehicle_data.get("nickname"),
-                year=vehicle_data.get("year"),
-                plate=vehicle_data.get("plate"),
-                avatar=vehicle_data.get("avatar"),
-                accountId=vehicle_data.get("accountId"),
-                accountNumber=vehicle_data.get("accountNumber"),
-                policyInceptionDate=vehicle_data.get("policyInceptionDate"),
-                policyStartDate=vehicle_data.get("policyStartDate"),
-                extraAccountId=vehicle_data.get("extraAccountId"),
-                extraAccountNumber=vehicle_data.get("extraAccountNumber"),
-            )
+    def iter_trips_raw(
+        self,
+        limit: int | None = None,
+        offset: int = 0,
+        page_size: int = 50,
+        expand: tuple[str, ...] = TRIP_EXPANDS,
+    ) -> Iterator[dict]:
+        """Page through the logbook and yield the raw items, newest first.
 
-            user = User(
-                userId=user_data["userId"],
-                publicDisplayName=user_data["publicDisplayName"],
-                avatar=user_data.get("avatar"),
-                sharedInformation=user_data.get("sharedInformation"),
-                associatedUsers=user_data.get("associatedUsers"),
-                account=user_data.get("account"),
-                userRole=user_data.get("userRole"),
-                accountRole=user_data.get("accountRole"),
-                firstName=user_data["firstName"],
-                lastName=user_data["lastName"],
-            )
+        Pages are requested one at a time as the items are consumed, so the
+        first items are available after one request.
 
-            scores_data = trip_scores_data["scores"]
-            scores = Scores(
-                over_speeding=scores_data["over.speeding"],
-                speeding=scores_data["speeding"],
-                distracted_driving=scores_data["distracted.driving"],
-                payd=scores_data["payd"],
-                overall=scores_data["overall"],
-                harsh_cornering=scores_data["harsh.cornering"],
-                harsh_acceleration=scores_data["harsh.acceleration"],
-                harsh_braking=scores_data["harsh.braking"],
-                mileage=scores_data["mileage"],
-            )
+        Args:
+            limit: Stop after this many items, None for the whole logbook.
+            offset: Number of trips to skip.
+            page_size: Trips per request.
+            expand: See get_trips_raw().
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            amount = page_size if remaining is None else min(page_size, remaining)
+            page = self.get_trips_raw(amount, offset, expand)
+            yield from page
+            if len(page) < amount:
+                return
+            offset += len(page)
+            if remaining is not None:
+                remaining -= len(page)
 
-            trip_scores = TripScores(
-                scores=scores,
-                scoreType=trip_scores_data["scoreType"],
-            )
+    def get_trips(self, amount: int = 10, offset: int = 0) -> list[Trip]:
+        """Query the trips endpoint and return a list of Trip dataclass instances."""
+        return [parse_trip(item["trip"]) for item in self.get_trips_raw(amount, offset)]
 
-            trip = Trip(
-                events=trip_data.get("events"),
-                tripId=trip_data["tripId"],
-                tripStartTimestampUtc=trip_data["tripStartTimestampUtc"],
-                tripEndTimestampUtc=trip_data["tripEndTimestampUtc"],
-                tripStartTimestampLocal=trip_data["tripStartTimestampLocal"],
-                tripEndTimestampLocal=trip_data["tripEndTimestampLocal"],
-                tripProcessingEndTimestampUtc=trip_data[
-                    "tripProcessingEndTimestampUtc"
-                ],
-                kilometers=trip_data["kilometers"],
-                avgKilometersPerHour=trip_data["avgKilometersPerHour"],
-                maxKilometersPerHour=trip_data["maxKilometersPerHour"],
-                seconds=trip_data["seconds"],
-                secondsOfIdling=trip_data["secondsOfIdling"],
-                timeZoneOffsetMillis=trip_data["timeZoneOffsetMillis"],
-                tripStatus=trip_data["tripStatus"],
-                pois=trip_data.get("pois"),
-                transportMode=trip_data["transportMode"],
-                transportModeMessageKey=trip_data["transportModeMessageKey"],
-                transportModeReason=trip_data.get("transportModeReason"),
-                geometry=trip_data["geometry"],
-                snappedGeometry=trip_data.get("snappedGeometry", []),
-                reconstructedStartGeometry=trip_data["reconstructedStartGeometry"],
-                tripStartStatus=trip_data["tripStartStatus"],
-                verified=trip_data["verified"],
-                hasAlerts=trip_data["hasAlerts"],
-                alerts=trip_data.get("alerts"),
-                vehicle=vehicle,
-                user=user,
-                device=trip_data.get("device"),
-                tripScores=trip_scores,
-                milStatus=trip_data.get("milStatus"),
-                dtcCount=trip_data.get("dtcCount"),
-                tripScore=trip_data["tripScore"],
-                eventsCount=trip_data["eventsCount"],
-                private=trip_data["private"],
-                tripUUID=trip_data["tripUUID"],
-                purpose=trip_data["purpose"],
-                decoded_geometry=None,
-                start_point_string=None,
-                end_point_string=None,
-            )
-            trips.append(trip)
+    def watch(self, **kwargs):
+        """Yield new and reprocessed trips as they show up in the logbook.
+
+        Keyword arguments are passed on to watch.TripWatcher.
+        """
+        from .watch import TripWatcher
 
-        return trips
+        return TripWatcher(self, **kwargs).watch()
 
+    @timed("vehicles")
     def get_vehicleId(self) -> str:
         """Query the vehicles endpoint and return the Id of the first vehicle."""
         # If you have multiple vehicles, you need to adjust this method
@@ -296,28 +378,19 @@ class BonusdriveAPIClient:
                 "Client is not authenticated. Call authenticate() first."
             )
 
+        # the vehicle doesn't change during a session, look it up only once
+        if self.vehicleId:
+            return self.vehicleId
+
         url = f"{self.base_url}/ipaid/api/v2/users/{self.userId}/vehicles"
-        response = self.session.get(
-            url,
-            headers={
-                "Accept-Encoding": "gzip",
-                "Accept-Language": "en-US",
-                "Connection": "Keep-Alive",
-                "Platform": "Android",
-                "User-Agent": "okhttp/4.12.0",
-            },
-            cookies=self.session.cookies,
-        )
-        retried, result = self._handle_response(response, self.get_vehicleId)
-        if retried:
-            return result
-        response = result
-        response.raise_for_status()
-        if not response.json():
+        vehicles = self._get_json(url)
+        if not vehicles:
             raise RuntimeError("No vehicles found for the authenticated user.")
-        return response.json()[0]["vehicleId"]
+        self.vehicleId = vehicles[0]["vehicleId"]
+        return self.vehicleId
 
 
+    @timed("badges")
     def get_badges_raw(
         self,
         type: str = "daily",
@@ -339,23 +412,7 @@ class BonusdriveAPIClient:
         vehicleId = self.get_vehicleId()
 
         url = f"{self.base_url}/ipaid/api/v2/vehicles/{vehicleId}/badges?endDate={endDate}&startDate={startDate}&type={type}"
-        response = self.session.get(
-            url,
-            headers={
-                "Accept-Encoding": "gzip",
-                "Accept-Language": "en-US",
-                "Connection": "Keep-Alive",
-                "Platform": "Android",
-                "User-Agent": "okhttp/4.12.0",
-            },
-            cookies=self.session.cookies,
-        )
-        retried, result = self._handle_response(response, self.get_badges_raw, type, endDate, startDate)
-        if retried:
-            return result
-        response = result
-        response.raise_for_status()
-        badges_data = response.json()
+        badges_data = self._get_json(url)
         return badges_data
 
     def get_badges(
@@ -392,6 +449,7 @@ class BonusdriveAPIClient:
 
         return badges
 
+    @timed("scores")
     def get_scores_raw(
         self,
         endDate: str = datetime.today().strftime("%Y-%m-%d"),
@@ -410,25 +468,9 @@ class BonusdriveAPIClient:
         vehicleId = self.get_vehicleId()
 
         url = f"{self.base_url}/ipaid/api/v2/vehicles/{vehicleId}/scores?endDate={endDate}&startDate={startDate}"
-        response = self.session.get(
-            url,
-            headers={
-                "Accept-Encoding": "gzip",
-                "Accept-Language": "en-US",
-                "Connection": "Keep-Alive",
-                "Platform": "Android",
-                "User-Agent": "okhttp/4.12.0",
-            },
-            cookies=self.session.cookies,
-        )
-        retried, result = self._handle_response(response, self.get_scores_raw, endDate, startDate)
-        if retried:
-            return result
-        response = result
-        response.raise_for_status()
-        # TODO this may return 204 if no scores are available in the given date range
-        scores = response.json() if response.status_code != 204 else []
-        return scores
+        # this may return 204 if no scores are available in the given date range
+        scores = self._get_json(url)
+        return scores if scores is not None else []
 
     def get_scores(
         self,
@@ -465,8 +507,30 @@ class BonusdriveAPIClient:
             )
         return returned_scores
 
-    def get_trip_details(self, tripId: str | None) -> Trip:
-        """Query the trip details endpoint and return the JSON response."""
+    @timed("geocode")
+    def lookup_place(self, latitude: float, longitude: float) -> str | None:
+        """Describe a location for display.
+
+        With a Photon server or offline geocoder this is "name, city, country"
+        (None if the lookup fails), without one it's the formatted coordinates.
+        """
+        if not self.photon:
+            return format_coordinates(latitude, longitude)
+        try:
+            geo = self.photon.reverse_geocode(latitude, longitude)
+        except Exception:
+            return None
+        return place_name(geo)
+
+    @timed("trip details")
+    def get_trip_details_raw(self, tripId: str | None, vehicleId: str | None = None) -> dict:
+        """Query the trip details endpoint and return the raw JSON response.
+
+        Args:
+            tripId: The trip to fetch, or None for the latest trip.
+            vehicleId: The vehicle the trip belongs to. Looked up if not given,
+                pass it in when fetching many trips to save a request per trip.
+        """
         if not self.authenticated:
             raise RuntimeError(
                 "Client is not authenticated. Call authenticate() first."
@@ -474,190 +538,131 @@ class BonusdriveAPIClient:
         if not tripId:
             tripId = self.get_trips(amount=1)[0].tripId
 
-        vehicleId = self.get_vehicleId()
+        if not vehicleId:
+            vehicleId = self.get_vehicleId()
         url = f"{self.base_url}/ipaid/api/v2/vehicles/{vehicleId}/trips/{tripId}?expand=events&expand=points&expand=scores&expand=user&expand=vehicle&expand=alerts"
-        response = self.session.get(
-            url,
-            headers={
-                "Accept-Encoding": "gzip",
-                "Accept-Language": "en-US",
-                "Connection": "Keep-Alive",
-                "Platform": "Android",
-                "User-Agent": "okhttp/4.12.0",
-            },
-            cookies=self.session.cookies,
-        )
-        retried, result = self._handle_response(response, self.get_trip_details, tripId)
-        if retried:
-            return result
-        response = result
-        response.raise_for_status()
-        if response.status_code != 200:
+        trip_data = self._get_json(url)
+        if trip_data is None:
             raise RuntimeError("Failed to obtain trip details")
-        trip_data = response.json()
-        
-        polyline_points = trip_data.get("geometry")
-        if polyline_points:
-            decoded_points = polyline.decode(polyline_points, 6)
-            trip_data["decoded_geometry"] = decoded_points
-            if decoded_points:
-                start_point_coordinates = decoded_points[0]
-                start_name = ""
-                end_point_coordinates = decoded_points[-1]
-                end_name = ""
-                if self.photon:
-                    try:
-                        start_geo = self.photon.reverse_geocode(
-                            start_point_coordinates[0], start_point_coordinates[1]
-                        )
-                    except Exception:
-                        start_geo = None
-                    # in Rust this would have been a single question mark. :(
-                    if isinstance(start_geo, dict):
-                        features = start_geo.get("features") or []
-                        if features and isinstance(features, list) and features[0]:
-                            props = features[0].get("properties") or {}
-                            start_name = props.get("name") or f"{props.get("street")} {props.get("housenumber") or ""}" or ""
-                            start_city = props.get("city") or ""
-                            start_country = props.get("country") or ""
-                        start_point_string = ""
-                        if start_name != "":
-                            start_point_string = f"{start_name}"
-                        if start_city != "":
-                            if start_point_string != "":
-                                start_point_string += f", {start_city}"
-                            else:
-                                start_point_string = f"{start_city}"
-                        if start_country != "":
-                            if start_point_string != "":
-                                start_point_string += f", {start_country}"
-                            else:
-                                start_point_string = f"{start_country}"
-                        trip_data["start_point_string"] = start_point_string
-                    try:
-                        end_geo = self.photon.reverse_geocode(
-                            end_point_coordinates[0], end_point_coordinates[1]
-                        )
-                    except Exception:
-                        end_geo = None
-                    if isinstance(end_geo, dict):
-                        features = end_geo.get("features") or []
-                        if features and isinstance(features, list) and features[0]:
-                            props = features[0].get("properties") or {}
-                            end_name = props.get("name") or f"{props.get("street")} {props.get("housenumber") or ""}" or ""
-                            end_city = props.get("city")
-                            end_country = props.get("country")
-                        end_point_string = ""
-                        if end_name != "":
-                            end_point_string = f"{end_name}"
-                        if end_city != "":
-                            if end_point_string != "":
-                                end_point_string += f", {end_city}"
-                            else:
-                                end_point_string = f"{end_city}"
-                        if end_country != "":
-                            if end_point_string != "":
-                                end_point_string += f", {end_country}"
-                            else:
-                                end_point_string = f"{end_country}"
-                        trip_data["end_point_string"] = end_point_string
-                else:
-                    lat, lon = start_point_coordinates
-                    trip_data["start_point_string"] = f"{'N' if lat >= 0 else 'S'}{abs(lat):.6f}, {'E' if lon >= 0 else 'W'}{abs(lon):.6f}"
-
-                    lat_e, lon_e = end_point_coordinates
-                    trip_data["end_point_string"] = f"{'N' if lat_e >= 0 else 'S'}{abs(lat_e):.6f}, {'E' if lon_e >= 0 else 'W'}{abs(lon_e):.6f}"
-
-        vehicle_data = trip_data["vehicle"]
-        user_data = trip_data["user"]
-        trip_scores_data = trip_data["tripScores"]
-
-        vehicle = Vehicle(
-            vehicleId=vehicle_data["vehicleId"],
-            make=vehicle_data["make"],
-            model=vehicle_data["model"],
-            nickname=vehicle_data.get("nickname"),
-            year=vehicle_data.get("year"),
-            plate=vehicle_data.get("plate"),
-            avatar=vehicle_data.get("avatar"),
-            accountId=vehicle_data.get("accountId"),
-            accountNumber=vehicle_data.get("accountNumber"),
-            policyInceptionDate=vehicle_data.get("policyInceptionDate"),
-            policyStartDate=vehicle_data.get("policyStartDate"),
-            extraAccountId=vehicle_data.get("extraAccountId"),
-            extraAccountNumber=vehicle_data.get("extraAccountNumber"),
-        )
+        return trip_data
 
-        user = User(
-            userId=user_data["userId"],
-            publicDisplayName=user_data["publicDisplayName"],
-            avatar=user_data.get("avatar"),
-            sharedInformation=user_data.get("sharedInformation"),
-            associatedUsers=user_data.get("associatedUsers"),
-            account=user_data.get("account"),
-            userRole=user_data.get("userRole"),
-            accountRole=user_data.get("accountRole"),
-            firstName=user_data["firstName"],
-            lastName=user_data["lastName"],
-        )
+    def get_trip_details(self, tripId: str | None, simplify_tolerance: float | None = None) -> Trip:
+        """Query the trip details endpoint, decode the geometry and look up start and end point.
 
-        scores_data = trip_scores_data["scores"]
-        scores = Scores(
-            over_speeding=scores_data["over.speeding"],
-            speeding=scores_data["speeding"],
-            distracted_driving=scores_data["distracted.driving"],
-            payd=scores_data["payd"],
-            overall=scores_data["overall"],
-            harsh_cornering=scores_data["harsh.cornering"],
-            harsh_acceleration=scores_data["harsh.acceleration"],
-            harsh_braking=scores_data["harsh.braking"],
-            mileage=scores_data["mileage"],
-        )
+        Args:
+            tripId: The trip to fetch, or None for the latest trip.
+            simplify_tolerance: Simplify geometry and snappedGeometry to this
+                many meters (see utils.simplify, needs the geo extra).
+        """
+        # copy, the parsed response may be shared with concurrent callers
+        trip_data = dict(self.get_trip_details_raw(tripId))
+        if simplify_tolerance:
+            from .utils.simplify import simplify_trip
 
-        trip_scores = TripScores(
-            scores=scores,
-            scoreType=trip_scores_data["scoreType"],
-        )
+            trip_data = simplify_trip(trip_data, simplify_tolerance)
 
-        trip = Trip(
-            events=trip_data.get("events"),
-            tripId=trip_data["tripId"],
-            tripStartTimestampUtc=trip_data["tripStartTimestampUtc"],
-            tripEndTimestampUtc=trip_data["tripEndTimestampUtc"],
-            tripStartTimestampLocal=trip_data["tripStartTimestampLocal"],
-            tripEndTimestampLocal=trip_data["tripEndTimestampLocal"],
-            tripProcessingEndTimestampUtc=trip_data["tripProcessingEndTimestampUtc"],
-            kilometers=trip_data["kilometers"],
-            avgKilometersPerHour=trip_data["avgKilometersPerHour"],
-            maxKilometersPerHour=trip_data["maxKilometersPerHour"],
-            seconds=trip_data["seconds"],
-            secondsOfIdling=trip_data["secondsOfIdling"],
-            timeZoneOffsetMillis=trip_data["timeZoneOffsetMillis"],
-            tripStatus=trip_data["tripStatus"],
-            pois=trip_data.get("pois"),
-            transportMode=trip_data["transportMode"],
-            transportModeMessageKey=trip_data["transportModeMessageKey"],
-            transportModeReason=trip_data.get("transportModeReason"),
-            geometry=trip_data["geometry"],
-            snappedGeometry=trip_data.get("snappedGeometry", []),
-            reconstructedStartGeometry=trip_data["reconstructedStartGeometry"],
-            tripStartStatus=trip_data["tripStartStatus"],
-            verified=trip_data["verified"],
-            hasAlerts=trip_data["hasAlerts"],
-            alerts=trip_data.get("alerts"),
-            vehicle=vehicle,
-            user=user,
-            device=trip_data.get("device"),
-            tripScores=trip_scores,
-            milStatus=trip_data.get("milStatus"),
-            dtcCount=trip_data.get("dtcCount"),
-            tripScore=trip_data["tripScore"],
-            eventsCount=trip_data["eventsCount"],
-            private=trip_data["private"],
-            tripUUID=trip_data["tripUUID"],
-            purpose=trip_data["purpose"],
-            decoded_geometry=trip_data.get("decoded_geometry"),
-            start_point_string=trip_data.get("start_point_string"),
-            end_point_string=trip_data.get("end_point_string"),
-        )
-        return trip
+        decoded_points = decode(trip_data.get("geometry"))
+        if decoded_points:
+            trip_data["decoded_geometry"] = decoded_points
+            trip_data["start_point_string"] = self.lookup_place(*decoded_points[0])
+            trip_data["end_point_string"] = self.lookup_place(*decoded_points[-1])
+
+        return parse_trip(trip_data)
+
+
+@timed("parse")
+def parse_trip(trip_data: dict) -> Trip:
+    """Build a Trip from a trip dict as returned by the logbook or trip details endpoint."""
+    vehicle_data = trip_data["vehicle"]
+    user_data = trip_data["user"]
+    trip_scores_data = trip_data["tripScores"]
+
+    vehicle = Vehicle(
+        vehicleId=vehicle_data["vehicleId"],
+        make=vehicle_data["make"],
+        model=vehicle_data["model"],
+        nickname=vehicle_data.get("nickname"),
+        year=vehicle_data.get("year"),
+        plate=vehicle_data.get("plate"),
+        avatar=vehicle_data.get("avatar"),
+        accountId=vehicle_data.get("accountId"),
+        accountNumber=vehicle_data.get("accountNumber"),
+        policyInceptionDate=vehicle_data.get("policyInceptionDate"),
+        policyStartDate=vehicle_data.get("policyStartDate"),
+        extraAccountId=vehicle_data.get("extraAccountId"),
+        extraAccountNumber=vehicle_data.get("extraAccountNumber"),
+    )
+
+    user = User(
+        userId=user_data["userId"],
+        publicDisplayName=user_data["publicDisplayName"],
+        avatar=user_data.get("avatar"),
+        sharedInformation=user_data.get("sharedInformation"),
+        associatedUsers=user_data.get("associatedUsers"),
+        account=user_data.get("account"),
+        userRole=user_data.get("userRole"),
+        accountRole=user_data.get("accountRole"),
+        firstName=user_data["firstName"],
+        lastName=user_data["lastName"],
+    )
+
+    scores_data = trip_scores_data["scores"]
+    scores = Scores(
+        over_speeding=scores_data["over.speeding"],
+        speeding=scores_data["speeding"],
+        distracted_driving=scores_data["distracted.driving"],
+        payd=scores_data["payd"],
+        overall=scores_data["overall"],
+        harsh_cornering=scores_data["harsh.cornering"],
+        harsh_acceleration=scores_data["harsh.acceleration"],
+        harsh_braking=scores_data["harsh.braking"],
+        mileage=scores_data["mileage"],
+    )
+
+    trip_scores = TripScores(
+        scores=scores,
+        scoreType=trip_scores_data["scoreType"],
+    )
+
+    trip = Trip(
+        events=trip_data.get("events"),
+        tripId=trip_data["tripId"],
+        tripStartTimestampUtc=trip_data["tripStartTimestampUtc"],
+        tripEndTimestampUtc=trip_data["tripEndTimestampUtc"],
+        tripStartTimestampLocal=trip_data["tripStartTimestampLocal"],
+        tripEndTimestampLocal=trip_data["tripEndTimestampLocal"],
+        tripProcessingEndTimestampUtc=trip_data["tripProcessingEndTimestampUtc"],
+        kilometers=trip_data["kilometers"],
+        avgKilometersPerHour=trip_data["avgKilometersPerHour"],
+        maxKilometersPerHour=trip_data["maxKilometersPerHour"],
+        seconds=trip_data["seconds"],
+        secondsOfIdling=trip_data["secondsOfIdling"],
+        timeZoneOffsetMillis=trip_data["timeZoneOffsetMillis"],
+        tripStatus=trip_data["tripStatus"],
+        pois=trip_data.get("pois"),
+        transportMode=trip_data["transportMode"],
+        transportModeMessageKey=trip_data["transportModeMessageKey"],
+        transportModeReason=trip_data.get("transportModeReason"),
+        geometry=trip_data["geometry"],
+        snappedGeometry=trip_data.get("snappedGeometry", []),
+        reconstructedStartGeometry=trip_data["reconstructedStartGeometry"],
+        tripStartStatus=trip_data["tripStartStatus"],
+        verified=trip_data["verified"],
+        hasAlerts=trip_data["hasAlerts"],
+        alerts=trip_data.get("alerts"),
+        vehicle=vehicle,
+        user=user,
+        device=trip_data.get("device"),
+        tripScores=trip_scores,
+        milStatus=trip_data.get("milStatus"),
+        dtcCount=trip_data.get("dtcCount"),
+        tripScore=trip_data["tripScore"],
+        eventsCount=trip_data["eventsCount"],
+        private=trip_data["private"],
+        tripUUID=trip_data["tripUUID"],
+        purpose=trip_data["purpose"],
+        decoded_geometry=trip_data.get("decoded_geometry"),
+        start_point_string=trip_data.get("start_point_string"),
+        end_point_string=trip_data.get("end_point_string"),
+    )
+    return trip
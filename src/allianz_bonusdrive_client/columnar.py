@@ -0,0 +1,159 @@
+import os
+from typing import Iterable
+
+try:
+    import pyarrow as pa
+except ImportError as e:  # optional, pip install allianz-bonusdrive-client[arrow]
+    raise ImportError("Columnar output needs pyarrow, install allianz-bonusdrive-client[arrow]") from e
+
+# (column, path in the raw trip dict, type)
+COLUMNS = [
+    ("tripId", ("tripId",), pa.string()),
+    ("vehicleId", ("vehicle", "vehicleId"), pa.string()),
+    ("userId", ("user", "userId"), pa.string()),
+    ("start_utc", ("tripStartTimestampUtc",), pa.timestamp("ms", tz="UTC")),
+    ("end_utc", ("tripEndTimestampUtc",), pa.timestamp("ms", tz="UTC")),
+    # local wall clock time, the server encodes it as if it was UTC
+    ("start_local", ("tripStartTimestampLocal",), pa.timestamp("ms")),
+    ("end_local", ("tripEndTimestampLocal",), pa.timestamp("ms")),
+    ("processed_utc", ("tripProcessingEndTimestampUtc",), pa.timestamp("ms", tz="UTC")),
+    ("kilometers", ("kilometers",), pa.float64()),
+    ("seconds", ("seconds",), pa.int64()),
+    ("secondsOfIdling", ("secondsOfIdling",), pa.int64()),
+    ("avgKilometersPerHour", ("avgKilometersPerHour",), pa.float64()),
+    ("maxKilometersPerHour", ("maxKilometersPerHour",), pa.float64()),
+    ("tripScore", ("tripScore",), pa.float64()),
+    ("eventsCount", ("eventsCount",), pa.int64()),
+    ("transportMode", ("transportMode",), pa.string()),
+    ("purpose", ("purpose",), pa.string()),
+    ("private", ("private",), pa.bool_()),
+    ("verified", ("verified",), pa.bool_()),
+    ("scoreType", ("tripScores", "scoreType"), pa.int64()),
+    *(
+        (f"score_{key.replace('.', '_')}", ("tripScores", "scores", key), pa.float64())
+        for key in (
+            "overall", "speeding", "over.speeding", "distracted.driving", "payd",
+            "harsh.cornering", "harsh.acceleration", "harsh.braking", "mileage",
+        )
+    ),
+]
+
+SCHEMA = pa.schema([(name, type) for name, _, type in COLUMNS])
+
+# ids are strings in the schema, but some payloads have them as numbers
+_ID_COLUMNS = {"tripId", "vehicleId", "userId"}
+
+
+def _get(data: dict, path: tuple):
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def to_columns(items: Iterable[dict], include_geometry: bool = False) -> dict[str, list]:
+    """Flatten raw trips into one list per column, without building Trip objects.
+
+    Args:
+        items: Logbook items ({"trip": ...}, e.g. client.iter_trips_raw()) or
+            raw trip dicts (e.g. a TripStore).
+        include_geometry: Add the encoded geometry as a column.
+    """
+    columns = {name: [] for name, _, _ in COLUMNS}
+    if include_geometry:
+        columns["geometry"] = []
+    getters = [(columns[name], path, name in _ID_COLUMNS) for name, path, _ in COLUMNS]
+    for item in items:
+        trip = item.get("trip", item)
+        for values, path, is_id in getters:
+            value = _get(trip, path)
+            values.append(str(value) if is_id and value is not None else value)
+        if include_geometry:
+            columns["geometry"].append(trip.get("geometry"))
+    return columns
+
+
+def to_arrow(items: Iterable[dict], include_geometry: bool = False) -> "pa.Table":
+    """Raw trips as a typed Arrow table, see COLUMNS."""
+    schema = SCHEMA.append(pa.field("geometry", pa.string())) if include_geometry else SCHEMA
+    return pa.Table.from_pydict(to_columns(items, include_geometry), schema=schema)
+
+
+def to_pandas(items: Iterable[dict], include_geometry: bool = False):
+    """Raw trips as a pandas DataFrame (needs pandas)."""
+    return to_arrow(items, include_geometry).to_pandas()
+
+
+def write_parquet(items: Iterable[dict], root: str | os.PathLike, include_geometry: bool = False) -> int:
+    """Write raw trips as a Parquet dataset partitioned by year and month of the start.
+
+    The months the trips fall into are rewritten with their trips already in
+    the dataset plus the new ones, a trip written again replaces its old row.
+    So writing the same trips twice (e.g. the whole store after every sync)
+    doesn't duplicate them, and writing only a sync's new trips keeps the
+    older ones. The rewritten months get the new trips' columns, with or
+    without geometry.
+
+    Returns:
+        The number of trips written.
+    """
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    table = _last_per_trip(to_arrow(items, include_geometry))
+    written = table.num_rows
+    if written == 0:
+        return 0
+    months = {(row["year"], row["month"]) for row in _with_month(table).select(["year", "month"]).to_pylist()}
+    if os.path.isdir(root):
+        dataset = ds.dataset(root, format="parquet", partitioning="hive")
+        month_filter = None
+        for year, month in sorted(months, key=str):
+            if year is None:
+                # trips without a start, in the default partition. Every
+                # month adds a term, the filter never selects the whole dataset
+                matches = ds.field("year").is_null()
+            else:
+                matches = (ds.field("year") == year) & (ds.field("month") == month)
+            month_filter = matches if month_filter is None else month_filter | matches
+        columns = [name for name in table.schema.names if name in dataset.schema.names]
+        existing = dataset.to_table(columns=columns, filter=month_filter)
+        existing = existing.filter(pc.invert(pc.is_in(existing["tripId"], value_set=table["tripId"])))
+        if existing.num_rows:
+            for field in table.schema:
+                if field.name not in columns:
+                    existing = existing.append_column(field, pa.nulls(existing.num_rows, field.type))
+            table = pa.concat_tables([existing.select(table.schema.names).cast(table.schema), table])
+    # only the months written here are replaced, the others are left alone
+    pq.write_to_dataset(_with_month(table), root, partition_cols=["year", "month"], existing_data_behavior="delete_matching")
+    return written
+
+
+def _last_per_trip(table: "pa.Table") -> "pa.Table":
+    """Keep only the last row of each tripId, in the order of those rows."""
+    rows = pa.table({"tripId": table["tripId"], "row": pa.array(range(table.num_rows), pa.int64())})
+    last = rows.group_by("tripId").aggregate([("row", "max")])["row_max"]
+    if len(last) == table.num_rows:
+        return table
+    return table.take(last.sort())
+
+
+def _with_month(table: "pa.Table") -> "pa.Table":
+    import pyarrow.compute as pc
+
+    return table.append_column("year", pc.year(table["start_utc"])).append_column("month", pc.month(table["start_utc"]))
+
+
+def read_parquet(root: str | os.PathLike, columns: list[str] | None = None, filters=None) -> "pa.Table":
+    """Read a dataset written by write_parquet.
+
+    Args:
+        columns: Only read these columns.
+        filters: pyarrow filters, e.g. [("year", "=", 2025)], only the matching
+            partitions are read.
+    """
+    import pyarrow.parquet as pq
+
+    return pq.read_table(root, columns=columns, filters=filters)
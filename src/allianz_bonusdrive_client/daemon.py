@@ -0,0 +1,126 @@
+"""Keep an authenticated client around between CLI calls.
+
+`bonusdrive daemon` logs in once and listens on a Unix socket. CLI calls with
+--use-daemon send their arguments there and print what comes back, so they
+skip the login and most of the interpreter startup work.
+
+Protocol: the CLI sends one JSON line {"argv": [...]}, the daemon answers with
+one JSON line {"stdout": str, "stderr": str, "status": int} and closes the
+connection.
+
+This module is imported by the CLI on every --use-daemon call, so it must not
+import the client (and with it requests) at module level.
+"""
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import traceback
+
+# actions that stream forever, read or write files relative to the caller or
+# manage the daemon itself always run locally
+LOCAL_ONLY_ACTIONS = {"daemon", "follow", "export", "serve", "exporter", "hotspots", "backfill", "places"}
+# options that set up the client, but the daemon's client was created at startup
+LOCAL_ONLY_OPTIONS = ("gazetteer", "record", "replay")
+
+
+def local_only(args) -> set[str]:
+    """The actions and options of a parsed CLI call the daemon can't handle."""
+    options = {f"--{name}" for name in LOCAL_ONLY_OPTIONS if getattr(args, name)}
+    return LOCAL_ONLY_ACTIONS & set(args.action) | options
+
+
+def default_socket_path() -> str:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"bonusdrive-{os.getuid()}.sock")
+
+
+def forward(socket_path: str, argv: list[str], timeout: float | None = 300) -> dict | None:
+    """Run a CLI call in the daemon.
+
+    Returns the daemon's response, or None if no daemon is listening or it
+    doesn't answer within timeout seconds (e.g. it hangs), so the call can
+    run locally instead.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps({"argv": argv}).encode() + b"\n")
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except (FileNotFoundError, ConnectionRefusedError, TimeoutError):
+        return None
+    if not line:
+        # the daemon closed the connection without answering
+        return None
+    return json.loads(line)
+
+
+class CLIDaemon:
+    """Runs CLI actions on one long-lived, authenticated client."""
+
+    def __init__(self, client, socket_path: str | None = None):
+        self.client = client
+        self.socket_path = socket_path or default_socket_path()
+        # actions print to stdout, so only one runs at a time
+        self._lock = threading.Lock()
+        self._server = None
+
+    def execute(self, argv: list[str]) -> dict:
+        """Run one CLI call and capture its output."""
+        from .cli import parse_args, run_actions
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status = 0
+        with self._lock, contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                args = parse_args(argv)
+                unsupported = local_only(args)
+                if unsupported:
+                    print(f"{', '.join(sorted(unsupported))} can't run in the daemon", file=stderr)
+                    status = 2
+                else:
+                    run_actions(self.client, args)
+            except SystemExit as e:
+                # argparse errors, --help, --version
+                status = e.code if isinstance(e.code, int) else 0 if e.code is None else 1
+            except Exception:
+                traceback.print_exc(file=stderr)
+                status = 1
+        return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "status": status}
+
+    def serve_forever(self) -> None:
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                request = json.loads(self.rfile.readline())
+                response = daemon.execute(request["argv"])
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+
+        if os.path.exists(self.socket_path):
+            if forward(self.socket_path, ["--version"]) is not None:
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)  # stale socket from a crashed daemon
+
+        old_umask = os.umask(0o177)  # socket only accessible to the current user
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        finally:
+            os.umask(old_umask)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def shutdown(self) -> None:
+        if self._server:
+            self._server.shutdown()
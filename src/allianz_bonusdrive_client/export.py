@@ -0,0 +1,246 @@
+import abc
+import os
+import tempfile
+from dataclasses import asdict, is_dataclass
+from datetime import datetime, timezone
+from typing import BinaryIO, Callable, Iterable
+from xml.sax.saxutils import escape
+
+from .client import parse_trip
+from .utils.dataclasses import Trip
+from .utils.geometry import decode
+from .utils.jsonio import dumps
+
+
+def as_trip(item) -> Trip:
+    """Trip from a Trip, a raw trip dict (store, trip details) or a logbook item."""
+    if isinstance(item, Trip):
+        return item
+    return parse_trip(item["trip"] if "trip" in item else item)
+
+
+def _iso(timestamp_ms: int | None) -> str | None:
+    if timestamp_ms is None:
+        return None
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _events(trip: Trip) -> Iterable[tuple[str, dict]]:
+    """(event type, event dict) for every event of the trip."""
+    events = trip.events
+    if is_dataclass(events):
+        events = asdict(events)
+    for event_type, items in (events or {}).items():
+        for event in items or ():
+            yield event_type, asdict(event) if is_dataclass(event) else event
+
+
+class _TripWriter(abc.ABC):
+    """Shared setup of the exporters: open the target, prepare each trip's points and place names."""
+
+    def __init__(
+        self,
+        target: str | os.PathLike | BinaryIO,
+        include_events: bool = True,
+        simplify_tolerance: float | None = None,
+        lookup_place: Callable[[float, float], str | None] | None = None,
+    ):
+        """
+        Args:
+            target: File name or binary stream to write to.
+            include_events: Also export the driving events (braking, speeding, ...).
+            simplify_tolerance: Simplify the tracks to this many meters (geo extra).
+            lookup_place: Used to name start and end of trips that have no
+                names yet, e.g. client.lookup_place.
+        """
+        if isinstance(target, (str, os.PathLike)):
+            self._stream = open(target, "wb")
+            self._owns_stream = True
+        else:
+            self._stream = target
+            self._owns_stream = False
+        self.include_events = include_events
+        self.simplify_tolerance = simplify_tolerance
+        self.lookup_place = lookup_place
+        self.count = 0
+        self._closed = False
+
+    def _points(self, trip: Trip) -> list[tuple[float, float]]:
+        points = trip.decoded_geometry or decode(trip.geometry)
+        if self.simplify_tolerance and points:
+            from .utils.simplify import simplify
+
+            points = simplify(points, self.simplify_tolerance)
+        return points
+
+    def _places(self, trip: Trip, points) -> tuple[str | None, str | None]:
+        start, end = trip.start_point_string, trip.end_point_string
+        if self.lookup_place and points:
+            start = start or self.lookup_place(*points[0])
+            end = end or self.lookup_place(*points[-1])
+        return start, end
+
+    @abc.abstractmethod
+    def write(self, item) -> None:
+        """Write one Trip, raw trip dict or logbook item."""
+
+    def write_all(self, items) -> int:
+        """Write trips one by one, only one trip is held in memory at a time."""
+        for item in items:
+            self.write(item)
+        return self.count
+
+    @abc.abstractmethod
+    def _finish(self) -> None:
+        """Write what has to come after the last trip."""
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._finish()
+        if self._owns_stream:
+            self._stream.close()
+        else:
+            self._stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GeoJSONWriter(_TripWriter):
+    """Write trips as one GeoJSON FeatureCollection, feature by feature.
+
+    Every trip becomes a LineString feature with times, distance, scores and
+    place names, its events become Point features with the tripId.
+    """
+
+    def __init__(self, target, **kwargs):
+        super().__init__(target, **kwargs)
+        self._stream.write(b'{"type":"FeatureCollection","features":[\n')
+        self._first = True
+
+    def _feature(self, feature: dict) -> None:
+        if not self._first:
+            self._stream.write(b",\n")
+        self._first = False
+        self._stream.write(dumps(feature))
+
+    def write(self, item) -> None:
+        trip = as_trip(item)
+        points = self._points(trip)
+        start, end = self._places(trip, points)
+        self._feature({
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": [[lon, lat] for lat, lon in points]},
+            "properties": {
+                "tripId": trip.tripId,
+                "start": _iso(trip.tripStartTimestampUtc),
+                "end": _iso(trip.tripEndTimestampUtc),
+                "startPlace": start,
+                "endPlace": end,
+                "kilometers": trip.kilometers,
+                "seconds": trip.seconds,
+                "avgKilometersPerHour": trip.avgKilometersPerHour,
+                "maxKilometersPerHour": trip.maxKilometersPerHour,
+                "tripScore": trip.tripScore,
+                "scores": asdict(trip.tripScores.scores),
+                "vehicleId": trip.vehicle.vehicleId,
+            },
+        })
+        if self.include_events:
+            for event_type, event in _events(trip):
+                self._feature({
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [event["longitude"], event["latitude"]]},
+                    "properties": {
+                        "tripId": trip.tripId,
+                        "event": event_type,
+                        "time": _iso(event.get("timeStamp")),
+                        "level": event.get("level"),
+                        "kmPerHour": event.get("kmPerHour"),
+                        "kmSpeedLimit": event.get("kmSpeedLimit"),
+                    },
+                })
+        self.count += 1
+
+    def _finish(self) -> None:
+        self._stream.write(b"\n]}\n")
+
+
+class GPXWriter(_TripWriter):
+    """Write trips as GPX 1.1, one track per trip.
+
+    GPX wants all waypoints before the tracks, so with include_events the
+    tracks go to a temporary file (on disk once it gets large) and are copied
+    behind the event waypoints on close.
+    """
+
+    def __init__(self, target, **kwargs):
+        super().__init__(target, **kwargs)
+        self._stream.write(
+            b'<?xml version="1.0" encoding="UTF-8"?>\n'
+            b'<gpx version="1.1" creator="allianz-bonusdrive-client" xmlns="http://www.topografix.com/GPX/1/1">\n'
+        )
+        self._tracks = tempfile.SpooledTemporaryFile(max_size=1 << 20) if self.include_events else self._stream
+
+    def write(self, item) -> None:
+        trip = as_trip(item)
+        points = self._points(trip)
+        start, end = self._places(trip, points)
+        scores = trip.tripScores.scores
+        description = (
+            f"{start or '?'} -> {end or '?'}, {trip.kilometers:.2f} km, "
+            f"Score {scores.overall}"
+        )
+        parts = [
+            f"<trk><name>{escape(str(trip.tripId))}</name><desc>{escape(description)}</desc>",
+            f"<type>{escape(trip.transportMode or '')}</type><trkseg>",
+            *(f'<trkpt lat="{lat:.6f}" lon="{lon:.6f}"/>' for lat, lon in points),
+            "</trkseg></trk>\n",
+        ]
+        self._tracks.write("".join(parts).encode("utf-8"))
+        if self.include_events:
+            for event_type, event in _events(trip):
+                time = _iso(event.get("timeStamp"))
+                self._stream.write((
+                    f'<wpt lat="{event["latitude"]:.6f}" lon="{event["longitude"]:.6f}">'
+                    + (f"<time>{time}</time>" if time else "")
+                    + f"<name>{escape(event_type)}</name>"
+                    + f"<desc>{escape(f'{trip.tripId}, Stufe {event.get('level')}, {event.get('kmPerHour')} km/h')}</desc>"
+                    + f"<type>{escape(event_type)}</type></wpt>\n"
+                ).encode("utf-8"))
+        self.count += 1
+
+    def _finish(self) -> None:
+        if self._tracks is not self._stream:
+            self._tracks.seek(0)
+            while chunk := self._tracks.read(1 << 16):
+                self._stream.write(chunk)
+            self._tracks.close()
+        self._stream.write(b"</gpx>\n")
+
+
+def export(trips, target: str | os.PathLike | BinaryIO, format: str | None = None, **kwargs) -> int:
+    """Export trips to GeoJSON or GPX.
+
+    Args:
+        trips: Trips, raw trip dicts or logbook items, e.g. client.iter_trips_raw()
+            or a TripStore. Consumed lazily.
+        target: File name or binary stream.
+        format: "geojson" or "gpx", by default taken from the file extension.
+        **kwargs: Passed on to the writer (include_events, simplify_tolerance, lookup_place).
+
+    Returns:
+        The number of trips written.
+    """
+    if format is None:
+        format = "gpx" if str(target).lower().endswith(".gpx") else "geojson"
+    writers = {"geojson": GeoJSONWriter, "gpx": GPXWriter}
+    if format not in writers:
+        raise ValueError(f"Unknown export format {format!r}")
+    with writers[format](target, **kwargs) as writer:
+        return writer.write_all(trips)
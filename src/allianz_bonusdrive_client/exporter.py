@@ -0,0 +1,239 @@
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+import requests
+
+from .client import BonusdriveAPIClient, date_range
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class MetricsExporter:
+    """Prometheus exporter for scores, badges and trip statistics.
+
+    A background thread refreshes the values every refresh_interval seconds
+    and renders the metrics page once; scrapes only get the rendered page,
+    so they never wait for, or cause, requests to the server. Trips are
+    counted incrementally: each refresh only reads the logbook up to the
+    newest trip it has already seen.
+
+    Counters (trips, kilometers, driving time, events) start at the trips of
+    the first refresh, at most initial_trips of them.
+    """
+
+    def __init__(
+        self,
+        client: BonusdriveAPIClient,
+        refresh_interval: float = 300,
+        initial_trips: int = 100,
+        page_size: int = 20,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            client: Authenticated client.
+            refresh_interval: Seconds between two refreshes.
+            initial_trips: Logbook trips counted on the first refresh.
+            page_size: Trips per logbook request.
+            clock: Returns the current time as a UNIX timestamp.
+        """
+        self.client = client
+        self.clock = clock
+        self.refresh_interval = refresh_interval
+        self.initial_trips = initial_trips
+        self.page_size = page_size
+        self.trips_total = 0
+        self.kilometers_total = 0.0
+        self.seconds_total = 0
+        self.events_total: Counter = Counter()
+        # local date -> kilometers, for the last days
+        self.kilometers_by_day: dict[str, float] = {}
+        self.last_trip: dict | None = None
+        self.scores: dict[str, float] = {}
+        self.badge_levels: dict[str, int] = {}
+        self.refresh_errors = 0
+        self.last_refresh = 0.0
+        self._newest_trip_id: str | None = None
+        self._newest_start = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server: ThreadingHTTPServer | None = None
+        # scrapes before the first refresh still get the error and refresh series
+        self._page = self.render()
+
+    def _new_trips(self) -> list[dict]:
+        """Logbook trips since the last refresh, oldest first."""
+        limit = None if self._newest_trip_id else self.initial_trips
+        trips = []
+        for item in self.client.iter_trips_raw(limit=limit, page_size=self.page_size):
+            trip = item["trip"]
+            # the logbook is sorted newest first, stop at the trips counted before
+            if trip["tripId"] == self._newest_trip_id or (trip.get("tripStartTimestampUtc") or 0) < self._newest_start:
+                break
+            trips.append(trip)
+        return trips[::-1]
+
+    def _add_trip(self, trip: dict) -> None:
+        self.trips_total += 1
+        self.kilometers_total += trip.get("kilometers") or 0.0
+        self.seconds_total += trip.get("seconds") or 0
+        for event_type, events in (trip.get("events") or {}).items():
+            for event in events or ():
+                self.events_total[(event_type, event.get("level"))] += 1
+        start = trip.get("tripStartTimestampLocal")
+        if start is not None:
+            # local wall-clock time, encoded as if it were UTC
+            day = datetime.fromtimestamp(start / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+            self.kilometers_by_day[day] = self.kilometers_by_day.get(day, 0.0) + (trip.get("kilometers") or 0.0)
+            # a week is enough for "today" and "yesterday" panels
+            for old_day in sorted(self.kilometers_by_day)[:-7]:
+                del self.kilometers_by_day[old_day]
+        self.last_trip = trip
+        self._newest_trip_id = trip["tripId"]
+        self._newest_start = trip.get("tripStartTimestampUtc") or 0
+
+    def refresh(self) -> None:
+        """Fetch new trips, scores and badges and render the metrics page."""
+        try:
+            new_trips = self._new_trips()
+            # the last 30 days as of this refresh, the client's defaults are those of its import
+            endDate, startDate = date_range(today=datetime.fromtimestamp(self.clock()))
+            scores = self.client.get_scores(endDate, startDate)
+            badges = {
+                badge_type: self.client.get_badges(badge_type, endDate, startDate) for badge_type in ("daily", "monthly")
+            }
+        except Exception:
+            with self._lock:
+                self.refresh_errors += 1
+                self._page = self.render()
+            raise
+        with self._lock:
+            for trip in new_trips:
+                self._add_trip(trip)
+            if scores:
+                self.scores = asdict(scores[max(scores)])
+            for badge_type, items in badges.items():
+                if items:
+                    self.badge_levels[badge_type] = max(items, key=lambda badge: badge.date).level
+            self.last_refresh = self.clock()
+            self._page = self.render()
+
+    def render(self) -> bytes:
+        """The metrics in Prometheus text format."""
+        lines = []
+
+        def metric(name, kind, help, samples):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {value}")
+
+        metric("bonusdrive_trips_total", "counter", "Trips seen since the exporter started.", [({}, self.trips_total)])
+        metric("bonusdrive_kilometers_total", "counter", "Kilometers driven in those trips.", [({}, self.kilometers_total)])
+        metric("bonusdrive_driving_seconds_total", "counter", "Driving time of those trips.", [({}, self.seconds_total)])
+        metric(
+            "bonusdrive_events_total",
+            "counter",
+            "Driving events in those trips.",
+            [({"type": event_type, "level": level}, count) for (event_type, level), count in sorted(self.events_total.items(), key=str)],
+        )
+        metric(
+            "bonusdrive_kilometers_day",
+            "gauge",
+            "Kilometers driven per local day, last 7 days with trips.",
+            [({"date": day}, km) for day, km in sorted(self.kilometers_by_day.items())],
+        )
+        if self.last_trip:
+            metric("bonusdrive_last_trip_score", "gauge", "Score of the newest trip.", [({}, self.last_trip.get("tripScore", 0))])
+            metric(
+                "bonusdrive_last_trip_timestamp_seconds",
+                "gauge",
+                "End of the newest trip.",
+                [({}, (self.last_trip.get("tripEndTimestampUtc") or 0) / 1000)],
+            )
+        metric(
+            "bonusdrive_score",
+            "gauge",
+            "Latest daily score per component.",
+            [({"component": component}, value) for component, value in self.scores.items()],
+        )
+        metric(
+            "bonusdrive_badge_level",
+            "gauge",
+            "Level of the latest badge (1 gold, 2 silver, 3 bronze).",
+            [({"type": badge_type}, level) for badge_type, level in self.badge_levels.items()],
+        )
+        metric("bonusdrive_refresh_errors_total", "counter", "Failed refreshes.", [({}, self.refresh_errors)])
+        metric("bonusdrive_last_refresh_timestamp_seconds", "gauge", "Last successful refresh.", [({}, self.last_refresh)])
+        return ("\n".join(lines) + "\n").encode()
+
+    def metrics(self) -> bytes:
+        """The page rendered by the last refresh."""
+        with self._lock:
+            return self._page
+
+    def run(self) -> None:
+        """Refresh every refresh_interval seconds until stop()."""
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except requests.HTTPError as e:
+                # counted in refresh_errors, log in again if the session was rejected
+                if e.response is not None and e.response.status_code in (401, 403):
+                    self.client.authenticated = False
+                    try:
+                        self.client.authenticate()
+                    except Exception:
+                        pass
+            except Exception:
+                # counted in refresh_errors, try again next time
+                pass
+            self._stop.wait(self.refresh_interval)
+
+    def serve_forever(self, host: str = "127.0.0.1", port: int = 9800) -> None:
+        """Serve /metrics and refresh in the background."""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(HTTPStatus.NOT_FOUND)
+                    return
+                body = exporter.metrics()
+                self.send_response(HTTPStatus.OK)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        threading.Thread(target=self.run, daemon=True).start()
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
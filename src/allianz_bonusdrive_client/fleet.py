@@ -0,0 +1,157 @@
+import heapq
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from .client import BonusdriveAPIClient
+from .utils.constants import BASE_URL
+from .utils.ratelimit import TokenBucket
+from .utils.transport import RateLimitedAdapter
+
+
+@dataclass
+class Account:
+    name: str
+    email: str | None = None
+    password: str | None = None
+    tgt: str | None = None
+
+
+@dataclass
+class FleetResult:
+    account: Account
+    result: Any = None
+    error: BaseException | None = None
+    finished_at: float = field(default_factory=time.time)
+
+
+def sync_latest_trips(client: BonusdriveAPIClient):
+    return client.get_trips(amount=10)
+
+
+class FleetPoller:
+    """Poll many BonusDrive accounts from one process.
+
+    All accounts share one connection pool and one request budget (a token
+    bucket in front of the pool, so logins count as well). A single scheduler
+    loop hands due accounts to a small worker pool; each account is synced
+    every `interval` seconds, spread out by `jitter`, and never runs twice at
+    the same time. Results and per-account errors come back through poll() as
+    one stream of FleetResult.
+
+    Clients are created and logged in lazily on their first sync. After a
+    failed sync, the next one logs in again.
+    """
+
+    def __init__(
+        self,
+        accounts: list[Account],
+        base_url: str = BASE_URL,
+        interval: float = 900,
+        jitter: float = 0.1,
+        rate: float = 5.0,
+        burst: float | None = None,
+        max_workers: int = 8,
+        sync: Callable[[BonusdriveAPIClient], Any] = sync_latest_trips,
+        client_factory: Callable[[Account], BonusdriveAPIClient] | None = None,
+    ):
+        """
+        Args:
+            accounts: Accounts to poll, each with a TGT or email and password.
+            base_url: BonusDrive server.
+            interval: Seconds between two syncs of the same account.
+            jitter: Random spread of the interval, as a fraction of it.
+            rate: Global budget in HTTP requests per second.
+            burst: Requests allowed in a burst (defaults to rate).
+            max_workers: Syncs running at the same time.
+            sync: Called with an authenticated client, its return value is
+                the FleetResult's result.
+            client_factory: Creates the client for an account. Defaults to a
+                BonusdriveAPIClient on the shared pool.
+        """
+        self.accounts = accounts
+        self.base_url = base_url
+        self.interval = interval
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self.sync = sync
+        self.adapter = RateLimitedAdapter(
+            TokenBucket(rate, burst),
+            pool_connections=2,
+            pool_maxsize=max_workers,
+        )
+        self.client_factory = client_factory or self._create_client
+        self._clients: dict[int, BonusdriveAPIClient] = {}
+        self._stop = threading.Event()
+
+    def _create_client(self, account: Account) -> BonusdriveAPIClient:
+        return BonusdriveAPIClient(
+            self.base_url,
+            account.email,
+            account.password,
+            account.tgt,
+            adapter=self.adapter,
+        )
+
+    def _next_interval(self) -> float:
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _run_sync(self, index: int) -> FleetResult:
+        account = self.accounts[index]
+        try:
+            client = self._clients.get(index)
+            if client is None:
+                client = self._clients[index] = self.client_factory(account)
+            if not client.authenticated:
+                client.authenticate()
+                # keep a TGT obtained with the password for later logins
+                account.tgt = client.tgt
+            return FleetResult(account, result=self.sync(client))
+        except Exception as e:
+            if index in self._clients:
+                self._clients[index].authenticated = False
+            return FleetResult(account, error=e)
+
+    def stop(self) -> None:
+        """Stop poll() after the syncs currently running have finished."""
+        self._stop.set()
+
+    def poll(self) -> Iterator[FleetResult]:
+        """Sync all accounts forever (until stop()) and yield every result."""
+        self._stop.clear()
+        now = time.monotonic()
+        # spread the first round out instead of starting all accounts at once
+        schedule = [
+            (now + random.uniform(0, self.interval * self.jitter), index)
+            for index in range(len(self.accounts))
+        ]
+        heapq.heapify(schedule)
+        results: queue.Queue[tuple[int, FleetResult]] = queue.Queue()
+        running = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while not self._stop.is_set() or running:
+                now = time.monotonic()
+                while not self._stop.is_set() and schedule and schedule[0][0] <= now:
+                    _, index = heapq.heappop(schedule)
+                    future = executor.submit(self._run_sync, index)
+                    future.add_done_callback(
+                        lambda f, index=index: results.put((index, f.result()))
+                    )
+                    running += 1
+
+                # wake up at least once a second to notice stop()
+                timeout = 1.0
+                if schedule and not self._stop.is_set():
+                    timeout = min(timeout, max(0.0, schedule[0][0] - time.monotonic()))
+                try:
+                    index, result = results.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+                running -= 1
+                heapq.heappush(schedule, (time.monotonic() + self._next_interval(), index))
+                yield result
@@ -0,0 +1,237 @@
+import json
+import math
+import os
+from dataclasses import dataclass, field
+
+try:
+    import numpy as np
+except ImportError as e:  # optional, pip install allianz-bonusdrive-client[geo]
+    raise ImportError("Geofences need numpy, install allianz-bonusdrive-client[geo]") from e
+
+from .utils.dataclasses import Trip
+from .utils.geometry import decode_many
+
+# points x edges compared at once, bounds the memory of a containment test
+_BLOCK = 1 << 20
+
+
+@dataclass
+class Zone:
+    name: str
+    # rings of (latitude, longitude), the first one is the outline, the others are holes
+    rings: list[list[tuple[float, float]]]
+    # purpose of trips starting or ending here, e.g. "BUSINESS"
+    purpose: str | None = None
+
+
+@dataclass
+class TripZones:
+    tripId: str
+    start: list[str] = field(default_factory=list)
+    end: list[str] = field(default_factory=list)
+    # zones any point of the trip is in, only with through=True
+    through: list[str] = field(default_factory=list)
+    purpose: str | None = None
+
+
+def _trip_geometry(trip) -> tuple[str, str | None]:
+    """(tripId, encoded geometry) of a Trip, raw trip dict or logbook item."""
+    if isinstance(trip, Trip):
+        return trip.tripId, trip.geometry
+    trip = trip.get("trip", trip)
+    return trip["tripId"], trip.get("geometry")
+
+
+class Geofences:
+    """Zones (polygons) to classify trips by where they start, end or pass.
+
+    Every zone's edges and bounding box are precomputed, and the zones are
+    hashed into a grid of cell_size degrees by their bounding box. A batch of
+    points is sorted into grid cells once, so each zone only looks at the
+    points in its cells; those inside its bounding box get an even-odd
+    ray casting test against all its edges at once.
+
+    Zones can overlap, a point gets every zone it's in. Only the geometry's
+    points are tested, a trip passing a zone between two points doesn't
+    count as passing it.
+    """
+
+    def __init__(self, zones: list[Zone], cell_size: float = 0.05):
+        """
+        Args:
+            zones: The zones, in order of precedence for the purpose.
+            cell_size: Grid cell size in degrees.
+        """
+        self.zones = zones
+        self.cell_size = cell_size
+        self._edges = []
+        self._bounds = np.empty((len(zones), 4))
+        # cell key (see _cell_keys) -> zones whose bounding box overlaps it
+        self._grid: dict[int, list[int]] = {}
+        for zone_index, zone in enumerate(zones):
+            starts, ends = [], []
+            for ring in zone.rings:
+                ring = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+                if len(ring) < 3:
+                    raise ValueError(f"Zone {zone.name} has a ring with less than 3 points")
+                starts.append(ring)
+                ends.append(np.roll(ring, -1, axis=0))
+            starts, ends = np.concatenate(starts), np.concatenate(ends)
+            # horizontal edges never cross a ray along the latitude
+            sloped = starts[:, 0] != ends[:, 0]
+            starts, ends = starts[sloped], ends[sloped]
+            slopes = (ends[:, 1] - starts[:, 1]) / (ends[:, 0] - starts[:, 0])
+            self._edges.append((starts[:, 0], ends[:, 0], starts[:, 1], slopes))
+            outline = np.asarray(zone.rings[0], dtype=np.float64)
+            south, west = outline.min(axis=0)
+            north, east = outline.max(axis=0)
+            self._bounds[zone_index] = (south, west, north, east)
+            for cell_lat in range(math.floor(south / cell_size), math.floor(north / cell_size) + 1):
+                for cell_lon in range(math.floor(west / cell_size), math.floor(east / cell_size) + 1):
+                    self._grid.setdefault((cell_lat << 32) + cell_lon, []).append(zone_index)
+
+    @classmethod
+    def from_geojson(cls, source: str | os.PathLike | dict, **kwargs) -> "Geofences":
+        """Zones from the Polygon and MultiPolygon features of a GeoJSON file or dict.
+
+        The zone's name and purpose are the features' "name" and "purpose"
+        properties.
+        """
+        if not isinstance(source, dict):
+            with open(source, encoding="utf-8") as f:
+                source = json.load(f)
+        zones = []
+        for number, feature in enumerate(source.get("features", []), 1):
+            geometry = feature.get("geometry") or {}
+            properties = feature.get("properties") or {}
+            if geometry.get("type") == "Polygon":
+                polygons = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiPolygon":
+                polygons = geometry["coordinates"]
+            else:
+                continue
+            name = properties.get("name") or f"Zone {number}"
+            for polygon in polygons:
+                # GeoJSON is longitude, latitude
+                rings = [[(lat, lon) for lon, lat, *_ in ring] for ring in polygon]
+                zones.append(Zone(name, rings, properties.get("purpose")))
+        return cls(zones, **kwargs)
+
+    def _cell_keys(self, points: "np.ndarray") -> "np.ndarray":
+        """One int64 per grid cell of the points, cheaper to group than pairs."""
+        cells = np.floor(points / self.cell_size).astype(np.int64)
+        return (cells[:, 0] << 32) + cells[:, 1]
+
+    def _inside(self, zone_index: int, points: "np.ndarray") -> "np.ndarray":
+        """Even-odd test of points against all edges of a zone, vectorized."""
+        lat1, lat2, lon1, slopes = self._edges[zone_index]
+        inside = np.zeros(len(points), dtype=bool)
+        step = max(1, _BLOCK // max(len(lat1), 1))
+        for offset in range(0, len(points), step):
+            block = points[offset : offset + step]
+            lat, lon = block[:, :1], block[:, 1:]
+            # edges the ray eastwards from the point crosses
+            crosses = ((lat1 > lat) != (lat2 > lat)) & (lon < lon1 + (lat - lat1) * slopes)
+            inside[offset : offset + step] = np.count_nonzero(crosses, axis=1) % 2 == 1
+        return inside
+
+    def contains(self, points) -> "np.ndarray":
+        """Which zones (latitude, longitude) points are in, as an (n points, n zones) bool array."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        result = np.zeros((len(points), len(self.zones)), dtype=bool)
+        # e.g. trips without geometry
+        valid = np.flatnonzero(np.isfinite(points).all(axis=1))
+        if len(valid) == 0 or not self.zones:
+            return result
+        unique_cells, inverse = np.unique(self._cell_keys(points[valid]), return_inverse=True)
+        # points grouped by cell: order[starts[c]:starts[c + 1]] are the points in unique_cells[c]
+        order = valid[np.argsort(inverse, kind="stable")]
+        starts = np.concatenate(([0], np.cumsum(np.bincount(inverse, minlength=len(unique_cells)))))
+        zone_cells: dict[int, list[int]] = {}
+        for cell_number, cell in enumerate(unique_cells.tolist()):
+            for zone_index in self._grid.get(cell, ()):
+                zone_cells.setdefault(zone_index, []).append(cell_number)
+        for zone_index, cell_numbers in zone_cells.items():
+            candidates = np.concatenate([order[starts[c] : starts[c + 1]] for c in cell_numbers])
+            south, west, north, east = self._bounds[zone_index]
+            lat, lon = points[candidates, 0], points[candidates, 1]
+            candidates = candidates[(lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)]
+            result[candidates, zone_index] = self._inside(zone_index, points[candidates])
+        return result
+
+    def _names(self, row: "np.ndarray") -> list[str]:
+        names = []
+        for zone_index in np.flatnonzero(row):
+            if self.zones[zone_index].name not in names:
+                names.append(self.zones[zone_index].name)
+        return names
+
+    def _purpose(self, *rows: "np.ndarray") -> str | None:
+        for row in rows:
+            for zone_index in np.flatnonzero(row):
+                if self.zones[zone_index].purpose:
+                    return self.zones[zone_index].purpose
+        return None
+
+    def classify(self, trips, through: bool = False, batch_points: int = 200_000) -> list[TripZones]:
+        """The zones each trip starts in, ends in and (with through) passes.
+
+        A trip's purpose is the purpose of the first zone (in the order of
+        zones) it ends in, else starts in, else passes.
+
+        Args:
+            trips: Trips, raw trip dicts or logbook items, e.g. a TripStore.
+            through: Also test every point of the geometry, not only start and end.
+            batch_points: With through, points tested at once.
+        """
+        geometries = [_trip_geometry(trip) for trip in trips]
+        # one vectorized decode for all trips
+        points, counts = decode_many([geometry for _, geometry in geometries])
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        has_points = counts > 0
+        endpoints = np.full((len(counts), 2, 2), np.nan)
+        endpoints[has_points, 0] = points[offsets[has_points]]
+        endpoints[has_points, 1] = points[(offsets + counts - 1)[has_points]]
+        at_endpoints = self.contains(endpoints.reshape(-1, 2)).reshape(len(counts), 2, len(self.zones))
+
+        passed = np.zeros((len(counts), len(self.zones)), dtype=bool)
+        if through and len(points):
+            trip_of_point = np.repeat(np.arange(len(counts)), counts)
+            for start in range(0, len(points), batch_points):
+                point_index, zone_index = np.nonzero(self.contains(points[start : start + batch_points]))
+                passed[trip_of_point[start + point_index], zone_index] = True
+
+        results = []
+        in_any = at_endpoints.any(axis=(1, 2)) | passed.any(axis=1)
+        for trip_number, (tripId, _) in enumerate(geometries):
+            if not in_any[trip_number]:
+                results.append(TripZones(str(tripId)))
+                continue
+            start, end = at_endpoints[trip_number]
+            results.append(
+                TripZones(
+                    str(tripId),
+                    self._names(start),
+                    self._names(end),
+                    self._names(passed[trip_number]),
+                    self._purpose(end, start, passed[trip_number]),
+                )
+            )
+        return results
+
+    def tag(self, trips, through: bool = False) -> int:
+        """Set the purpose of trips (Trip objects or raw dicts) from their zones, returns how many got one.
+
+        Trips without a zone with a purpose keep theirs.
+        """
+        trips = list(trips)
+        tagged = 0
+        for trip, zones in zip(trips, self.classify(trips, through)):
+            if zones.purpose is None:
+                continue
+            if isinstance(trip, Trip):
+                trip.purpose = zones.purpose
+            else:
+                trip.get("trip", trip)["purpose"] = zones.purpose
+            tagged += 1
+        return tagged
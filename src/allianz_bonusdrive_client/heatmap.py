@@ -0,0 +1,229 @@
+import json
+import math
+import os
+import pathlib
+import struct
+import zlib
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError as e:  # optional, pip install allianz-bonusdrive-client[geo]
+    raise ImportError("Heatmaps need numpy, install allianz-bonusdrive-client[geo]") from e
+
+from .utils.dataclasses import Trip
+from .utils.geometry import decode_array
+
+TILE_SIZE = 256
+# Web Mercator can't show the poles
+MAX_LATITUDE = 85.05112878
+
+# transparent -> blue -> red -> yellow
+_STOPS = np.array([0.0, 0.33, 0.66, 1.0])
+_COLORS = np.array([
+    [0, 0, 255, 0],
+    [0, 64, 255, 160],
+    [255, 0, 0, 210],
+    [255, 255, 0, 255],
+])
+PALETTE = np.stack(
+    [np.interp(np.linspace(0, 1, 256), _STOPS, _COLORS[:, channel]) for channel in range(4)],
+    axis=1,
+).astype(np.uint8)
+
+
+def to_pixels(points: "np.ndarray", zoom: int) -> "np.ndarray":
+    """(latitude, longitude) rows to global Web Mercator pixel coordinates (x, y) at a zoom level."""
+    latitudes = np.radians(np.clip(points[:, 0], -MAX_LATITUDE, MAX_LATITUDE))
+    scale = TILE_SIZE * 2**zoom
+    x = (points[:, 1] + 180.0) / 360.0 * scale
+    y = (1.0 - np.log(np.tan(latitudes) + 1.0 / np.cos(latitudes)) / math.pi) / 2.0 * scale
+    return np.column_stack((x, y))
+
+
+def densify(pixels: "np.ndarray", step: float = 1.0) -> "np.ndarray":
+    """Interpolate points along each segment so consecutive points are at most step pixels apart."""
+    if len(pixels) < 2:
+        return pixels
+    segments = np.diff(pixels, axis=0)
+    counts = np.maximum(np.ceil(np.hypot(segments[:, 0], segments[:, 1]) / step).astype(np.int64), 1)
+    # for every output point: the segment it's on and how far along
+    segment_index = np.repeat(np.arange(len(segments)), counts)
+    starts = np.cumsum(counts) - counts
+    fraction = (np.arange(counts.sum()) - starts[segment_index]) / counts[segment_index]
+    dense = pixels[segment_index] + segments[segment_index] * fraction[:, None]
+    return np.concatenate((dense, pixels[-1:]))
+
+
+def encode_png(rgba: "np.ndarray") -> bytes:
+    """Encode an (height, width, 4) uint8 array as an RGBA PNG."""
+    height, width, _ = rgba.shape
+    # filter type 0 (none) in front of every row
+    raw = np.concatenate((np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, width * 4)), axis=1)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+class Heatmap:
+    """Where the car drives, as Web Mercator tiles of trip counts.
+
+    Trip lines are interpolated to one point per pixel at the highest zoom
+    level, and every pixel of a 256x256 tile counts the trips that crossed
+    it, at every zoom level. Tiles are kept as compressed numpy counts and
+    rendered to PNGs in the usual tiles/<z>/<x>/<y>.png layout, so a map
+    library can show them directly.
+
+    Adding a trip only touches the tiles it crosses, and save() only writes
+    those, so updating after a sync costs about as much as the new trips.
+    At most max_tiles tiles are kept in memory; changed tiles pushed out
+    are written next to the saved counts until save() commits them.
+    Colors use a fixed logarithmic scale up to saturation, so tiles don't
+    have to be rendered again when others change.
+    """
+
+    def __init__(self, root: str | os.PathLike, zooms=range(8, 16), saturation: int = 50, max_tiles: int = 1024):
+        """
+        Args:
+            root: Directory for the tiles.
+            zooms: Zoom levels to build, those of an existing heatmap.
+            saturation: Number of trips shown in the hottest color.
+            max_tiles: Tiles kept in memory, 256 KB each.
+        """
+        self.root = pathlib.Path(root)
+        self.zooms = list(zooms)
+        self.saturation = saturation
+        self.max_tiles = max_tiles
+        # least recently used first
+        self._tiles: OrderedDict[tuple[int, int, int], np.ndarray] = OrderedDict()
+        self._dirty: set[tuple[int, int, int]] = set()
+        # dirty tiles pushed out of memory, their counts are in the .npz.new files
+        self._evicted: set[tuple[int, int, int]] = set()
+        self._meta_path = self.root / "heatmap.json"
+        self.trip_ids: set[str] = set()
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text())
+            if meta["zooms"] != self.zooms:
+                raise ValueError(f"{self.root} has zoom levels {meta['zooms']}, not {self.zooms}")
+            self.trip_ids = set(meta["trips"])
+            # a save was interrupted after it committed the trips, finish it;
+            # the next save renders the tiles' PNGs
+            for z, x, y in meta.get("pending", ()):
+                new_path = self._new_counts_path(z, x, y)
+                if new_path.exists():
+                    os.replace(new_path, self._counts_path(z, x, y))
+                self._dirty.add((z, x, y))
+
+    def _counts_path(self, z: int, x: int, y: int) -> pathlib.Path:
+        return self.root / "counts" / str(z) / str(x) / f"{y}.npz"
+
+    def _new_counts_path(self, z: int, x: int, y: int) -> pathlib.Path:
+        return self.root / "counts" / str(z) / str(x) / f"{y}.npz.new"
+
+    def _write_new_counts(self, z: int, x: int, y: int, counts: "np.ndarray") -> None:
+        new_path = self._new_counts_path(z, x, y)
+        new_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(new_path, "wb") as f:
+            np.savez_compressed(f, counts=counts)
+
+    def _write_meta(self, pending=()) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._meta_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps({"zooms": self.zooms, "trips": sorted(self.trip_ids), "pending": sorted(pending)}))
+        os.replace(tmp_path, self._meta_path)
+
+    def tile(self, z: int, x: int, y: int) -> "np.ndarray":
+        """Trip counts of one tile, (256, 256) indexed [row, column]."""
+        key = (z, x, y)
+        counts = self._tiles.get(key)
+        if counts is not None:
+            self._tiles.move_to_end(key)
+            return counts
+        path = self._new_counts_path(z, x, y) if key in self._evicted else self._counts_path(z, x, y)
+        if path.exists():
+            with np.load(path) as data:
+                counts = data["counts"]
+        else:
+            counts = np.zeros((TILE_SIZE, TILE_SIZE), dtype=np.uint32)
+        while len(self._tiles) >= self.max_tiles:
+            old_key, old_counts = self._tiles.popitem(last=False)
+            if old_key in self._dirty:
+                self._write_new_counts(*old_key, old_counts)
+                self._evicted.add(old_key)
+        self._tiles[key] = counts
+        return counts
+
+    def add_points(self, tripId: str, points) -> bool:
+        """Count a trip's (latitude, longitude) points, unless the trip was added before."""
+        tripId = str(tripId)
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if tripId in self.trip_ids or len(points) == 0:
+            return False
+        self.trip_ids.add(tripId)
+        top = max(self.zooms)
+        dense = densify(to_pixels(points, top)).astype(np.int64)
+        for zoom in self.zooms:
+            pixels = dense >> (top - zoom)
+            # one number per (tile, pixel in tile); each trip counts once per pixel
+            tile_x, tile_y = pixels[:, 0] >> 8, pixels[:, 1] >> 8
+            local = (pixels[:, 1] & 255) * TILE_SIZE + (pixels[:, 0] & 255)
+            keys = np.unique(((tile_x << 24 | tile_y) << 16) | local)
+            tiles = keys >> 16
+            boundaries = np.flatnonzero(np.diff(tiles)) + 1
+            for tile_keys in np.split(keys, boundaries):
+                tile_key = int(tile_keys[0] >> 16)
+                x, y = tile_key >> 24, tile_key & 0xFFFFFF
+                self.tile(zoom, x, y).reshape(-1)[tile_keys & 0xFFFF] += 1
+                self._dirty.add((zoom, x, y))
+        return True
+
+    def add(self, trip) -> bool:
+        """Count a Trip or raw trip dict (e.g. from a TripStore)."""
+        if isinstance(trip, Trip):
+            return self.add_points(trip.tripId, trip.decoded_geometry or decode_array(trip.geometry))
+        trip = trip.get("trip", trip)
+        return self.add_points(trip["tripId"], decode_array(trip.get("geometry")))
+
+    def render(self, z: int, x: int, y: int) -> bytes:
+        """One tile as PNG."""
+        counts = self.tile(z, x, y)
+        level = np.minimum(np.log1p(counts) / math.log1p(self.saturation), 1.0)
+        return encode_png(PALETTE[(level * 255).astype(np.uint8)])
+
+    def save(self, png: bool = True) -> int:
+        """Write the tiles changed since the last save (and their PNGs). Returns how many.
+
+        The counts and the added trips are saved together or not at all: the
+        new counts are written next to the old ones first, then heatmap.json
+        commits the trips along with the list of those tiles, and only then
+        the new counts replace the old ones. A save interrupted after the
+        commit is finished on the next load, one interrupted before it leaves
+        the old state, so no trip is ever counted twice or lost.
+        """
+        dirty = sorted(self._dirty)
+        for key in dirty:
+            # tiles pushed out of memory since were written then
+            if key in self._tiles or key not in self._evicted:
+                self._write_new_counts(*key, self.tile(*key))
+        self._write_meta(pending=dirty)
+        self._dirty.clear()
+        self._evicted.clear()
+        for z, x, y in dirty:
+            os.replace(self._new_counts_path(z, x, y), self._counts_path(z, x, y))
+            if png:
+                png_path = self.root / "tiles" / str(z) / str(x) / f"{y}.png"
+                png_path.parent.mkdir(parents=True, exist_ok=True)
+                png_path.write_bytes(self.render(z, x, y))
+        if dirty:
+            self._write_meta()
+        written = len(dirty)
+        # changed tiles are on disk now, don't keep all of them in memory
+        self._tiles.clear()
+        return written
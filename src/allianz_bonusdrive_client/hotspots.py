@@ -0,0 +1,176 @@
+import os
+import pathlib
+import threading
+from dataclasses import asdict, dataclass, is_dataclass
+
+from .store import TripStore
+from .utils.dataclasses import Trip
+from .utils.geo import ClusterGrid, load_json, save_json
+
+# score component -> event type in a trip's events
+EVENT_TYPES = {
+    "harsh_braking": "MultiLevelBrakingViolation",
+    "harsh_cornering": "MultiLevelCorneringViolation",
+    "harsh_acceleration": "MultiLevelAccelerationViolation",
+    "speeding": "PostedSpeedLimitViolation",
+}
+
+
+@dataclass
+class Hotspot:
+    id: int
+    event_type: str
+    latitude: float
+    longitude: float
+    events: int = 0
+    # sum of the events' level weights
+    weight: float = 0.0
+    # distinct trips with an event here
+    trips: int = 0
+    # timestamp (ms) of the latest event
+    last_seen: int | None = None
+
+
+def _trip_events(trip) -> tuple[str, list[tuple[str, dict]]]:
+    """(tripId, [(event type, event dict)]) of a Trip, raw trip dict or logbook item."""
+    if isinstance(trip, Trip):
+        tripId, events = trip.tripId, trip.events
+    else:
+        trip = trip.get("trip", trip)
+        tripId, events = trip["tripId"], trip.get("events")
+    if is_dataclass(events):
+        events = asdict(events)
+    return str(tripId), [
+        (event_type, asdict(event) if is_dataclass(event) else event)
+        for event_type, items in (events or {}).items()
+        for event in items or ()
+    ]
+
+
+class HotspotIndex:
+    """Places where driving events keep happening, learned from the trips' events.
+
+    Every event joins the nearest hotspot of the same type within radius
+    meters, or starts a new one; a hotspot's position is the mean of its
+    events, weighted by level. Like PlaceIndex, hotspots are hashed into a
+    grid with cells one radius wide, so adding an event only looks at the
+    cells around it and building the index is linear in the number of events.
+
+    Hotspots with events in at least min_trips trips are recurring, ranked()
+    only returns those. Each trip is only counted once, so learning the whole
+    TripStore again after a sync only adds the new trips.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        radius: float = 50.0,
+        min_trips: int = 2,
+        level_weights: dict[int, float] | None = None,
+    ):
+        """
+        Args:
+            path: JSON file to load the hotspots from and save them to.
+            radius: Maximum distance in meters between an event and its hotspot.
+            min_trips: Trips with an event at a hotspot before it counts as recurring.
+            level_weights: Weight of an event per level, by default the level itself.
+        """
+        self.path = pathlib.Path(path) if path else None
+        data = load_json(self.path)
+        # a saved index keeps the radius its hotspots were learned with
+        self.radius = data.get("radius", radius)
+        self.min_trips = min_trips
+        self.level_weights = level_weights
+        self.hotspots: dict[int, Hotspot] = {}
+        self.trip_ids: set[str] = set(data.get("trips", []))
+        self._grid = ClusterGrid(self.radius)
+        self._next_id = 1
+        self._lock = threading.Lock()
+        for hotspot_data in data.get("hotspots", []):
+            self._insert(Hotspot(**hotspot_data))
+
+    def _insert(self, hotspot: Hotspot) -> None:
+        self.hotspots[hotspot.id] = hotspot
+        self._next_id = max(self._next_id, hotspot.id + 1)
+        self._grid.add(hotspot.id, hotspot.latitude, hotspot.longitude, hotspot.event_type)
+
+    def _weight(self, level) -> float:
+        level = level or 1
+        if self.level_weights is None:
+            return float(level)
+        return self.level_weights.get(level, 1.0)
+
+    def _add_event(self, event_type: str, event: dict) -> Hotspot:
+        latitude, longitude = event["latitude"], event["longitude"]
+        hotspot_id = self._grid.nearest(latitude, longitude, event_type)
+        if hotspot_id is None:
+            hotspot = Hotspot(self._next_id, event_type, latitude, longitude)
+            self._insert(hotspot)
+        else:
+            hotspot = self.hotspots[hotspot_id]
+        weight = self._weight(event.get("level"))
+        hotspot.events += 1
+        hotspot.weight += weight
+        hotspot.latitude, hotspot.longitude = self._grid.pull(hotspot.id, latitude, longitude, weight / hotspot.weight)
+        timestamp = event.get("timeStamp")
+        if timestamp is not None and (hotspot.last_seen is None or timestamp > hotspot.last_seen):
+            hotspot.last_seen = timestamp
+        return hotspot
+
+    def learn(self, trip) -> list[Hotspot] | None:
+        """Add the events of a Trip, raw trip dict or logbook item, returns the hotspots they joined.
+
+        Returns None for trips learned before.
+        """
+        tripId, events = _trip_events(trip)
+        with self._lock:
+            if tripId in self.trip_ids:
+                return None
+            self.trip_ids.add(tripId)
+            touched: dict[int, Hotspot] = {}
+            for event_type, event in events:
+                if event.get("latitude") is None or event.get("longitude") is None:
+                    continue
+                hotspot = self._add_event(event_type, event)
+                touched[hotspot.id] = hotspot
+            for hotspot in touched.values():
+                hotspot.trips += 1
+            return list(touched.values())
+
+    def update(self, trips) -> int:
+        """Learn every trip not learned yet, returns how many were new.
+
+        From a TripStore only the files of the new trips are read.
+        """
+        if isinstance(trips, TripStore):
+            store = trips
+            trips = (store.get(tripId) for tripId in sorted(store.ids() - self.trip_ids))
+        return sum(1 for trip in trips if self.learn(trip) is not None)
+
+    def ranked(self, kinds=("harsh_braking", "harsh_cornering"), limit: int | None = 10) -> list[Hotspot]:
+        """Recurring hotspots of some kinds, the ones costing the most points first.
+
+        Args:
+            kinds: Score components (see EVENT_TYPES) or event types.
+            limit: Maximum number of hotspots, None for all.
+        """
+        event_types = {EVENT_TYPES.get(kind, kind) for kind in kinds}
+        with self._lock:
+            hotspots = [
+                hotspot
+                for hotspot in self.hotspots.values()
+                if hotspot.event_type in event_types and hotspot.trips >= self.min_trips
+            ]
+        hotspots.sort(key=lambda hotspot: (hotspot.weight, hotspot.trips), reverse=True)
+        return hotspots[:limit]
+
+    def save(self) -> None:
+        if not self.path:
+            raise ValueError("HotspotIndex has no path to save to")
+        with self._lock:
+            data = {
+                "radius": self.radius,
+                "hotspots": [asdict(hotspot) for hotspot in self.hotspots.values()],
+                "trips": sorted(self.trip_ids),
+            }
+        save_json(self.path, data)
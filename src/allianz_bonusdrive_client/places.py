@@ -0,0 +1,149 @@
+import os
+import pathlib
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass
+
+from .utils.dataclasses import Trip
+from .utils.geo import ClusterGrid, load_json, save_json
+from .utils.geometry import decode, format_coordinates
+
+
+@dataclass
+class Place:
+    id: int
+    latitude: float
+    longitude: float
+    visits: int = 0
+    # set by the user, e.g. "Zuhause"
+    label: str | None = None
+    # reverse geocoded name of the first visit, if it was looked up
+    name: str | None = None
+
+    def display_name(self) -> str:
+        return self.label or self.name or f"Ort {self.id}"
+
+
+def _looked_up_name(name: str | None, latitude: float, longitude: float) -> str | None:
+    """A trip's geocoded endpoint name, None if it's just the formatted coordinates."""
+    return None if name == format_coordinates(latitude, longitude) else name
+
+
+class PlaceIndex:
+    """Places that trips start and end at, learned from the trips themselves.
+
+    Every trip endpoint joins the nearest place within radius meters, or starts
+    a new one. A place's position is the mean of its endpoints. Places are
+    hashed into a grid with cells one radius wide, so finding the place for a
+    point only looks at the few cells around it, no matter how many places
+    there are.
+
+    Places seen at least min_visits times are "known", only those are returned
+    by place_for(). Each trip is only counted once, so learning from the same
+    trips again is harmless. The index is kept in a JSON file if a path is
+    given.
+    """
+
+    def __init__(self, path: str | os.PathLike | None = None, radius: float = 150.0, min_visits: int = 2):
+        """
+        Args:
+            path: JSON file to load the places from and save them to.
+            radius: Maximum distance in meters between an endpoint and its place.
+                A saved index keeps the radius its places were learned with.
+            min_visits: Visits needed before a place counts as known.
+        """
+        self.path = pathlib.Path(path) if path else None
+        data = load_json(self.path)
+        self.radius = data.get("radius", radius)
+        self.min_visits = min_visits
+        self.places: dict[int, Place] = {}
+        self.trip_ids: set[str] = {str(tripId) for tripId in data.get("trips", [])}
+        self._grid = ClusterGrid(self.radius)
+        self._lock = threading.Lock()
+        for place_data in data.get("places", []):
+            self._insert(Place(**place_data))
+
+    def _insert(self, place: Place) -> None:
+        self.places[place.id] = place
+        self._grid.add(place.id, place.latitude, place.longitude)
+
+    def _nearest(self, latitude: float, longitude: float) -> Place | None:
+        place_id = self._grid.nearest(latitude, longitude)
+        return None if place_id is None else self.places[place_id]
+
+    def place_for(self, latitude: float, longitude: float) -> Place | None:
+        """The known place at a point, or None."""
+        with self._lock:
+            place = self._nearest(latitude, longitude)
+        if place is None or place.visits < self.min_visits:
+            return None
+        return place
+
+    def visit(self, latitude: float, longitude: float, name: str | None = None) -> Place:
+        """Record a trip endpoint and return its place (which may not be known yet)."""
+        with self._lock:
+            place = self._nearest(latitude, longitude)
+            if place is None:
+                place = Place(max(self.places, default=0) + 1, latitude, longitude)
+                self._insert(place)
+            place.visits += 1
+            place.latitude, place.longitude = self._grid.pull(place.id, latitude, longitude, 1 / place.visits)
+            if name and not place.name:
+                place.name = name
+            return place
+
+    def learn(self, trip: Trip) -> tuple[Place, Place] | None:
+        """Record a trip's start and end point and return their places.
+
+        Returns None for trips without geometry and trips learned before.
+        """
+        points = trip.decoded_geometry or decode(trip.geometry)
+        # ids may be numbers in older raw data
+        tripId = str(trip.tripId)
+        with self._lock:
+            if not points or tripId in self.trip_ids:
+                return None
+            self.trip_ids.add(tripId)
+        start = self.visit(*points[0], name=_looked_up_name(trip.start_point_string, *points[0]))
+        end = self.visit(*points[-1], name=_looked_up_name(trip.end_point_string, *points[-1]))
+        return start, end
+
+    def endpoints(self, trip: Trip) -> tuple[Place | None, Place | None]:
+        """The known places a trip starts and ends at."""
+        points = trip.decoded_geometry or decode(trip.geometry)
+        if not points:
+            return None, None
+        return self.place_for(*points[0]), self.place_for(*points[-1])
+
+    def routes(self, trips) -> Counter:
+        """Count trips by (start place id, end place id), None for endpoints at no known place."""
+        counts = Counter()
+        for trip in trips:
+            start, end = self.endpoints(trip)
+            counts[(start.id if start else None, end.id if end else None)] += 1
+        return counts
+
+    def set_label(self, place_id: int, label: str | None) -> None:
+        with self._lock:
+            if place_id not in self.places:
+                raise ValueError(f"Unknown place {place_id}")
+            self.places[place_id].label = label
+
+    def known(self) -> list[Place]:
+        """Known places, most visited first."""
+        return sorted(
+            (place for place in self.places.values() if place.visits >= self.min_visits),
+            key=lambda place: place.visits,
+            reverse=True,
+        )
+
+    def save(self) -> None:
+        if not self.path:
+            raise ValueError("PlaceIndex has no path to save to")
+        with self._lock:
+            data = {
+                "radius": self.radius,
+                "places": [asdict(place) for place in self.places.values()],
+                "trips": sorted(self.trip_ids),
+            }
+        save_json(self.path, data)
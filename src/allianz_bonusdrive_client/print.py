@@ -4,7 +4,9 @@ from colorama import Back
 from datetime import datetime, timedelta
 
 from allianz_bonusdrive_client.utils.dataclasses import Trip, Scores, Badge
+from allianz_bonusdrive_client.utils.profiling import timed
 
+@timed("print")
 def print_trip_details(trip: Trip):
     print(f"Trip ID:             {trip.tripId}")
     print(f"Fahrer:              {trip.user.firstName} {trip.user.lastName}")
@@ -21,6 +23,11 @@ def print_trip_details(trip: Trip):
     print("Scores:")
     print_scores(trip.tripScores.scores)
 
+@timed("print")
+def print_trip_places(trip: Trip, start: str | None, end: str | None):
+    print(f"Orte {trip.tripId}: {start or '?'} -> {end or '?'}", flush=True)
+
+@timed("print")
 def print_scores(scores: Scores):
     print(f"Gesamtscore:           {score_color(scores.overall)}{scores.overall}{Back.RESET}")
     print(f"Bremsverhalten:        {score_color(scores.harsh_braking)}{scores.harsh_braking}{Back.RESET}")
@@ -29,6 +36,7 @@ def print_scores(scores: Scores):
     print(f"Geschwindigkeit:       {score_color(scores.speeding)}{scores.speeding}{Back.RESET}")
     print(f"Tag, Zeit, Straßenart: {score_color(scores.payd)}{scores.payd}{Back.RESET}")
 
+@timed("print")
 def print_badge(badge: Badge):
     match badge.badgeType:
         case "MONTH":
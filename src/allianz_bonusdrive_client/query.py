@@ -0,0 +1,523 @@
+import bisect
+import calendar
+import itertools
+import json
+import os
+from datetime import date, datetime
+from typing import Iterator
+
+from .store import TripStore
+
+# (field, path in the raw trip dict), the names follow columnar.COLUMNS
+ORDERED_FIELDS = [
+    ("start_utc", ("tripStartTimestampUtc",)),
+    # local wall clock time, the server encodes it as if it was UTC
+    ("start_local", ("tripStartTimestampLocal",)),
+    ("kilometers", ("kilometers",)),
+    ("seconds", ("seconds",)),
+    ("tripScore", ("tripScore",)),
+    *(
+        (f"score_{key.replace('.', '_')}", ("tripScores", "scores", key))
+        for key in (
+            "overall", "speeding", "over.speeding", "distracted.driving", "payd",
+            "harsh.cornering", "harsh.acceleration", "harsh.braking", "mileage",
+        )
+    ),
+]
+CATEGORICAL_FIELDS = [
+    ("hasAlerts", ("hasAlerts",)),
+    ("transportMode", ("transportMode",)),
+    ("vehicleId", ("vehicle", "vehicleId")),
+]
+# local hour (0-23) the trip started in, derived from start_local
+DERIVED_FIELDS = ["hour"]
+
+ORDERED = {name for name, _ in ORDERED_FIELDS} | set(DERIVED_FIELDS)
+CATEGORICAL = {name for name, _ in CATEGORICAL_FIELDS}
+FIELDS = [name for name, _ in ORDERED_FIELDS] + DERIVED_FIELDS + [name for name, _ in CATEGORICAL_FIELDS]
+
+# bump when the fields change, older index files are rebuilt
+INDEX_VERSION = 1
+
+
+def _get(data: dict, path: tuple):
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def _summary(trip_data: dict) -> dict:
+    """The indexed values of a raw trip dict."""
+    values = {name: _get(trip_data, path) for name, path in ORDERED_FIELDS + CATEGORICAL_FIELDS}
+    start_local = values["start_local"]
+    values["hour"] = None if start_local is None else start_local // 3_600_000 % 24
+    return values
+
+
+def _value(value):
+    """Datetimes and dates compare as epoch milliseconds, like the timestamps.
+
+    Naive datetimes and dates are taken as UTC, whatever the machine's time
+    zone: that's what start_local needs, since the server encodes local wall
+    clock time as if it was UTC. For start_utc use aware datetimes, or naive
+    ones in UTC.
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            return int(value.timestamp() * 1000)
+        return calendar.timegm(value.timetuple()) * 1000 + value.microsecond // 1000
+    if isinstance(value, date):
+        return calendar.timegm(value.timetuple()) * 1000
+    return value
+
+
+class Predicate:
+    """A condition on a trip's indexed fields, combine with &, | and ~."""
+
+    # whether candidates() can use an index
+    indexed = False
+
+    def __and__(self, other: "Predicate") -> "Predicate":
+        return And(self, other)
+
+    def __or__(self, other: "Predicate") -> "Predicate":
+        return Or(self, other)
+
+    def __invert__(self) -> "Predicate":
+        return Not(self)
+
+    def candidates(self, index: "TripIndex") -> list[int] | None:
+        """Rows that may match, found with the indexes, or None if that would mean all rows."""
+        return None
+
+    def estimate(self, index: "TripIndex") -> int:
+        """Upper bound of the number of matching rows, without looking at them."""
+        return len(index)
+
+    def matches(self, index: "TripIndex", row: int) -> bool:
+        raise NotImplementedError
+
+
+class Range(Predicate):
+    """An ordered field between two bounds, either of them may be open."""
+
+    indexed = True
+
+    def __init__(self, field: str, low=None, high=None, low_inclusive: bool = True, high_inclusive: bool = True):
+        self.field = field
+        self.low, self.high = _value(low), _value(high)
+        self.low_inclusive, self.high_inclusive = low_inclusive, high_inclusive
+
+    def _bounds(self, index: "TripIndex") -> tuple[int, int]:
+        values, _ = index.ordered(self.field)
+        start, end = 0, len(values)
+        if self.low is not None:
+            start = (bisect.bisect_left if self.low_inclusive else bisect.bisect_right)(values, self.low)
+        if self.high is not None:
+            end = (bisect.bisect_right if self.high_inclusive else bisect.bisect_left)(values, self.high)
+        return start, max(start, end)
+
+    def candidates(self, index):
+        start, end = self._bounds(index)
+        return index.ordered(self.field)[1][start:end]
+
+    def estimate(self, index):
+        start, end = self._bounds(index)
+        return end - start
+
+    def matches(self, index, row):
+        value = index.columns[self.field][row]
+        if value is None:
+            return False
+        if self.low is not None and (value < self.low if self.low_inclusive else value <= self.low):
+            return False
+        if self.high is not None and (value > self.high if self.high_inclusive else value >= self.high):
+            return False
+        return True
+
+    def __repr__(self):
+        return f"Range({self.field!r}, {self.low!r}, {self.high!r})"
+
+
+class Missing(Predicate):
+    """An ordered field without a value."""
+
+    indexed = True
+
+    def __init__(self, field: str):
+        self.field = field
+
+    def candidates(self, index):
+        return index.missing(self.field)
+
+    def estimate(self, index):
+        return len(index.missing(self.field))
+
+    def matches(self, index, row):
+        return index.columns[self.field][row] is None
+
+    def __repr__(self):
+        return f"Missing({self.field!r})"
+
+
+class In(Predicate):
+    """A categorical field with one of some values."""
+
+    indexed = True
+
+    def __init__(self, field: str, values):
+        self.field = field
+        self.values = set(values)
+
+    def candidates(self, index):
+        groups = index.groups(self.field)
+        rows = [row for value in self.values for row in groups.get(value, ())]
+        if len(self.values) > 1:
+            rows.sort()
+        return rows
+
+    def estimate(self, index):
+        groups = index.groups(self.field)
+        return sum(len(groups.get(value, ())) for value in self.values)
+
+    def matches(self, index, row):
+        return index.columns[self.field][row] in self.values
+
+    def __repr__(self):
+        return f"In({self.field!r}, {sorted(self.values, key=str)!r})"
+
+
+class And(Predicate):
+    """All of some predicates. Only the most selective one uses its index, the others filter its rows."""
+
+    def __init__(self, *predicates: Predicate):
+        self.predicates = predicates
+        self.indexed = any(predicate.indexed for predicate in predicates)
+
+    def _best(self, index) -> Predicate | None:
+        indexed = [predicate for predicate in self.predicates if predicate.indexed]
+        return min(indexed, key=lambda predicate: predicate.estimate(index), default=None)
+
+    def candidates(self, index):
+        best = self._best(index)
+        return None if best is None else best.candidates(index)
+
+    def estimate(self, index):
+        return min((predicate.estimate(index) for predicate in self.predicates), default=len(index))
+
+    def matches(self, index, row):
+        return all(predicate.matches(index, row) for predicate in self.predicates)
+
+
+class Or(Predicate):
+    """Any of some predicates."""
+
+    def __init__(self, *predicates: Predicate):
+        self.predicates = predicates
+        self.indexed = all(predicate.indexed for predicate in predicates)
+
+    def candidates(self, index):
+        rows = set()
+        for predicate in self.predicates:
+            candidates = predicate.candidates(index)
+            if candidates is None:
+                return None
+            rows.update(candidates)
+        return sorted(rows)
+
+    def estimate(self, index):
+        return min(len(index), sum(predicate.estimate(index) for predicate in self.predicates))
+
+    def matches(self, index, row):
+        return any(predicate.matches(index, row) for predicate in self.predicates)
+
+
+class Not(Predicate):
+    def __init__(self, predicate: Predicate):
+        self.predicate = predicate
+
+    def matches(self, index, row):
+        return not self.predicate.matches(index, row)
+
+
+class Field:
+    """Builds predicates on a field: F.kilometers > 50, F.vehicleId == "v1", F.hour.between(0, 5)."""
+
+    def __init__(self, name: str):
+        if name not in ORDERED and name not in CATEGORICAL:
+            raise ValueError(f"Unknown field {name}, one of {', '.join(FIELDS)}")
+        self.name = name
+
+    def _ordered(self) -> None:
+        if self.name not in ORDERED:
+            raise ValueError(f"{self.name} can only be compared with == and isin()")
+
+    def __lt__(self, value) -> Predicate:
+        self._ordered()
+        return Range(self.name, high=value, high_inclusive=False)
+
+    def __le__(self, value) -> Predicate:
+        self._ordered()
+        return Range(self.name, high=value)
+
+    def __gt__(self, value) -> Predicate:
+        self._ordered()
+        return Range(self.name, low=value, low_inclusive=False)
+
+    def __ge__(self, value) -> Predicate:
+        self._ordered()
+        return Range(self.name, low=value)
+
+    def __eq__(self, value) -> Predicate:  # pyright: ignore[reportIncompatibleMethodOverride]
+        if self.name in CATEGORICAL:
+            return In(self.name, [value])
+        if value is None:
+            # a Range without bounds would match every value
+            return Missing(self.name)
+        return Range(self.name, value, value)
+
+    def __ne__(self, value) -> Predicate:  # pyright: ignore[reportIncompatibleMethodOverride]
+        return Not(self == value)
+
+    __hash__ = None  # pyright: ignore[reportAssignmentType]
+
+    def between(self, low, high) -> Predicate:
+        """low <= value <= high."""
+        self._ordered()
+        return Range(self.name, low, high)
+
+    def isin(self, values) -> Predicate:
+        if self.name in CATEGORICAL:
+            return In(self.name, values)
+        return Or(*(self == value for value in values))
+
+
+class _Fields:
+    def __getattr__(self, name: str) -> Field:
+        return Field(name)
+
+
+F = _Fields()
+
+
+class Query:
+    """A query on a TripIndex, built with where(), order_by() and limit()."""
+
+    def __init__(self, index: "TripIndex", predicate: Predicate | None = None):
+        self.index = index
+        self.predicate = predicate
+        self.sort_field: str | None = None
+        self.descending = False
+        self._limit: int | None = None
+        self._offset = 0
+
+    def _copy(self, **changes) -> "Query":
+        query = Query(self.index, self.predicate)
+        query.__dict__.update({key: value for key, value in self.__dict__.items() if key != "index"})
+        query.__dict__.update(changes)
+        return query
+
+    def where(self, *predicates: Predicate) -> "Query":
+        """Only trips matching all predicates (and the ones given before)."""
+        predicates = ((self.predicate,) if self.predicate else ()) + predicates
+        if not predicates:
+            return self
+        return self._copy(predicate=predicates[0] if len(predicates) == 1 else And(*predicates))
+
+    def order_by(self, field: str, descending: bool = False) -> "Query":
+        """Sort by an ordered field, trips without a value come last. A leading "-" sorts descending.
+
+        Trips with the same value keep the order they were indexed in,
+        reversed when sorting descending.
+        """
+        if field.startswith("-"):
+            field, descending = field[1:], True
+        Field(field)._ordered()
+        return self._copy(sort_field=field, descending=descending)
+
+    def limit(self, limit: int | None, offset: int = 0) -> "Query":
+        return self._copy(_limit=limit, _offset=offset)
+
+    def _rows(self) -> list[int]:
+        index, predicate = self.index, self.predicate
+        candidates = predicate.candidates(index) if predicate else None
+        wanted = None if self._limit is None else self._offset + self._limit
+        if self.sort_field is None:
+            rows = range(len(index)) if candidates is None else candidates
+            matching = (row for row in rows if predicate is None or predicate.matches(index, row))
+            return list(itertools.islice(matching, wanted))[self._offset:]
+
+        _, sorted_rows = index.ordered(self.sort_field)
+        missing = index.missing(self.sort_field)
+        # Walking the sort index stops after the first `wanted` matches, which
+        # takes about wanted * len(index) / matches steps. Sorting the
+        # candidates takes at least len(candidates).
+        n_candidates = len(index) if candidates is None else len(candidates)
+        if wanted is not None and wanted * len(index) < n_candidates**2:
+            ordered_rows = reversed(sorted_rows) if self.descending else iter(sorted_rows)
+            rows = itertools.chain(ordered_rows, missing)
+            matching = (row for row in rows if predicate is None or predicate.matches(index, row))
+            return list(itertools.islice(matching, wanted))[self._offset:]
+
+        rows = range(len(index)) if candidates is None else candidates
+        matching = [row for row in rows if predicate is None or predicate.matches(index, row)]
+        column = index.columns[self.sort_field]
+        present = [row for row in matching if column[row] is not None]
+        # ties by row, like the sort index walked above
+        present.sort(key=lambda row: (column[row], row), reverse=self.descending)
+        present += [row for row in matching if column[row] is None]
+        return present[self._offset:wanted]
+
+    def ids(self) -> list[str]:
+        """The matching tripIds."""
+        return [self.index.ids[row] for row in self._rows()]
+
+    def summaries(self) -> list[dict]:
+        """The indexed fields of the matching trips, without reading the trip files."""
+        columns = self.index.columns
+        return [{"tripId": self.index.ids[row], **{name: columns[name][row] for name in FIELDS}} for row in self._rows()]
+
+    def count(self) -> int:
+        return len(self._rows())
+
+    def __iter__(self) -> Iterator[dict]:
+        """The matching raw trip dicts, read from the store."""
+        for tripId in self.ids():
+            trip_data = self.index.store.get(tripId)
+            if trip_data is not None:
+                yield trip_data
+
+
+class TripIndex:
+    """Secondary indexes over the trips in a TripStore, for queries like
+
+        index.where(F.kilometers > 50, F.score_overall < 70, F.start_local >= date(2025, 1, 1))
+        index.where(F.hasAlerts == True, (F.hour >= 22) | (F.hour < 5)).order_by("-start_utc").limit(10)
+
+    The indexed fields of every trip (see FIELDS) are kept in columns in
+    <store>/index.json, so opening the index doesn't read the trip files,
+    and refresh() only reads the ones added or changed since. Ordered fields
+    get a sorted index, searched with bisect, and categorical fields a hash
+    index; both are built on first use. A query uses the index of its most
+    selective condition and filters those rows with the others. Sorted and
+    limited queries walk the sort field's index and stop at the limit when
+    that's cheaper than sorting all matches.
+    """
+
+    FILE_NAME = "index.json"
+
+    def __init__(self, store: TripStore | str | os.PathLike, refresh: bool = True):
+        """
+        Args:
+            store: TripStore or its directory.
+            refresh: Bring the index up to date with the store right away.
+        """
+        self.store = store if isinstance(store, TripStore) else TripStore(store)
+        self.path = self.store.root / self.FILE_NAME
+        self.ids: list[str] = []
+        self.columns: dict[str, list] = {name: [] for name in FIELDS}
+        # tripId -> mtime_ns of its file when it was indexed
+        self._mtimes: dict[str, int] = {}
+        self._ordered: dict[str, tuple[list, list[int]]] = {}
+        self._missing: dict[str, list[int]] = {}
+        self._groups: dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.ids = data["ids"]
+                self.columns = data["columns"]
+                self._mtimes = dict(zip(self.ids, data["mtimes"]))
+        if refresh:
+            self.refresh()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def refresh(self) -> int:
+        """Index trips added to or changed in the store since, and drop deleted ones. Returns how many changed."""
+        files = {}
+        with os.scandir(self.store.trips_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json"):
+                    files[entry.name[:-5]] = entry.stat().st_mtime_ns
+        changed = [tripId for tripId, mtime in files.items() if self._mtimes.get(tripId) != mtime]
+        deleted = [tripId for tripId in self._mtimes if tripId not in files]
+        if not changed and not deleted:
+            return 0
+
+        rows = {tripId: row for row, tripId in enumerate(self.ids)}
+        if deleted:
+            keep = [row for row, tripId in enumerate(self.ids) if tripId in files]
+            self.ids = [self.ids[row] for row in keep]
+            self.columns = {name: [column[row] for row in keep] for name, column in self.columns.items()}
+            rows = {tripId: row for row, tripId in enumerate(self.ids)}
+            for tripId in deleted:
+                del self._mtimes[tripId]
+        for tripId in sorted(changed):
+            trip_data = self.store.get(tripId)
+            if trip_data is None:
+                continue
+            summary = _summary(trip_data)
+            row = rows.get(tripId)
+            if row is None:
+                row = rows[tripId] = len(self.ids)
+                self.ids.append(tripId)
+                for name in FIELDS:
+                    self.columns[name].append(summary[name])
+            else:
+                for name in FIELDS:
+                    self.columns[name][row] = summary[name]
+            self._mtimes[tripId] = files[tripId]
+        # rebuilt on next use
+        self._ordered.clear()
+        self._missing.clear()
+        self._groups.clear()
+        self.save()
+        return len(changed) + len(deleted)
+
+    def save(self) -> None:
+        data = {
+            "version": INDEX_VERSION,
+            "ids": self.ids,
+            "mtimes": [self._mtimes[tripId] for tripId in self.ids],
+            "columns": self.columns,
+        }
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def ordered(self, field: str) -> tuple[list, list[int]]:
+        """(sorted values, their rows) of an ordered field, trips without a value left out."""
+        if field not in self._ordered:
+            column = self.columns[field]
+            rows = [row for row, value in enumerate(column) if value is not None]
+            # stable, so ties stay in row order
+            rows.sort(key=column.__getitem__)
+            self._ordered[field] = ([column[row] for row in rows], rows)
+            self._missing[field] = [row for row, value in enumerate(column) if value is None]
+        return self._ordered[field]
+
+    def missing(self, field: str) -> list[int]:
+        """Rows without a value for an ordered field."""
+        self.ordered(field)
+        return self._missing[field]
+
+    def groups(self, field: str) -> dict:
+        """Value -> rows of a categorical field."""
+        if field not in self._groups:
+            groups: dict = {}
+            for row, value in enumerate(self.columns[field]):
+                groups.setdefault(value, []).append(row)
+            self._groups[field] = groups
+        return self._groups[field]
+
+    def query(self) -> Query:
+        """All trips, narrow down with where(), order_by() and limit()."""
+        return Query(self)
+
+    def where(self, *predicates: Predicate) -> Query:
+        return Query(self).where(*predicates)
@@ -0,0 +1,203 @@
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import requests
+
+from .client import BonusdriveAPIClient, date_range
+from .fleet import Account
+from .utils.constants import BASE_URL
+from .utils.jsonio import dumps
+from .utils.singleflight import SingleFlight
+from .utils.transport import create_adapter
+
+# seconds a response stays fresh, per endpoint
+FRESHNESS = {
+    "trips": 300,
+    # a processed trip hardly ever changes
+    "trip": 24 * 3600,
+    "badges": 3600,
+    "scores": 3600,
+}
+
+
+class ResponseCache:
+    """Serialized responses with an expiry time, at most max_entries of them.
+
+    Concurrent misses for the same key share one load. If a load fails, an
+    expired entry is served instead, if there is one.
+    """
+
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = SingleFlight()
+
+    def get(self, key, ttl: float, load: Callable[[], bytes]) -> tuple[bytes, str, float]:
+        """Return (body, "HIT" | "MISS" | "STALE", seconds until it expires)."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None and entry[0] > now:
+            return entry[1], "HIT", entry[0] - now
+        try:
+            body = self._inflight.do(key, self._load, key, ttl, load)
+        except Exception:
+            if entry is None:
+                raise
+            return entry[1], "STALE", 0.0
+        return body, "MISS", ttl
+
+    def _load(self, key, ttl: float, load: Callable[[], bytes]) -> bytes:
+        body = load()
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class NotFound(Exception):
+    pass
+
+
+class TripService:
+    """Serves trips, trip details, badges and scores of several accounts from a shared cache.
+
+    Each account has one client, logged in on first use and again when its
+    session is lost. However many consumers ask, every distinct request goes
+    upstream at most once per freshness period (see FRESHNESS).
+
+    Endpoints (GET, JSON):
+        /accounts
+        /<account>/trips?amount=10&offset=0
+        /<account>/trips/<tripId>
+        /<account>/badges?type=daily&startDate=...&endDate=...
+        /<account>/scores?startDate=...&endDate=...
+
+    The dates of badges and scores default to the last 30 days.
+    """
+
+    def __init__(self, clients: dict[str, BonusdriveAPIClient], freshness: dict[str, float] | None = None, max_entries: int = 1024):
+        self.clients = clients
+        self.freshness = {**FRESHNESS, **(freshness or {})}
+        self.cache = ResponseCache(max_entries)
+        self._logins = SingleFlight()
+        self._server: ThreadingHTTPServer | None = None
+        self._ready = threading.Event()
+
+    @classmethod
+    def from_accounts(cls, accounts: list[Account], base_url: str = BASE_URL, **kwargs) -> "TripService":
+        """Service for accounts with a TGT or email and password, all clients on one connection pool."""
+        adapter = create_adapter(pool_connections=2, pool_maxsize=16)
+        clients = {
+            account.name: BonusdriveAPIClient(base_url, account.email, account.password, account.tgt, adapter=adapter)
+            for account in accounts
+        }
+        return cls(clients, **kwargs)
+
+    def _client(self, account: str) -> BonusdriveAPIClient:
+        client = self.clients.get(account)
+        if client is None:
+            raise NotFound(f"Unknown account {account}")
+        if not client.authenticated:
+            self._logins.do(account, client.authenticate)
+        return client
+
+    def _call(self, account: str, method: str, *args, **kwargs):
+        client = self._client(account)
+        try:
+            return getattr(client, method)(*args, **kwargs)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code in (401, 403):
+                # the session is gone, log in again next time
+                client.authenticated = False
+            raise
+
+    def handle(self, path: str) -> tuple[bytes, str, float]:
+        """Answer a GET path (with query), returns (body, cache status, max age)."""
+        parts = urlsplit(path)
+        segments = [unquote(segment) for segment in parts.path.strip("/").split("/") if segment]
+        params = dict(parse_qsl(parts.query))
+        if segments == ["accounts"]:
+            return dumps(sorted(self.clients)), "HIT", 0.0
+        match segments:
+            case [account, "trips"]:
+                endpoint, method, args = "trips", "get_trips_raw", ()
+                params = {"amount": int(params.get("amount", 10)), "offset": int(params.get("offset", 0))}
+            case [account, "trips", tripId]:
+                endpoint, method, args = "trip", "get_trip_details_raw", (tripId,)
+            case [account, "badges"]:
+                endpoint, method, args = "badges", "get_badges_raw", ()
+            case [account, "scores"]:
+                endpoint, method, args = "scores", "get_scores_raw", ()
+            case _:
+                raise NotFound(f"Unknown path {parts.path}")
+        if endpoint in ("badges", "scores"):
+            # the last 30 days as of today, part of the cache key so it moves at midnight
+            endDate, startDate = date_range()
+            params.setdefault("endDate", endDate)
+            params.setdefault("startDate", startDate)
+        if account not in self.clients:
+            raise NotFound(f"Unknown account {account}")
+        key = (tuple(segments), tuple(sorted(params.items())))
+        return self.cache.get(
+            key,
+            self.freshness[endpoint],
+            lambda: dumps(self._call(account, method, *args, **params)),
+        )
+
+    def serve_forever(self, host: str = "127.0.0.1", port: int = 8080) -> None:
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    body, cache_status, max_age = service.handle(self.path)
+                    status = HTTPStatus.OK
+                except NotFound as e:
+                    body, cache_status, max_age, status = dumps({"error": str(e)}), "MISS", 0, HTTPStatus.NOT_FOUND
+                except (ValueError, TypeError) as e:
+                    body, cache_status, max_age, status = dumps({"error": str(e)}), "MISS", 0, HTTPStatus.BAD_REQUEST
+                except Exception as e:
+                    body, cache_status, max_age, status = dumps({"error": str(e)}), "MISS", 0, HTTPStatus.BAD_GATEWAY
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", f"max-age={int(max_age)}")
+                self.send_header("X-Cache", cache_status)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._ready.set()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def wait_ready(self, timeout: float | None = None) -> tuple[str, int]:
+        """Wait until serve_forever() listens, returns the address (useful with port 0)."""
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Server did not start")
+        return self._server.server_address  # pyright: ignore[reportOptionalMemberAccess, reportReturnType]
+
+    def shutdown(self) -> None:
+        if self._server:
+            self._server.shutdown()
@@ -0,0 +1,74 @@
+import json
+import os
+import pathlib
+from typing import Iterator
+
+from .client import parse_trip
+from .utils.dataclasses import Trip
+
+
+class TripStore:
+    """Trips kept on disk as raw JSON, one file per trip.
+
+    Layout:
+        <root>/trips/<tripId>.json
+
+    Writes are atomic (write to a temp file, then rename), so a crash never
+    leaves a half written trip behind. Saving a trip again replaces it, e.g.
+    when the server reprocessed it.
+    """
+
+    def __init__(self, root: str | os.PathLike, simplify_tolerance: float | None = None):
+        """
+        Args:
+            root: Directory to keep the trips in.
+            simplify_tolerance: Simplify the trips' geometry to this many
+                meters before storing them (see utils.simplify, needs the geo
+                extra). Stored trips get roughly ten times smaller.
+        """
+        self.root = pathlib.Path(root)
+        self.trips_dir = self.root / "trips"
+        self.trips_dir.mkdir(parents=True, exist_ok=True)
+        self.simplify_tolerance = simplify_tolerance
+
+    def _path(self, tripId) -> pathlib.Path:
+        return self.trips_dir / f"{tripId}.json"
+
+    def add(self, trip_data: dict) -> None:
+        """Store a raw trip dict (from get_trip_details_raw or a logbook item's "trip")."""
+        if self.simplify_tolerance:
+            from .utils.simplify import simplify_trip
+
+            trip_data = simplify_trip(trip_data, self.simplify_tolerance)
+        path = self._path(trip_data["tripId"])
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(trip_data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def get(self, tripId) -> dict | None:
+        try:
+            with open(self._path(tripId), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def ids(self) -> set[str]:
+        return {path.stem for path in self.trips_dir.glob("*.json")}
+
+    def __contains__(self, tripId) -> bool:
+        return self._path(tripId).exists()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.trips_dir.glob("*.json"))
+
+    def __iter__(self) -> Iterator[dict]:
+        """Iterate over the raw trip dicts, one file at a time."""
+        for path in sorted(self.trips_dir.glob("*.json")):
+            with open(path, encoding="utf-8") as f:
+                yield json.load(f)
+
+    def trips(self) -> Iterator[Trip]:
+        """Iterate over the stored trips as Trip dataclass instances."""
+        for trip_data in self:
+            yield parse_trip(trip_data)
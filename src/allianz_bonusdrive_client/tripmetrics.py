@@ -0,0 +1,129 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+except ImportError as e:  # optional, pip install allianz-bonusdrive-client[geo]
+    raise ImportError("Trip metrics need numpy, install allianz-bonusdrive-client[geo]") from e
+
+from .utils.dataclasses import Trip
+from .utils.geo import EARTH_RADIUS_KM
+from .utils.geometry import decode_array
+
+# segments shorter than this have no meaningful heading (GPS jitter at standstill)
+MIN_SEGMENT_KM = 0.005
+
+
+@dataclass
+class TripMetrics:
+    tripId: str
+    points: int
+    # length of the decoded geometry
+    path_km: float
+    # distance reported by the server
+    kilometers: float | None
+    # path_km / kilometers, far from 1 means the geometry and the server disagree
+    path_ratio: float | None
+    # straight line from start to end
+    start_end_km: float
+    min_latitude: float | None
+    min_longitude: float | None
+    max_latitude: float | None
+    max_longitude: float | None
+    # changes of heading above the turn threshold between consecutive segments
+    turns: int
+    turns_per_km: float | None
+
+
+def haversine_km(latitudes: "np.ndarray", longitudes: "np.ndarray") -> "np.ndarray":
+    """Distances between consecutive points in km."""
+    phi = np.radians(latitudes)
+    dphi = np.diff(phi)
+    dlambda = np.radians(np.diff(longitudes))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bearings(latitudes: "np.ndarray", longitudes: "np.ndarray") -> "np.ndarray":
+    """Initial headings of the segments between consecutive points, degrees clockwise from north."""
+    phi = np.radians(latitudes)
+    dlambda = np.radians(np.diff(longitudes))
+    y = np.sin(dlambda) * np.cos(phi[1:])
+    x = np.cos(phi[:-1]) * np.sin(phi[1:]) - np.sin(phi[:-1]) * np.cos(phi[1:]) * np.cos(dlambda)
+    return np.degrees(np.arctan2(y, x)) % 360.0
+
+
+def compute_metrics(tripId: str, geometry: str | None, kilometers: float | None = None, turn_threshold: float = 45.0) -> TripMetrics:
+    """Metrics for one trip from its encoded geometry.
+
+    Args:
+        tripId: Copied into the result.
+        geometry: Encoded polyline of the trip.
+        kilometers: Distance reported by the server, for path_ratio.
+        turn_threshold: Heading change in degrees that counts as a turn.
+    """
+    points = decode_array(geometry)
+    if len(points) == 0:
+        return TripMetrics(tripId, 0, 0.0, kilometers, None, 0.0, None, None, None, None, 0, None)
+    latitudes, longitudes = points[:, 0], points[:, 1]
+    segments = haversine_km(latitudes, longitudes)
+    path_km = float(segments.sum())
+
+    moving = segments >= MIN_SEGMENT_KM
+    headings = bearings(latitudes, longitudes)[moving]
+    # wrap to -180..180 so a 350 -> 10 degree change is 20 degrees
+    changes = (np.diff(headings) + 180.0) % 360.0 - 180.0
+    turns = int(np.count_nonzero(np.abs(changes) > turn_threshold))
+
+    start_end_km = float(haversine_km(latitudes[[0, -1]], longitudes[[0, -1]])[0])
+    return TripMetrics(
+        tripId=tripId,
+        points=len(points),
+        path_km=path_km,
+        kilometers=kilometers,
+        path_ratio=path_km / kilometers if kilometers else None,
+        start_end_km=start_end_km,
+        min_latitude=float(latitudes.min()),
+        min_longitude=float(longitudes.min()),
+        max_latitude=float(latitudes.max()),
+        max_longitude=float(longitudes.max()),
+        turns=turns,
+        turns_per_km=turns / path_km if path_km else None,
+    )
+
+
+def _compute(args: tuple) -> TripMetrics:
+    return compute_metrics(*args)
+
+
+def _job(trip, turn_threshold: float) -> tuple:
+    # only the few fields needed, so little has to be pickled to the workers
+    if isinstance(trip, Trip):
+        return (trip.tripId, trip.geometry, trip.kilometers, turn_threshold)
+    return (trip["tripId"], trip.get("geometry"), trip.get("kilometers"), turn_threshold)
+
+
+def metrics_table(trips, turn_threshold: float = 45.0, processes: int | None = None, parallel_from: int = 200) -> list[TripMetrics]:
+    """Metrics for many trips, computed on a process pool.
+
+    Args:
+        trips: Trip objects or raw trip dicts, e.g. a TripStore.
+        turn_threshold: Heading change in degrees that counts as a turn.
+        processes: Worker processes, defaults to the number of CPUs.
+        parallel_from: Below this many trips everything runs in this process,
+            starting the pool would take longer than the work.
+
+    Returns:
+        One TripMetrics per trip, in the order of trips.
+    """
+    jobs = [_job(trip, turn_threshold) for trip in trips]
+    processes = processes or os.cpu_count() or 1
+    if len(jobs) < parallel_from or processes == 1:
+        return [_compute(job) for job in jobs]
+    chunksize = max(1, len(jobs) // (processes * 4))
+    # the CLI and client run threads, forking them can deadlock the workers
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(method)) as executor:
+        return list(executor.map(_compute, jobs, chunksize=chunksize))
@@ -0,0 +1,187 @@
+import csv
+import math
+import struct
+import sys
+from array import array
+
+from .geo import EARTH_RADIUS_KM
+
+# grid cell size in degrees, ~11 km north-south
+CELL_SIZE = 0.1
+
+_MAGIC = b"BDGZ\x01"
+
+
+class OfflineGeocoder:
+    """Reverse geocoding from a local gazetteer, no server needed.
+
+    Drop-in replacement for PhotonClient: reverse_geocode() answers with the
+    nearest known place in the same GeoJSON shape Photon uses, so it can be
+    passed to BonusdriveAPIClient as geocoder.
+
+    Places are bucketed into a grid of CELL_SIZE degree cells; a query only
+    looks at the cells around the point, widening the search until the
+    nearest place is certain.
+
+    Load with from_geonames() (GeoNames dumps such as cities500.txt),
+    from_csv() (a header with name, latitude, longitude and optionally
+    country) or load() (the compact binary written by save(), fastest to load).
+    """
+
+    def __init__(self, names: list[str], latitudes, longitudes, countries: list[str], max_distance_km: float = 50.0):
+        self.names = names
+        self.latitudes = array("d", latitudes)
+        self.longitudes = array("d", longitudes)
+        self.countries = countries
+        self.max_distance_km = max_distance_km
+        self._grid: dict[tuple[int, int], list[int]] = {}
+        for index, (lat, lon) in enumerate(zip(self.latitudes, self.longitudes)):
+            self._grid.setdefault(self._cell(lat, lon), []).append(index)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def _cell(latitude: float, longitude: float) -> tuple[int, int]:
+        return (math.floor(latitude / CELL_SIZE), math.floor(longitude / CELL_SIZE))
+
+    @classmethod
+    def from_geonames(cls, path: str, feature_classes: tuple[str, ...] | None = ("P",), **kwargs) -> "OfflineGeocoder":
+        """Load a GeoNames dump (tab separated, e.g. cities500.txt or DE.txt).
+
+        Args:
+            feature_classes: GeoNames feature classes to keep, "P" are cities,
+                towns and villages. None keeps everything.
+        """
+        names, latitudes, longitudes, countries = [], [], [], []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) < 9 or (feature_classes and fields[6] not in feature_classes):
+                    continue
+                names.append(fields[1])
+                latitudes.append(float(fields[4]))
+                longitudes.append(float(fields[5]))
+                countries.append(fields[8])
+        return cls(names, latitudes, longitudes, countries, **kwargs)
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> "OfflineGeocoder":
+        """Load a CSV file with the columns name, latitude (or lat), longitude (or lon) and optionally country."""
+        names, latitudes, longitudes, countries = [], [], [], []
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                names.append(row["name"])
+                latitudes.append(float(row.get("latitude") or row["lat"]))
+                longitudes.append(float(row.get("longitude") or row["lon"]))
+                countries.append(row.get("country") or "")
+        return cls(names, latitudes, longitudes, countries, **kwargs)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "OfflineGeocoder":
+        """Load a gazetteer written by save()."""
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a gazetteer file")
+            (count,) = struct.unpack("<Q", f.read(8))
+            coordinates = array("i")
+            coordinates.fromfile(f, 2 * count)
+            if sys.byteorder != "little":
+                coordinates.byteswap()
+            strings = f.read().decode("utf-8").split("\0")
+        latitudes = [value / 1e6 for value in coordinates[0::2]]
+        longitudes = [value / 1e6 for value in coordinates[1::2]]
+        return cls(strings[:count], latitudes, longitudes, strings[count:2 * count], **kwargs)
+
+    @classmethod
+    def open(cls, path: str, **kwargs) -> "OfflineGeocoder":
+        """Load a gazetteer, picking the format by file extension (.csv, .bin, otherwise GeoNames)."""
+        if path.endswith(".csv"):
+            return cls.from_csv(path, **kwargs)
+        if path.endswith(".bin"):
+            return cls.load(path, **kwargs)
+        return cls.from_geonames(path, **kwargs)
+
+    def save(self, path: str) -> None:
+        """Write the gazetteer in a compact binary format (coordinates to 6 decimal places)."""
+        coordinates = array("i")
+        for lat, lon in zip(self.latitudes, self.longitudes):
+            coordinates.append(round(lat * 1e6))
+            coordinates.append(round(lon * 1e6))
+        if sys.byteorder != "little":
+            coordinates.byteswap()
+        with open(path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<Q", len(self.names)))
+            coordinates.tofile(f)
+            f.write("\0".join(self.names + self.countries).encode("utf-8"))
+
+    def nearest(self, latitude: float, longitude: float) -> tuple[int, float] | None:
+        """Index and distance in km of the nearest place within max_distance_km."""
+        cell_lat, cell_lon = self._cell(latitude, longitude)
+        # a degree of longitude gets shorter towards the poles
+        km_per_cell_lat = math.radians(CELL_SIZE) * EARTH_RADIUS_KM
+        km_per_cell_lon = max(km_per_cell_lat * math.cos(math.radians(min(abs(latitude), 89.0))), 1e-6)
+        max_ring = math.ceil(self.max_distance_km / min(km_per_cell_lat, km_per_cell_lon))
+        best, best_distance = None, math.inf
+        ring = 0
+        while ring <= max_ring:
+            for dlat in range(-ring, ring + 1):
+                for dlon in range(-ring, ring + 1):
+                    if max(abs(dlat), abs(dlon)) != ring:
+                        continue
+                    for index in self._grid.get((cell_lat + dlat, cell_lon + dlon), ()):
+                        distance = haversine_km(latitude, longitude, self.latitudes[index], self.longitudes[index])
+                        if distance < best_distance:
+                            best, best_distance = index, distance
+            # everything outside this ring is at least `ring` whole cells away
+            if best is not None and best_distance <= ring * min(km_per_cell_lat, km_per_cell_lon):
+                break
+            ring += 1
+        if best is None or best_distance > self.max_distance_km:
+            return None
+        return best, best_distance
+
+    def reverse_geocode(self, latitude: float, longitude: float) -> dict:
+        """Nearest place as a Photon-style GeoJSON FeatureCollection."""
+        match = self.nearest(latitude, longitude)
+        if match is None:
+            return {"type": "FeatureCollection", "features": []}
+        index, distance = match
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [self.longitudes[index], self.latitudes[index]],
+                    },
+                    "properties": {
+                        "name": self.names[index],
+                        "country": self.countries[index],
+                        "distance_km": round(distance, 3),
+                    },
+                }
+            ],
+        }
+
+    def warm_up(self) -> None:
+        """Nothing to connect to, here for compatibility with PhotonClient."""
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+if __name__ == "__main__":
+    # python -m allianz_bonusdrive_client.utils.gazetteer cities500.txt gazetteer.bin
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m allianz_bonusdrive_client.utils.gazetteer <geonames.txt|places.csv> <output.bin>")
+    geocoder = OfflineGeocoder.open(sys.argv[1])
+    geocoder.save(sys.argv[2])
+    print(f"{len(geocoder)} places written to {sys.argv[2]}")
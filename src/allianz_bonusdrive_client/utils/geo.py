@@ -0,0 +1,91 @@
+import json
+import math
+import os
+import pathlib
+
+# length of a degree of latitude (and of longitude at the equator)
+METERS_PER_DEGREE = 111_320.0
+# mean earth radius
+EARTH_RADIUS_KM = 6371.0088
+
+
+class ClusterGrid:
+    """Cluster centers hashed into a grid with cells one radius wide.
+
+    Finding the nearest center within radius of a point only looks at the
+    cells around it, no matter how many centers there are. Centers belong to
+    a group (e.g. an event type) and a point only finds those of its group.
+    Distances use the equirectangular approximation, plenty accurate at a few
+    hundred meters.
+    """
+
+    def __init__(self, radius: float):
+        """
+        Args:
+            radius: Maximum distance in meters between a point and its center.
+        """
+        self.radius = radius
+        self._cell_size = radius / METERS_PER_DEGREE
+        self._cells: dict[tuple, set[int]] = {}
+        # center id -> (latitude, longitude, group)
+        self._centers: dict[int, tuple[float, float, object]] = {}
+
+    def _cell(self, latitude: float, longitude: float, group) -> tuple:
+        return (group, math.floor(latitude / self._cell_size), math.floor(longitude / self._cell_size))
+
+    def add(self, center_id: int, latitude: float, longitude: float, group=None) -> None:
+        self._centers[center_id] = (latitude, longitude, group)
+        self._cells.setdefault(self._cell(latitude, longitude, group), set()).add(center_id)
+
+    def nearest(self, latitude: float, longitude: float, group=None) -> int | None:
+        """Id of the nearest center of the group within radius, or None."""
+        _, cell_lat, cell_lon = self._cell(latitude, longitude, group)
+        # cells are narrower than radius east-west, away from the equator
+        cos_latitude = max(math.cos(math.radians(latitude)), 0.01)
+        lon_cells = math.ceil(1 / cos_latitude)
+        best, best_distance = None, self.radius**2
+        for dlat in (-1, 0, 1):
+            for dlon in range(-lon_cells, lon_cells + 1):
+                for center_id in self._cells.get((group, cell_lat + dlat, cell_lon + dlon), ()):
+                    center_lat, center_lon, _ = self._centers[center_id]
+                    # squared, to skip the sqrt
+                    dy = (latitude - center_lat) * METERS_PER_DEGREE
+                    dx = (longitude - center_lon) * METERS_PER_DEGREE * cos_latitude
+                    distance = dx * dx + dy * dy
+                    if distance <= best_distance:
+                        best, best_distance = center_id, distance
+        return best
+
+    def pull(self, center_id: int, latitude: float, longitude: float, share: float) -> tuple[float, float]:
+        """Move a center towards a point it was joined by, returns its new position.
+
+        With share being the point's part of the center's total weight (e.g.
+        1 / visits) the center stays the (weighted) mean of its points.
+        """
+        center_lat, center_lon, group = self._centers[center_id]
+        old_cell = self._cell(center_lat, center_lon, group)
+        center_lat += (latitude - center_lat) * share
+        center_lon += (longitude - center_lon) * share
+        self._centers[center_id] = (center_lat, center_lon, group)
+        new_cell = self._cell(center_lat, center_lon, group)
+        if new_cell != old_cell:
+            self._cells[old_cell].discard(center_id)
+            self._cells.setdefault(new_cell, set()).add(center_id)
+        return center_lat, center_lon
+
+
+def load_json(path: pathlib.Path | None) -> dict:
+    """The JSON object saved at path, empty if there is none."""
+    if not path or not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(path: pathlib.Path, data: dict) -> None:
+    """Write compact JSON through a temporary file, so readers never see half of it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp_path, path)
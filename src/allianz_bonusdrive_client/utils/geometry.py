@@ -0,0 +1,79 @@
+import polyline
+
+from .profiling import phase
+
+# BonusDrive encodes its polylines with 6 decimal places
+PRECISION = 6
+
+
+def decode(encoded: str | None) -> list[tuple[float, float]]:
+    """Decode a BonusDrive polyline into (latitude, longitude) tuples."""
+    if not encoded:
+        return []
+    with phase("polyline"):
+        return polyline.decode(encoded, PRECISION)
+
+
+def _zigzag_values(chunks):
+    """The values of a run of polyline chunks (characters - 63), and which chunks end one."""
+    import numpy as np
+
+    # every value is a run of 5 bit chunks, the last one without the 0x20 continuation bit
+    is_last = chunks < 0x20
+    starts = np.flatnonzero(np.concatenate(([True], is_last[:-1])))
+    value_index = np.cumsum(np.concatenate(([0], is_last[:-1])))
+    shifts = 5 * (np.arange(len(chunks)) - starts[value_index])
+    values = np.add.reduceat((chunks & 0x1F) << shifts, starts)
+    # zigzag encoded deltas
+    return np.where(values & 1, ~(values >> 1), values >> 1), is_last
+
+
+def decode_array(encoded: str | None):
+    """Decode a BonusDrive polyline into an (n, 2) numpy array of latitude, longitude.
+
+    Same result as decode(), but vectorized, many times faster for long
+    trips. Needs numpy (geo extra).
+    """
+    import numpy as np
+
+    if not encoded:
+        return np.empty((0, 2))
+    with phase("polyline"):
+        chunks = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+        deltas, _ = _zigzag_values(chunks)
+        return np.cumsum(deltas.reshape(-1, 2), axis=0) / 10**PRECISION
+
+
+def decode_many(encoded: list[str | None]):
+    """Decode many polylines at once, returns (all points as an (n, 2) array, points per polyline).
+
+    The polylines are decoded in one vectorized pass, much faster than
+    decode_array() one by one for many short ones. Needs numpy (geo extra).
+    """
+    import numpy as np
+
+    encoded = [line or "" for line in encoded]
+    joined = "".join(encoded).encode("ascii")
+    if not joined:
+        return np.empty((0, 2)), np.zeros(len(encoded), dtype=np.int64)
+    with phase("polyline"):
+        chunks = np.frombuffer(joined, dtype=np.uint8).astype(np.int64) - 63
+        deltas, is_last = _zigzag_values(chunks)
+        # values per polyline: the value ends in its characters
+        ends = np.cumsum([len(line) for line in encoded])
+        values_before = np.concatenate(([0], np.cumsum(is_last)))[ends]
+        counts = np.diff(np.concatenate(([0], values_before))) // 2
+        # every polyline starts from 0, not from the end of the one before
+        sums = np.cumsum(deltas.reshape(-1, 2), axis=0)
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        before = np.concatenate((np.zeros((1, 2), dtype=np.int64), sums))[offsets]
+        return (sums - np.repeat(before, counts, axis=0)) / 10**PRECISION, counts
+
+
+def encode(points) -> str:
+    """Encode (latitude, longitude) pairs as a BonusDrive polyline."""
+    return polyline.encode([tuple(point) for point in points], PRECISION)
+
+
+def format_coordinates(latitude: float, longitude: float) -> str:
+    return f"{'N' if latitude >= 0 else 'S'}{abs(latitude):.6f}, {'E' if longitude >= 0 else 'W'}{abs(longitude):.6f}"
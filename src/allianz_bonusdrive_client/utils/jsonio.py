@@ -0,0 +1,81 @@
+import io
+import json
+import sys
+from dataclasses import asdict, is_dataclass
+
+try:
+    import orjson
+except ImportError:  # optional, pip install allianz-bonusdrive-client[fast]
+    orjson = None
+
+
+def _default(obj):
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    """Serialize to compact JSON bytes, using orjson if it is installed.
+
+    Dataclasses (Trip etc.) are serialized like asdict() would.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+
+class NDJSONWriter:
+    """Write one JSON document per line, through a large write buffer.
+
+    Writes to the binary buffer of the given text stream (sys.stdout by
+    default) if it has one, otherwise to the text stream itself.
+    """
+
+    def __init__(self, stream=None, buffer_size: int = 1 << 16, flush_each: bool = False):
+        """
+        Args:
+            stream: Text stream to write to, defaults to sys.stdout.
+            buffer_size: Bytes to collect before writing them out.
+            flush_each: Flush after every record, for live output (e.g. follow).
+        """
+        self.stream = stream if stream is not None else sys.stdout
+        self.flush_each = flush_each
+        self._binary = getattr(self.stream, "buffer", None)
+        self._buffer = io.BytesIO()
+        self._buffer_size = buffer_size
+        self.count = 0
+        # anything printed before us must come out first
+        self.stream.flush()
+
+    def write(self, record) -> None:
+        self._buffer.write(dumps(record))
+        self._buffer.write(b"\n")
+        self.count += 1
+        if self.flush_each or self._buffer.tell() >= self._buffer_size:
+            self.flush()
+
+    def write_all(self, records) -> None:
+        for record in records:
+            self.write(record)
+
+    def flush(self) -> None:
+        data = self._buffer.getvalue()
+        if data:
+            if self._binary is not None:
+                self._binary.write(data)
+                self._binary.flush()
+            else:
+                self.stream.write(data.decode())
+                self.stream.flush()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,9 +1,22 @@
-import requests
+from requests.adapters import HTTPAdapter
+
+from .profiling import phase
+from .transport import create_adapter, create_session
+
 
 class PhotonClient:
-    def __init__(self, base_url):
+    def __init__(
+        self,
+        base_url,
+        adapter: HTTPAdapter | None = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        timeout: float | tuple[float, float] | None = None,
+    ):
         self.base_url = base_url
-        self.session = requests.Session()
+        self.adapter = adapter or create_adapter(pool_connections, pool_maxsize)
+        self.session = create_session(self.adapter)
+        self.timeout = timeout
         self.headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
@@ -12,10 +25,31 @@ class PhotonClient:
 
     def reverse_geocode(self, latitude: float, longitude: float) -> dict:
         """Perform reverse geocoding using the Photon API."""
-        response = self.session.get(
-            f"{self.base_url}/reverse",
-            params={"lat": latitude, "lon": longitude},
-            headers=self.headers,
-        )
+        with phase("photon") as timing:
+            response = self.session.get(
+                f"{self.base_url}/reverse",
+                params={"lat": latitude, "lon": longitude},
+                headers=self.headers,
+                timeout=self.timeout,
+            )
+            timing.bytes = len(response.content)
         response.raise_for_status()
-        return response.json()
\ No newline at end of file
+        with phase("json"):
+            return response.json()
+
+    def warm_up(self) -> None:
+        """Open a connection to the Photon server ahead of the first lookup."""
+        self.session.head(self.base_url, headers=self.headers, timeout=self.timeout)
+
+
+def place_name(geo: dict) -> str:
+    """Format a Photon reverse geocoding response as "name, city, country"."""
+    features = geo.get("features") if isinstance(geo, dict) else None
+    if not features or not isinstance(features, list) or not features[0]:
+        return ""
+    props = features[0].get("properties") or {}
+    # in Rust this would have been a single question mark. :(
+    name = props.get("name") or " ".join(
+        str(part) for part in (props.get("street"), props.get("housenumber")) if part
+    )
+    return ", ".join(part for part in (name, props.get("city"), props.get("country")) if part)
@@ -0,0 +1,187 @@
+import contextlib
+import functools
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    # seconds, including nested phases
+    wall: float = 0.0
+    # seconds spent in nested phases of the same thread
+    nested: float = 0.0
+    bytes: int = 0
+
+    @property
+    def own(self) -> float:
+        """Seconds not spent in nested phases."""
+        return max(self.wall - self.nested, 0.0)
+
+
+class Profiler:
+    """Wall time, call counts and bytes per phase, collected while profile() is active.
+
+    Phases nest per thread: a phase started inside another one is recorded
+    under its path, e.g. ("logbook", "transfer"). Phases of different
+    threads overlap, so together they can take longer than the whole run.
+    """
+
+    def __init__(self, cprofile: bool = False):
+        """
+        Args:
+            cprofile: Also run cProfile (on the calling thread only), see .cprofile.
+        """
+        self.stats: dict[tuple[str, ...], PhaseStats] = {}
+        self.wall = 0.0
+        self.cprofile = None
+        if cprofile:
+            import cProfile
+
+            self.cprofile = cProfile.Profile()
+        self._lock = threading.Lock()
+
+    def _record(self, path: tuple[str, ...], elapsed: float, nested: float, size: int) -> None:
+        with self._lock:
+            stats = self.stats.get(path)
+            if stats is None:
+                stats = self.stats[path] = PhaseStats()
+            stats.calls += 1
+            stats.wall += elapsed
+            stats.nested += nested
+            stats.bytes += size
+
+    def report(self) -> str:
+        """The phases as a table, nested phases indented below theirs."""
+        lines = [f"{'Phase':<32} {'Zeit (ms)':>10} {'eigene':>10} {'Aufrufe':>8} {'Bytes':>12}"]
+        for path in sorted(self.stats):
+            stats = self.stats[path]
+            name = "  " * (len(path) - 1) + path[-1]
+            lines.append(
+                f"{name:<32} {stats.wall * 1000:>10.1f} {stats.own * 1000:>10.1f} {stats.calls:>8} {stats.bytes or '':>12}"
+            )
+        lines.append(f"{'Gesamt':<32} {self.wall * 1000:>10.1f}")
+        return "\n".join(lines)
+
+    def folded(self) -> str:
+        """The phases' own time in microseconds as folded stacks, for flamegraph.pl or speedscope."""
+        return "".join(
+            f"{';'.join(path)} {round(stats.own * 1_000_000)}\n" for path, stats in sorted(self.stats.items())
+        )
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "bytes", "_frame", "_start")
+
+    def __init__(self, profiler: Profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        # set by the caller, e.g. the size of a response
+        self.bytes = 0
+
+    def __enter__(self) -> "_Phase":
+        stack = _stack()
+        path = (stack[-1][0] if stack else ()) + (self.name,)
+        # [path, time spent in nested phases]
+        self._frame = [path, 0.0]
+        stack.append(self._frame)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self._start
+        stack = _stack()
+        stack.pop()
+        if stack:
+            stack[-1][1] += elapsed
+        self.profiler._record(self._frame[0], elapsed, self._frame[1], self.bytes)
+
+
+class _NoPhase:
+    """Stands in for a phase while nothing is profiled, costs next to nothing."""
+
+    bytes = 0
+
+    def __enter__(self) -> "_NoPhase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def __setattr__(self, name, value) -> None:
+        pass
+
+
+_NO_PHASE = _NoPhase()
+_active: Profiler | None = None
+_local = threading.local()
+
+
+def _stack() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def phase(name: str):
+    """Time a block as a phase of the active profile, if there is one.
+
+        with phase("transfer") as timing:
+            response = session.get(url)
+            timing.bytes = len(response.content)
+
+    A phase inside a phase of the same name (e.g. a retry) counts as one.
+    """
+    profiler = _active
+    if profiler is None:
+        return _NO_PHASE
+    stack = _stack()
+    if stack and stack[-1][0][-1] == name:
+        return _NO_PHASE
+    return _Phase(profiler, name)
+
+
+def timed(name: str):
+    """Decorator, run the function as a phase."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextlib.contextmanager
+def profile(cprofile: bool = False):
+    """Collect the phases of everything run inside, in all threads.
+
+        with profile() as profiler:
+            client.authenticate()
+            client.get_trips()
+        print(profiler.report())
+
+    Args:
+        cprofile: Also run cProfile on this thread, e.g. to dump
+            profiler.cprofile.dump_stats("run.prof") for snakeviz.
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError("Already profiling")
+    profiler = Profiler(cprofile)
+    _active = profiler
+    start = time.perf_counter()
+    if profiler.cprofile:
+        profiler.cprofile.enable()
+    try:
+        yield profiler
+    finally:
+        if profiler.cprofile:
+            profiler.cprofile.disable()
+        profiler.wall = time.perf_counter() - start
+        _active = None
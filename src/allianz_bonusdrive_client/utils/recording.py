@@ -0,0 +1,145 @@
+import base64
+import gzip
+import json
+import os
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from .transport import create_adapter
+
+# responses of these paths contain login tickets
+SENSITIVE_PATHS = ("/cas/",)
+REDACTED = "REDACTED"
+# the body is stored decoded, and cookies are never stored
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+
+
+def request_key(method: str, url: str) -> str:
+    """Key of a request in the archive: method and URL with sorted query parameters."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method.upper()} {urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))}"
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Send requests through another adapter and append every response to a gzipped JSONL file.
+
+    Pass it as adapter to BonusdriveAPIClient to record the API and Photon
+    responses, then replay them with ReplayAdapter. Request bodies (login
+    data) and cookies are never written, and with redact the bodies of the
+    login responses (tickets) are replaced by a placeholder; replaying still
+    works since the client only passes them back to the server.
+
+    Every response is written as a gzip member of its own and flushed right
+    away, so a recording that is killed (Ctrl+C, SIGTERM, a crash) keeps all
+    responses up to then, and a later recording appends to it.
+    """
+
+    def __init__(self, path: str | os.PathLike, adapter: HTTPAdapter | None = None, redact: bool = True):
+        """
+        Args:
+            path: Archive to append to, created if it doesn't exist.
+            adapter: Adapter doing the actual requests, e.g. a shared pool.
+            redact: Leave out the bodies of login responses.
+        """
+        super().__init__()
+        self.inner = adapter or create_adapter()
+        self.redact = redact
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+
+    def send(self, request, *args, **kwargs):
+        response = self.inner.send(request, *args, **kwargs)
+        content = response.content
+        if self.redact and any(path in urlsplit(request.url).path for path in SENSITIVE_PATHS):
+            body, encoding = REDACTED, "text"
+        else:
+            try:
+                body, encoding = content.decode("utf-8"), "text"
+            except UnicodeDecodeError:
+                body, encoding = base64.b64encode(content).decode("ascii"), "base64"
+        record = {
+            "key": request_key(request.method, request.url),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS},
+            "encoding": encoding,
+            "body": body,
+        }
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+        member = gzip.compress(line.encode("utf-8"), mtime=0)
+        with self._lock:
+            self._file.write(member)
+            self._file.flush()
+        return response
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        self.inner.close()
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Answer requests from an archive written by RecordingAdapter, without any network.
+
+    A request gets the next recorded response with the same method and URL;
+    once they're used up, the last one is repeated. Unknown requests raise
+    requests.ConnectionError, or get a 404 with strict=False.
+    """
+
+    def __init__(self, path: str | os.PathLike, strict: bool = True):
+        super().__init__()
+        self.strict = strict
+        self._responses: dict[str, list[dict]] = {}
+        self._served: dict[str, int] = {}
+        self._lock = threading.Lock()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._responses.setdefault(record["key"], []).append(record)
+            except EOFError:
+                # the last response was cut off while being written
+                pass
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self._responses.values())
+
+    def _next_record(self, key: str) -> dict | None:
+        records = self._responses.get(key)
+        if not records:
+            return None
+        with self._lock:
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+        return records[min(served, len(records) - 1)]
+
+    def send(self, request, *args, **kwargs):
+        key = request_key(request.method, request.url)
+        record = self._next_record(key)
+        if record is None:
+            if self.strict:
+                raise requests.ConnectionError(f"No recorded response for {key}", request=request)
+            record = {"status": 404, "reason": "Not Found", "headers": {}, "encoding": "text", "body": ""}
+
+        response = requests.Response()
+        response.status_code = record["status"]
+        response.reason = record.get("reason")
+        response.headers = CaseInsensitiveDict(record["headers"])
+        body = record["body"]
+        response._content = base64.b64decode(body) if record["encoding"] == "base64" else body.encode("utf-8")
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
@@ -0,0 +1,83 @@
+import math
+
+try:
+    import numpy as np
+except ImportError as e:  # optional, pip install allianz-bonusdrive-client[geo]
+    raise ImportError(
+        "Geometry simplification needs numpy, install allianz-bonusdrive-client[geo]"
+    ) from e
+
+from .geo import METERS_PER_DEGREE
+from .geometry import decode, encode
+
+
+def _project(points) -> "np.ndarray":
+    """Project (latitude, longitude) pairs to meters on a plane around their mean latitude."""
+    coordinates = np.asarray(points, dtype=np.float64)
+    scale = math.cos(math.radians(float(coordinates[:, 0].mean())))
+    return np.column_stack((
+        coordinates[:, 1] * METERS_PER_DEGREE * scale,
+        coordinates[:, 0] * METERS_PER_DEGREE,
+    ))
+
+
+def _distances_to_segment(points: "np.ndarray", start: "np.ndarray", end: "np.ndarray") -> "np.ndarray":
+    segment = end - start
+    length_squared = float(segment @ segment)
+    if length_squared == 0.0:
+        return np.hypot(*(points - start).T)
+    t = np.clip((points - start) @ segment / length_squared, 0.0, 1.0)
+    return np.hypot(*(points - start - t[:, None] * segment).T)
+
+
+def simplify(points, tolerance: float) -> list[tuple[float, float]]:
+    """Reduce a line with the Douglas-Peucker algorithm.
+
+    Args:
+        points: (latitude, longitude) pairs, e.g. from utils.geometry.decode.
+        tolerance: Maximum distance in meters between the original line and
+            the simplified one.
+
+    Returns:
+        The points that are kept, first and last point always included.
+    """
+    points = list(points)
+    if len(points) < 3 or tolerance <= 0:
+        return points
+    projected = _project(points)
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    # explicit stack instead of recursion, long trips have tens of thousands of points
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = _distances_to_segment(projected[first + 1:last], projected[first], projected[last])
+        farthest = int(distances.argmax())
+        if distances[farthest] > tolerance:
+            index = first + 1 + farthest
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [points[index] for index in np.flatnonzero(keep)]
+
+
+def simplify_polyline(encoded: str | None, tolerance: float) -> str | None:
+    """Simplify an encoded BonusDrive polyline and encode the result again."""
+    if not encoded:
+        return encoded
+    return encode(simplify(decode(encoded), tolerance))
+
+
+def simplify_trip(trip_data: dict, tolerance: float) -> dict:
+    """Copy of a raw trip dict with geometry and snappedGeometry simplified."""
+    trip_data = dict(trip_data)
+    if "geometry" in trip_data:
+        trip_data["geometry"] = simplify_polyline(trip_data["geometry"], tolerance)
+    if trip_data.get("snappedGeometry"):
+        trip_data["snappedGeometry"] = [
+            {**part, "geometry": simplify_polyline(part.get("geometry"), tolerance)}
+            for part in trip_data["snappedGeometry"]
+        ]
+    return trip_data
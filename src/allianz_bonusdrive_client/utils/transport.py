@@ -0,0 +1,56 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+# requests' own defaults
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+
+def create_adapter(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    pool_block: bool = False,
+    max_retries: int = 0,
+) -> HTTPAdapter:
+    """Create an HTTPAdapter holding a connection pool.
+
+    Args:
+        pool_connections: Number of per-host pools to keep around.
+        pool_maxsize: Maximum number of connections kept open per host.
+        pool_block: Block when all connections to a host are in use instead of
+            opening (and later discarding) an extra one.
+        max_retries: Retries for failed connection attempts.
+
+    The adapter is thread-safe and can be shared by any number of sessions, so
+    many clients can use one pool while keeping their own cookies.
+    """
+    return HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+        max_retries=max_retries,
+    )
+
+
+def create_session(adapter: HTTPAdapter | None = None) -> requests.Session:
+    """Create a requests.Session using the given adapter (or a default one)."""
+    session = requests.Session()
+    adapter = adapter or create_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a token from a TokenBucket before every request.
+
+    Sharing one of these between clients puts all of them on one request budget.
+    """
+
+    def __init__(self, bucket, *args, **kwargs):
+        self.bucket = bucket
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, *args, **kwargs):
+        self.bucket.acquire()
+        return super().send(request, *args, **kwargs)
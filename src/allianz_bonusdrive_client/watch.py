@@ -0,0 +1,160 @@
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Iterator
+
+import requests
+
+from .client import BonusdriveAPIClient
+from .utils.dataclasses import Trip
+from .utils.ratelimit import THROTTLE_STATUS_CODES
+
+
+def _transient(error: Exception) -> bool:
+    """Whether a failed request is worth retrying later."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in THROTTLE_STATUS_CODES
+    return False
+
+
+class TripWatcher:
+    """Poll the logbook and report trips that are new or were reprocessed.
+
+    Each poll fetches only the first few logbook entries without any of the
+    expansions (no geometry, events etc.), which is a small response. A trip
+    is reported when its tripId wasn't seen before or its
+    tripProcessingEndTimestampUtc changed; only then its details are fetched.
+
+    The poll interval adapts:
+      - right after a trip showed up (or the newest trip ended less than
+        `active_period` seconds ago) it polls every `fast_interval` seconds,
+        since the next leg or a reprocessing often follows,
+      - otherwise the interval grows by `backoff` per poll up to `slow_interval`,
+      - between `night_hours` (local time) it polls every `night_interval`.
+
+    Transient errors (connection errors, timeouts, 429 and 5xx responses)
+    don't end the watch: the poll returns nothing, the interval grows by
+    `backoff` from at least `fast_interval` up to `slow_interval`, and trips
+    whose details couldn't be fetched are reported on a later poll.
+    """
+
+    def __init__(
+        self,
+        client: BonusdriveAPIClient,
+        fast_interval: float = 60,
+        slow_interval: float = 900,
+        night_interval: float = 3600,
+        night_hours: tuple[int, int] = (0, 6),
+        active_period: float = 1800,
+        backoff: float = 1.5,
+        page_size: int = 5,
+        include_existing: bool = False,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            client: An authenticated client.
+            fast_interval: Seconds between polls while trips are coming in.
+            slow_interval: Longest interval during the day.
+            night_interval: Interval during the night.
+            night_hours: Start and end hour (local time) of the night.
+            active_period: Seconds after a trip ended during which to poll fast.
+            backoff: Factor the interval grows by with every empty poll.
+            page_size: Number of logbook entries to look at per poll.
+            include_existing: Also report the trips present on the first poll.
+            clock: Returns the current time as a UNIX timestamp.
+        """
+        self.client = client
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.night_interval = night_interval
+        self.night_hours = night_hours
+        self.active_period = active_period
+        self.backoff = backoff
+        self.page_size = page_size
+        self.include_existing = include_existing
+        self.clock = clock
+        self.interval = fast_interval
+        self._seen: dict[str, object] = {}
+        self._last_trip_end = 0.0
+        self._first_poll = True
+        self._stop = threading.Event()
+
+    def poll(self) -> list[Trip]:
+        """Poll the logbook once and return new or reprocessed trips, oldest first."""
+        try:
+            items = self.client.get_trips_raw(amount=self.page_size, expand=())
+        except requests.RequestException as e:
+            if not _transient(e):
+                raise
+            self._back_off()
+            return []
+        changed = []
+        for item in items:
+            trip = item["trip"]
+            tripId = str(trip["tripId"])
+            processed = trip.get("tripProcessingEndTimestampUtc")
+            if tripId in self._seen and self._seen[tripId] == processed:
+                continue
+            self._seen[tripId] = processed
+            changed.append(tripId)
+            end = trip.get("tripEndTimestampUtc")
+            if isinstance(end, (int, float)):
+                self._last_trip_end = max(self._last_trip_end, end / 1000)
+
+        if len(self._seen) > 1000:
+            # only the first page can change, forget what scrolled off long ago
+            current = {str(item["trip"]["tripId"]) for item in items}
+            self._seen = {k: v for k, v in self._seen.items() if k in current}
+
+        if self._first_poll:
+            self._first_poll = False
+            if not self.include_existing:
+                changed = []
+
+        self._update_interval(bool(changed))
+        trips = []
+        pending = list(reversed(changed))
+        for number, tripId in enumerate(pending):
+            try:
+                trips.append(self.client.get_trip_details(tripId))
+            except requests.RequestException as e:
+                if not _transient(e):
+                    raise
+                # forget this and the remaining trips, so the next poll reports them again
+                for tripId in pending[number:]:
+                    self._seen.pop(tripId, None)
+                self._back_off()
+                break
+        return trips
+
+    def _back_off(self) -> None:
+        self.interval = min(self.slow_interval, max(self.interval, self.fast_interval) * self.backoff)
+
+    def _update_interval(self, found: bool) -> None:
+        now = self.clock()
+        start, end = self.night_hours
+        hour = datetime.fromtimestamp(now).hour
+        if found or now - self._last_trip_end < self.active_period:
+            self.interval = self.fast_interval
+        elif start <= hour < end:
+            self.interval = self.night_interval
+        else:
+            self.interval = min(self.slow_interval, self.interval * self.backoff)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def watch(self) -> Iterator[Trip]:
+        """Poll until stop() is called, yielding every new or reprocessed trip."""
+        self._stop.clear()
+        while not self._stop.is_set():
+            yield from self.poll()
+            self._stop.wait(self.interval)
+
+
+def watch(client: BonusdriveAPIClient, **kwargs) -> Iterator[Trip]:
+    """Shortcut for TripWatcher(client, **kwargs).watch()."""
+    return TripWatcher(client, **kwargs).watch()
@@ -0,0 +1,79 @@
+"""Helpers shared by the test modules."""
+import json
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from allianz_bonusdrive_client.utils.geometry import encode
+
+SCORES = {
+    "over.speeding": 90, "speeding": 80, "distracted.driving": 100, "payd": 70, "overall": 85,
+    "harsh.cornering": 95, "harsh.acceleration": 90, "harsh.braking": 60, "mileage": 100,
+}
+
+
+def trip_data(tripId, points=((52.5, 13.4), (52.51, 13.41), (52.52, 13.42))):
+    return {
+        "tripId": tripId,
+        "events": {
+            "MultiLevelBrakingViolation": [
+                {"latitude": 52.51, "longitude": 13.41, "timeStamp": 1700000100000, "level": 2, "kmPerHour": 48.0},
+            ],
+        },
+        "vehicle": {"vehicleId": "v1", "make": "VW", "model": "Golf"},
+        "user": {"userId": "u1", "publicDisplayName": "Test", "firstName": "Test", "lastName": "User"},
+        "tripScores": {"scores": SCORES, "scoreType": 1},
+        "tripStartTimestampUtc": 1700000000000,
+        "tripEndTimestampUtc": 1700000600000,
+        "tripStartTimestampLocal": 1700003600000,
+        "tripEndTimestampLocal": 1700004200000,
+        "tripProcessingEndTimestampUtc": 1700000700000,
+        "kilometers": 2.6,
+        "avgKilometersPerHour": 30.0,
+        "maxKilometersPerHour": 50.0,
+        "seconds": 600,
+        "secondsOfIdling": 30,
+        "timeZoneOffsetMillis": 3600000,
+        "tripStatus": "COMPLETED",
+        "transportMode": "CAR",
+        "transportModeMessageKey": "car",
+        "geometry": encode(points),
+        "reconstructedStartGeometry": "",
+        "tripStartStatus": "STARTED",
+        "verified": True,
+        "hasAlerts": False,
+        "tripScore": 85,
+        "eventsCount": 1,
+        "private": False,
+        "tripUUID": f"uuid-{tripId}",
+        "purpose": "PRIVATE",
+    }
+
+
+BASE_URL = "https://bonusdrive.example"
+
+
+class FakeServer(HTTPAdapter):
+    """Answers the login and a trips request like the real server."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def send(self, request, *args, **kwargs):
+        self.requests.append(request.url)
+        path = request.path_url.split("?")[0]
+        bodies = {
+            "/cas/rest/v1/rbtickets/tgt": (200, "ST-secret"),
+            "/ipaid/": (302, ""),
+            "/ipaid/api/v2/session": (200, json.dumps({"userId": 42})),
+            "/ipaid/api/v2/users/42/vehicles": (200, json.dumps([{"vehicleId": "v1"}])),
+        }
+        status, body = bodies.get(path, (200, json.dumps({"items": [{"trip": {"tripId": "t1"}}]})))
+        response = requests.Response()
+        response.status_code = status
+        response.headers["Content-Type"] = "application/json"
+        response._content = body.encode()
+        response.url = request.url
+        response.request = request
+        return response
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from allianz_bonusdrive_client.archive import ArchiveWriter, PointArchive, build
+from allianz_bonusdrive_client.store import TripStore
+from allianz_bonusdrive_client.utils.geometry import decode, encode
+
+
+def random_line(rng, n, step):
+    lat, lon = rng.uniform(47, 55), rng.uniform(6, 15)
+    points = []
+    for _ in range(n):
+        lat += rng.uniform(-step, step)
+        lon += rng.uniform(-step, step)
+        points.append((round(lat, 6), round(lon, 6)))
+    return points
+
+
+def test_round_trip(tmp_path):
+    rng = random.Random(1)
+    short_steps = random_line(rng, 500, 0.001)
+    long_steps = random_line(rng, 50, 0.5)
+    path = tmp_path / "points.bin"
+    with ArchiveWriter(path) as writer:
+        writer.add("t1", short_steps, snapped=[short_steps[:10], long_steps])
+        writer.add("t2", long_steps)
+        writer.add("t3", [])
+
+    archive = PointArchive(path)
+    assert len(archive) == 3 and "t2" in archive and "t4" not in archive
+    assert np.array_equal(archive.points("t1"), np.array(short_steps))
+    assert np.array_equal(archive.points("t2"), np.array(long_steps))
+    assert archive.points("t3").shape == (0, 2)
+    assert [len(line) for line in archive.snapped("t1")] == [10, 50]
+
+    first, steps = archive.deltas("t1")
+    # small steps are stored as 16 bit, read without copying
+    assert steps.dtype == np.int16 and not steps.flags.owndata
+    assert first == (round(short_steps[0][0] * 1e6), round(short_steps[0][1] * 1e6))
+    assert archive.deltas("t2")[1].dtype == np.int32
+    with pytest.raises(KeyError):
+        archive.points("t4")
+    del first, steps
+    archive.close()
+
+
+def test_close_with_views_alive(tmp_path):
+    points = random_line(random.Random(2), 100, 0.001)
+    path = tmp_path / "points.bin"
+    with ArchiveWriter(path) as writer:
+        writer.add("t1", points)
+
+    with PointArchive(path) as archive:
+        _, steps = archive.deltas("t1")
+    # the mapping stays alive as long as the view
+    assert np.array_equal(np.cumsum(steps, axis=0)[-1], np.round(np.array(points[-1]) * 1e6) - np.round(np.array(points[0]) * 1e6))
+    archive.close()
+    with pytest.raises(ValueError, match="archive is closed"):
+        archive.deltas("t1")
+    with pytest.raises(ValueError, match="archive is closed"):
+        archive.points("t1")
+
+
+def test_build_from_store(tmp_path):
+    store = TripStore(tmp_path / "store")
+    line = [(52.5, 13.4), (52.51, 13.41), (52.52, 13.42)]
+    store.add({"tripId": "t1", "geometry": encode(line), "snappedGeometry": [{"geometry": encode(line[1:])}]})
+
+    assert build(tmp_path / "points.bin", store) == 1
+    with PointArchive(tmp_path / "points.bin") as archive:
+        assert np.array_equal(archive.points("t1"), np.array(decode(encode(line))))
+        assert len(archive.snapped("t1")[0]) == 2
+
+
+def test_incomplete_archive(tmp_path):
+    path = tmp_path / "points.bin"
+    with ArchiveWriter(path) as writer:
+        writer.add("t1", [(52.5, 13.4), (52.51, 13.41)])
+    # the end of the index cut off, e.g. by an interrupted copy
+    path.write_bytes(path.read_bytes()[:-8])
+
+    with pytest.raises(ValueError):
+        PointArchive(path)
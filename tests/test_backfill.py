@@ -0,0 +1,115 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from allianz_bonusdrive_client.backfill import Backfill
+from allianz_bonusdrive_client.store import TripStore
+from allianz_bonusdrive_client.utils.ratelimit import AimdLimiter, parse_retry_after
+
+
+def make_client(trip_ids):
+    client = MagicMock()
+    client.authenticated = True
+    client.get_vehicleId.return_value = "vehicle123"
+    client.get_trips_raw.side_effect = lambda amount, offset: [
+        {"trip": {"tripId": tripId}} for tripId in trip_ids[offset:offset + amount]
+    ]
+    client.get_trip_details_raw.side_effect = lambda tripId, vehicleId: {
+        "tripId": tripId,
+        "kilometers": 1.0,
+    }
+    return client
+
+
+def http_error(status, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return requests.HTTPError(response=response)
+
+
+def test_backfill_fetches_every_trip(tmp_path):
+    client = make_client([f"t{i}" for i in range(7)])
+
+    result = Backfill(client, tmp_path, page_size=3).run()
+
+    assert result.complete
+    assert result.fetched == 7
+    assert TripStore(tmp_path).ids() == {f"t{i}" for i in range(7)}
+    checkpoint = json.loads((tmp_path / "backfill.json").read_text())
+    assert checkpoint == {"offset": 7, "pending": [], "complete": True}
+
+
+def test_backfill_resumes_failed_trips(tmp_path):
+    client = make_client(["t0", "t1", "t2"])
+    details = client.get_trip_details_raw.side_effect
+
+    def broken(tripId, vehicleId):
+        if tripId == "t1":
+            raise http_error(404)
+        return details(tripId, vehicleId)
+
+    client.get_trip_details_raw.side_effect = broken
+
+    first = Backfill(client, tmp_path, page_size=10).run()
+    assert not first.complete
+    assert set(first.failed) == {"t1"}
+
+    client.get_trip_details_raw.side_effect = details
+    client.get_trips_raw.reset_mock()
+    second = Backfill(client, tmp_path, page_size=10).run()
+
+    assert second.complete
+    assert second.fetched == 1
+    client.get_trips_raw.assert_not_called()
+
+
+def test_backfill_reports_unexpected_errors(tmp_path):
+    client = make_client(["t0", "t1"])
+    details = client.get_trip_details_raw.side_effect
+    # a payload without tripId can't be stored
+    client.get_trip_details_raw.side_effect = lambda tripId, vehicleId: {} if tripId == "t1" else details(tripId, vehicleId)
+
+    result = Backfill(client, tmp_path, page_size=10).run()
+
+    assert not result.complete
+    assert result.failed["t1"].startswith("KeyError")
+    assert TripStore(tmp_path).ids() == {"t0"}
+
+
+def test_backfill_retries_throttled_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr("allianz_bonusdrive_client.backfill.time.sleep", lambda seconds: None)
+    client = make_client(["t0"])
+    details = client.get_trip_details_raw.side_effect
+    responses = [http_error(429, "0"), http_error(503)]
+
+    def flaky(tripId, vehicleId):
+        if responses:
+            raise responses.pop(0)
+        return details(tripId, vehicleId)
+
+    client.get_trip_details_raw.side_effect = flaky
+    limiter = AimdLimiter(initial=8, cooldown=0)
+
+    result = Backfill(client, tmp_path, limiter=limiter).run()
+
+    assert result.fetched == 1
+    assert limiter.limit < 8
+
+
+def test_aimd_limiter_bounds():
+    limiter = AimdLimiter(initial=2, minimum=1, maximum=3, cooldown=0)
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.limit == 3
+    for _ in range(10):
+        limiter.on_throttle()
+    assert limiter.limit == 1
+
+
+@pytest.mark.parametrize("value, expected", [("120", 120.0), (None, None), ("garbage", None)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
@@ -1,4 +1,6 @@
 import os
+import subprocess
+import sys
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
@@ -20,7 +22,7 @@ def test_save_tgt_to_env_creates_new_file():
                 env_file.unlink()
             
             # Patch find_dotenv to return empty string (simulating no .env found)
-            with patch("allianz_bonusdrive_client.cli.find_dotenv", return_value=""):
+            with patch("dotenv.find_dotenv", return_value=""):
                 save_tgt_to_env("test_tgt_token")
             
             env_path = Path(tmpdir) / ".env"
@@ -47,7 +49,7 @@ def test_save_tgt_to_env_updates_existing_file():
                 from allianz_bonusdrive_client.cli import save_tgt_to_env
             
             # Patch find_dotenv to return the temp .env path
-            with patch("allianz_bonusdrive_client.cli.find_dotenv", return_value=str(env_path)):
+            with patch("dotenv.find_dotenv", return_value=str(env_path)):
                 save_tgt_to_env("new_tgt_token")
             
             content = env_path.read_text()
@@ -56,3 +58,136 @@ def test_save_tgt_to_env_updates_existing_file():
             assert "new_tgt_token" in content
         finally:
             os.chdir(original_cwd)
+
+
+def test_cli_import_does_not_load_heavy_modules():
+    """Importing the CLI (and so --help) must not pull in requests & co."""
+    code = (
+        "import sys, allianz_bonusdrive_client.cli; "
+        "print(','.join(m for m in ('requests', 'polyline', 'colorama', 'dotenv') if m in sys.modules))"
+    )
+    env = {k: v for k, v in os.environ.items() if k != "TGT"}
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, stdin=subprocess.DEVNULL, check=True
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_cli_help_does_not_prompt_or_authenticate():
+    env = {k: v for k, v in os.environ.items() if k != "TGT"}
+    result = subprocess.run(
+        [sys.executable, "-m", "allianz_bonusdrive_client.cli", "--help"],
+        capture_output=True, text=True, env=env, stdin=subprocess.DEVNULL, timeout=30,
+    )
+    assert result.returncode == 0
+    assert "Enter your email" not in result.stdout
+    assert "usage:" in result.stdout
+
+
+def test_run_actions_fetches_concurrently_and_prints_in_order(capsys):
+    import threading
+    from unittest.mock import MagicMock
+    from allianz_bonusdrive_client.cli import build_parser, run_actions
+
+    both_started = threading.Barrier(2, timeout=5)
+    client = MagicMock()
+
+    def badges(type, endDate, startDate):
+        both_started.wait()
+        return [{"badge": type}]
+
+    def scores(endDate, startDate):
+        both_started.wait()
+        return [{"score": 1}]
+
+    client.get_badges_raw.side_effect = badges
+    client.get_scores_raw.side_effect = scores
+
+    run_actions(client, build_parser().parse_args(["scores", "badges-daily", "--raw"]))
+
+    out = capsys.readouterr().out
+    assert out.index('"score"') < out.index('"badge"')
+
+
+def test_ndjson_trips_stream_one_record_per_line(capsys):
+    import json
+    from unittest.mock import MagicMock
+    from allianz_bonusdrive_client.cli import parse_args, run_actions
+
+    client = MagicMock()
+    client.iter_trips_raw.return_value = iter([{"trip": {"tripId": "t1"}}, {"trip": {"tripId": "t2"}}])
+
+    args = parse_args(["trips", "--format", "ndjson", "--limit", "0"])
+    run_actions(client, args)
+
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["trip"]["tripId"] for line in lines] == ["t1", "t2"]
+    client.iter_trips_raw.assert_called_once_with(limit=None)
+
+
+def test_progressive_rendering_does_not_wait_for_geocoding(capsys):
+    import threading
+    from unittest.mock import MagicMock
+    from allianz_bonusdrive_client.cli import render_trips_progressive
+
+    release = threading.Event()
+    client = MagicMock()
+
+    def slow_lookup(lat, lon):
+        release.wait(timeout=5)
+        return f"{lat:.0f}/{lon:.0f}"
+
+    client.lookup_place.side_effect = slow_lookup
+    trip = MagicMock(tripId="t1", geometry="_p~iF~ps|U_ulLnnqC", kilometers=1.0, avgKilometersPerHour=1.0,
+                     tripStartTimestampLocal=0, tripEndTimestampLocal=0, seconds=1, secondsOfIdling=0,
+                     start_point_string=None, end_point_string=None)
+
+    with patch("allianz_bonusdrive_client.print.print_scores"):
+        printer = threading.Thread(target=render_trips_progressive, args=(client, [trip]))
+        printer.start()
+        for _ in range(500):
+            if "Trip ID" in capsys.readouterr().out:
+                break
+            threading.Event().wait(0.01)
+        else:
+            raise AssertionError("trip summary was not printed before the lookups finished")
+        release.set()
+        printer.join(timeout=5)
+
+    assert "Orte t1: " in capsys.readouterr().out
+
+
+def test_progressive_rendering_prints_places_after_their_trip(capsys):
+    from unittest.mock import MagicMock
+    from allianz_bonusdrive_client.cli import render_trips_progressive
+
+    client = MagicMock()
+    client.lookup_place.side_effect = lambda lat, lon: f"{lat:.0f}/{lon:.0f}"
+    trips = [
+        MagicMock(tripId=tripId, geometry="_p~iF~ps|U_ulLnnqC", kilometers=1.0, avgKilometersPerHour=1.0,
+                  tripStartTimestampLocal=0, tripEndTimestampLocal=0, seconds=1, secondsOfIdling=0,
+                  start_point_string=None, end_point_string=None)
+        for tripId in ("t1", "t2")
+    ]
+
+    with patch("allianz_bonusdrive_client.print.print_scores"):
+        render_trips_progressive(client, trips)
+
+    out = capsys.readouterr().out
+    for tripId in ("t1", "t2"):
+        assert out.index(f"Trip ID:             {tripId}") < out.index(f"Orte {tripId}: ")
+
+
+def test_labels_of_unknown_places_are_rejected(tmp_path, capsys):
+    import pytest
+    from unittest.mock import MagicMock
+    from allianz_bonusdrive_client.cli import parse_args, run_actions
+
+    places = str(tmp_path / "places.json")
+    with pytest.raises(SystemExit):
+        parse_args(["places", "--places", places, "--label", "Zuhause"])
+    assert "--label erwartet ID=NAME" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit):
+        run_actions(MagicMock(), parse_args(["places", "--places", places, "--label", "7=Zuhause"]))
+    assert "Unbekannte Orte: 7" in capsys.readouterr().err
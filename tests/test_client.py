@@ -1,3 +1,7 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from unittest.mock import patch, MagicMock
 from allianz_bonusdrive_client.client import BonusdriveAPIClient
@@ -242,4 +246,114 @@ def test_get_trip_details(api_client, mock_session):
 
         trip_details = api_client.get_trip_details(tripId="trip123")
 
-        assert trip_details.tripId == "trip123"
\ No newline at end of file
+        assert trip_details.tripId == "trip123"
+
+
+def test_concurrent_identical_requests_are_coalesced(api_client, mock_session):
+    api_client.authenticated = True
+    api_client.userId = 12345
+    release = threading.Event()
+
+    def slow_get(*args, **kwargs):
+        release.wait(timeout=5)
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = [{"vehicleId": "vehicle123"}]
+        return response
+
+    mock_session.get.side_effect = slow_get
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(api_client.get_vehicleId) for _ in range(4)]
+        while api_client._inflight.in_flight() == 0:
+            time.sleep(0.001)
+        time.sleep(0.05)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["vehicle123"] * 4
+    assert mock_session.get.call_count == 1
+
+
+def test_sequential_requests_are_not_cached(api_client, mock_session):
+    api_client.authenticated = True
+    api_client.userId = 12345
+    mock_session.get.return_value.status_code = 200
+    mock_session.get.return_value.json.return_value = {"items": []}
+
+    api_client.get_trips_raw()
+    api_client.get_trips_raw()
+
+    assert mock_session.get.call_count == 2
+
+
+def test_vehicleId_is_looked_up_once_per_session(api_client, mock_session):
+    api_client.authenticated = True
+    api_client.userId = 12345
+    mock_session.get.return_value.status_code = 200
+    mock_session.get.return_value.json.return_value = [{"vehicleId": "vehicle123"}]
+
+    assert api_client.get_vehicleId() == "vehicle123"
+    assert api_client.get_vehicleId() == "vehicle123"
+
+    assert mock_session.get.call_count == 1
+
+
+def test_clients_can_share_a_connection_pool(mock_session):
+    from allianz_bonusdrive_client.utils.transport import create_adapter
+
+    adapter = create_adapter(pool_maxsize=32)
+    first = BonusdriveAPIClient("https://example.com", None, None, tgt="a", adapter=adapter)
+    second = BonusdriveAPIClient("https://example.com", None, None, tgt="b", adapter=adapter)
+
+    assert first.adapter is second.adapter
+    mock_session.mount.assert_any_call("https://", adapter)
+
+
+def test_timeout_and_keep_alive_are_applied(mock_session):
+    client = BonusdriveAPIClient(
+        "https://example.com", None, None, tgt="tgt", timeout=(3.05, 10), keep_alive=False
+    )
+    client.authenticated = True
+    client.userId = 12345
+    mock_session.get.return_value.status_code = 200
+    mock_session.get.return_value.json.return_value = [{"vehicleId": "vehicle123"}]
+
+    client.get_vehicleId()
+
+    kwargs = mock_session.get.call_args.kwargs
+    assert kwargs["timeout"] == (3.05, 10)
+    assert kwargs["headers"]["Connection"] == "close"
+
+
+def test_warm_up_opens_connections(mock_session):
+    client = BonusdriveAPIClient("https://example.com", None, None, tgt="tgt")
+
+    client.warm_up(4)
+
+    assert mock_session.head.call_count == 4
+
+
+def test_iter_trips_raw_pages_lazily(api_client):
+    api_client.authenticated = True
+    pages = {0: [{"trip": {"tripId": i}} for i in range(3)], 3: [{"trip": {"tripId": 3}}]}
+    with patch.object(api_client, "get_trips_raw", side_effect=lambda amount, offset, expand: pages[offset][:amount]) as get_trips_raw:
+        trips = api_client.iter_trips_raw(page_size=3)
+        assert next(trips)["trip"]["tripId"] == 0
+        assert get_trips_raw.call_count == 1
+        assert [item["trip"]["tripId"] for item in trips] == [1, 2, 3]
+        assert get_trips_raw.call_count == 2
+
+        assert len(list(api_client.iter_trips_raw(limit=2, page_size=3))) == 2
+
+
+def test_lookup_place_without_photon_formats_coordinates(api_client):
+    assert api_client.lookup_place(48.137154, -11.576124) == "N48.137154, W11.576124"
+
+
+def test_place_name_formats_photon_response():
+    from allianz_bonusdrive_client.utils.photon import place_name
+
+    geo = {"features": [{"properties": {"street": "Marienplatz", "housenumber": "8", "city": "München", "country": "Deutschland"}}]}
+    assert place_name(geo) == "Marienplatz 8, München, Deutschland"
+    assert place_name({"features": []}) == ""
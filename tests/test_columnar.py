@@ -0,0 +1,85 @@
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from allianz_bonusdrive_client.columnar import read_parquet, to_arrow, to_columns, write_parquet
+
+from tests.conftest import trip_data
+
+
+def test_to_columns_flattens_trips():
+    columns = to_columns([{"trip": trip_data("t1")}, trip_data("t2")])
+
+    assert columns["tripId"] == ["t1", "t2"]
+    assert columns["vehicleId"] == ["v1", "v1"]
+    assert columns["score_harsh_braking"] == [60, 60]
+    assert "geometry" not in columns
+
+
+def test_to_arrow_types():
+    table = to_arrow([trip_data("t1")], include_geometry=True)
+
+    assert table.schema.field("start_utc").type == pa.timestamp("ms", tz="UTC")
+    assert table.schema.field("score_overall").type == pa.float64()
+    assert table.column("kilometers").to_pylist() == [2.6]
+    assert table.column("geometry").to_pylist() == [trip_data("t1")["geometry"]]
+
+
+def test_to_arrow_missing_fields():
+    table = to_arrow([{"tripId": "t1"}])
+
+    assert table.column("tripId").to_pylist() == ["t1"]
+    assert table.column("score_overall").to_pylist() == [None]
+
+
+def test_parquet_partitioned(tmp_path):
+    later = dict(trip_data("t2"), tripStartTimestampUtc=1735689600000)  # 2025-01-01
+    assert write_parquet([trip_data("t1"), later], tmp_path / "trips.parquet") == 2
+
+    assert sorted(p.name for p in (tmp_path / "trips.parquet").iterdir()) == ["year=2023", "year=2025"]
+    table = read_parquet(tmp_path / "trips.parquet", columns=["tripId"], filters=[("year", "=", 2025)])
+    assert table.column("tripId").to_pylist() == ["t2"]
+
+
+def test_to_columns_ids_are_strings():
+    data = dict(trip_data(1), vehicle={"vehicleId": 2}, user={"userId": 3})
+    table = to_arrow([data])
+
+    assert table.column("tripId").to_pylist() == ["1"]
+    assert table.column("vehicleId").to_pylist() == ["2"]
+    assert table.column("userId").to_pylist() == ["3"]
+
+
+def test_parquet_rewrites_without_duplicates(tmp_path):
+    root = tmp_path / "trips.parquet"
+    later = dict(trip_data("t2"), tripStartTimestampUtc=1735689600000)  # 2025-01-01
+    write_parquet([trip_data("t1"), later], root)
+    # the same trips again, one reprocessed, plus a new one in an existing month
+    write_parquet([dict(trip_data("t1"), kilometers=3.0), trip_data("t3")], root, include_geometry=True)
+
+    table = read_parquet(root, columns=["tripId", "kilometers", "geometry"]).sort_by("tripId")
+    assert table.column("tripId").to_pylist() == ["t1", "t2", "t3"]
+    assert table.column("kilometers").to_pylist() == [3.0, 2.6, 2.6]
+    assert table.column("geometry").to_pylist()[1] is None
+
+
+def test_parquet_keeps_the_last_of_duplicates(tmp_path):
+    root = tmp_path / "trips.parquet"
+    assert write_parquet([trip_data("t1"), trip_data("t2"), dict(trip_data("t1"), kilometers=3.0)], root) == 2
+
+    table = read_parquet(root, columns=["tripId", "kilometers"])
+    assert table.column("tripId").to_pylist() == ["t2", "t1"]
+    assert table.column("kilometers").to_pylist() == [2.6, 3.0]
+
+
+def test_parquet_trips_without_start_only_touch_their_partition(tmp_path):
+    root = tmp_path / "trips.parquet"
+    write_parquet([trip_data("t1"), dict(trip_data("n1"), tripStartTimestampUtc=None)], root)
+    files = sorted((root / "year=2023").rglob("*.parquet"))
+    write_parquet([dict(trip_data("n2"), tripStartTimestampUtc=None)], root)
+
+    # the dated months weren't rewritten
+    assert sorted((root / "year=2023").rglob("*.parquet")) == files
+
+    table = read_parquet(root, columns=["tripId"]).sort_by("tripId")
+    assert table.column("tripId").to_pylist() == ["n1", "n2", "t1"]
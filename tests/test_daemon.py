@@ -0,0 +1,77 @@
+import json
+import os
+import socket
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from allianz_bonusdrive_client.client import date_range
+from allianz_bonusdrive_client.daemon import CLIDaemon, forward
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    client = MagicMock()
+    client.get_badges_raw.return_value = [{"badgeType": "DAY", "level": 1}]
+    socket_path = str(tmp_path / "bonusdrive.sock")
+    daemon = CLIDaemon(client, socket_path)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(500):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.01)
+    yield daemon
+    daemon.shutdown()
+    thread.join(timeout=5)
+
+
+def test_forward_runs_action_on_daemon_client(daemon):
+    response = forward(daemon.socket_path, ["badges-daily", "--raw"])
+    assert response["status"] == 0
+    assert json.loads(response["stdout"]) == [{"badgeType": "DAY", "level": 1}]
+
+    forward(daemon.socket_path, ["badges-daily", "--raw"])
+    assert daemon.client.get_badges_raw.call_count == 2
+    daemon.client.authenticate.assert_not_called()
+    # the dates are the current ones, not those of when the daemon started
+    daemon.client.get_badges_raw.assert_called_with("daily", *date_range())
+
+
+def test_forward_reports_errors(daemon):
+    daemon.client.get_scores_raw.side_effect = RuntimeError("boom")
+
+    assert forward(daemon.socket_path, ["scores", "--raw"])["status"] == 1
+    assert forward(daemon.socket_path, ["no-such-action"])["status"] == 2
+    assert forward(daemon.socket_path, ["follow"])["status"] == 2
+    assert forward(daemon.socket_path, ["backfill"])["status"] == 2
+    assert forward(daemon.socket_path, ["places"])["status"] == 2
+    response = forward(daemon.socket_path, ["trips", "--record", "responses.jsonl.gz"])
+    assert response["status"] == 2
+    assert "--record can't run in the daemon" in response["stderr"]
+
+
+@pytest.mark.parametrize("option", ["--gazetteer", "--record", "--replay"])
+def test_client_options_run_locally(tmp_path, option):
+    from allianz_bonusdrive_client import cli
+
+    argv = ["trips", "--use-daemon", option, str(tmp_path / "file")]
+    with patch("allianz_bonusdrive_client.daemon.forward") as forward_mock, patch.object(cli, "run_client") as run_client:
+        cli.main(argv)
+
+    forward_mock.assert_not_called()
+    run_client.assert_called_once()
+
+
+def test_forward_without_daemon(tmp_path):
+    assert forward(str(tmp_path / "missing.sock"), ["trips"]) is None
+
+
+def test_forward_gives_up_on_a_hanging_daemon(tmp_path):
+    socket_path = str(tmp_path / "hanging.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(socket_path)
+        server.listen()
+        assert forward(socket_path, ["trips"], timeout=0.1) is None
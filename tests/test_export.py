@@ -0,0 +1,71 @@
+import io
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from allianz_bonusdrive_client.export import GPXWriter, export
+from allianz_bonusdrive_client.store import TripStore
+from tests.conftest import trip_data
+
+
+def test_geojson_export():
+    out = io.BytesIO()
+    # raw trip dict and logbook item
+    count = export([trip_data("t1"), {"trip": trip_data("t2")}], out, format="geojson", lookup_place=lambda lat, lon: f"{lat:.2f}")
+
+    collection = json.loads(out.getvalue())
+    assert count == 2
+    trips = [f for f in collection["features"] if f["geometry"]["type"] == "LineString"]
+    events = [f for f in collection["features"] if f["geometry"]["type"] == "Point"]
+    assert [f["properties"]["tripId"] for f in trips] == ["t1", "t2"]
+    assert trips[0]["geometry"]["coordinates"][0] == [13.4, 52.5]
+    assert trips[0]["properties"]["startPlace"] == "52.50"
+    assert trips[0]["properties"]["scores"]["harsh_braking"] == 60
+    assert trips[0]["properties"]["start"] == "2023-11-14T22:13:20Z"
+    assert events[0]["properties"] == {
+        "tripId": "t1", "event": "MultiLevelBrakingViolation", "time": "2023-11-14T22:15:00Z",
+        "level": 2, "kmPerHour": 48.0, "kmSpeedLimit": None,
+    }
+
+
+def test_geojson_export_empty(tmp_path):
+    path = tmp_path / "empty.geojson"
+    assert export([], path) == 0
+    assert json.loads(path.read_text()) == {"type": "FeatureCollection", "features": []}
+
+
+@pytest.mark.parametrize("include_events", [True, False])
+def test_gpx_export_from_store(tmp_path, include_events):
+    store = TripStore(tmp_path / "store")
+    store.add(trip_data("t1"))
+    store.add(trip_data("t2"))
+    path = tmp_path / "trips.gpx"
+
+    assert export(store, path, include_events=include_events) == 2
+
+    ns = {"gpx": "http://www.topografix.com/GPX/1/1"}
+    root = ET.parse(path).getroot()
+    tracks = root.findall("gpx:trk", ns)
+    assert [track.find("gpx:name", ns).text for track in tracks] == ["t1", "t2"]
+    assert len(tracks[0].findall("gpx:trkseg/gpx:trkpt", ns)) == 3
+    waypoints = root.findall("gpx:wpt", ns)
+    assert len(waypoints) == (2 if include_events else 0)
+    # waypoints come before tracks
+    assert list(root)[0].tag.endswith("wpt" if include_events else "trk")
+
+
+def test_gpx_escapes_text():
+    out = io.BytesIO()
+    with GPXWriter(out, include_events=False) as writer:
+        writer.write(trip_data("<t&1>"))
+
+    assert ET.fromstring(out.getvalue()).find("{http://www.topografix.com/GPX/1/1}trk/{http://www.topografix.com/GPX/1/1}name").text == "<t&1>"
+
+
+def test_gpx_numeric_trip_id():
+    out = io.BytesIO()
+    with GPXWriter(out, include_events=False) as writer:
+        writer.write(trip_data(12345))
+
+    assert ET.fromstring(out.getvalue()).find("{http://www.topografix.com/GPX/1/1}trk/{http://www.topografix.com/GPX/1/1}name").text == "12345"
@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from allianz_bonusdrive_client.exporter import MetricsExporter
+from allianz_bonusdrive_client.utils.dataclasses import Badge, Scores
+
+
+def trip(tripId, start, km=10.0, events=None):
+    return {"trip": {
+        "tripId": tripId,
+        "tripStartTimestampUtc": start,
+        "tripStartTimestampLocal": start,
+        "tripEndTimestampUtc": start + 600000,
+        "kilometers": km,
+        "seconds": 600,
+        "tripScore": 90,
+        "events": events or {},
+    }}
+
+
+def make_client(logbook):
+    client = MagicMock()
+    client.iter_trips_raw.side_effect = lambda limit, page_size: iter(logbook[:limit])
+    client.get_scores.return_value = {
+        1700000000000: Scores(1, 2, 3, 4, 50, 6, 7, 8, 9),
+        1700086400000: Scores(1, 2, 3, 4, 95, 6, 7, 8, 9),
+    }
+    client.get_badges.side_effect = lambda type, endDate, startDate: [Badge("DAY", 3, 1, 1, "DONE", []), Badge("DAY", 1, 1, 2, "DONE", [])]
+    return client
+
+
+def test_refresh_counts_new_trips_only():
+    braking = {"MultiLevelBrakingViolation": [{"level": 2}, {"level": 2}]}
+    logbook = [trip("t2", 1700003600000, events=braking), trip("t1", 1700000000000)]
+    client = make_client(logbook)
+    exporter = MetricsExporter(client)
+
+    exporter.refresh()
+    page = exporter.metrics().decode()
+    assert "bonusdrive_trips_total 2" in page
+    assert "bonusdrive_kilometers_total 20.0" in page
+    assert 'bonusdrive_events_total{type="MultiLevelBrakingViolation",level="2"} 2' in page
+    assert 'bonusdrive_score{component="overall"} 95' in page
+    assert 'bonusdrive_badge_level{type="daily"} 1' in page
+
+    logbook.insert(0, trip("t3", 1700007200000, km=5.0))
+    exporter.refresh()
+    page = exporter.metrics().decode()
+    assert "bonusdrive_trips_total 3" in page
+    assert "bonusdrive_kilometers_total 25.0" in page
+    assert 'bonusdrive_events_total{type="MultiLevelBrakingViolation",level="2"} 2' in page
+
+
+def test_failed_refresh_keeps_values():
+    client = make_client([trip("t1", 1700000000000)])
+    exporter = MetricsExporter(client)
+    exporter.refresh()
+    client.get_scores.side_effect = RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        exporter.refresh()
+
+    page = exporter.metrics().decode()
+    assert "bonusdrive_refresh_errors_total 1" in page
+    assert "bonusdrive_trips_total 1" in page
+
+
+def test_date_window_moves_with_the_clock():
+    client = make_client([trip("t1", 1700000000000)])
+    now = [datetime(2025, 3, 31, 23, 0).timestamp()]
+    exporter = MetricsExporter(client, clock=lambda: now[0])
+
+    exporter.refresh()
+    client.get_scores.assert_called_with("2025-03-31", "2025-03-01")
+    client.get_badges.assert_called_with("monthly", "2025-03-31", "2025-03-01")
+
+    now[0] += 2 * 3600
+    exporter.refresh()
+    client.get_scores.assert_called_with("2025-04-01", "2025-03-02")
+    client.get_badges.assert_called_with("monthly", "2025-04-01", "2025-03-02")
+
+
+def test_days_are_local_dates(monkeypatch):
+    import time
+
+    # 23:30 local time, encoded as UTC like the server does
+    start = int(datetime(2025, 3, 31, 23, 30, tzinfo=timezone.utc).timestamp() * 1000)
+    monkeypatch.setenv("TZ", "Europe/Berlin")
+    time.tzset()
+    try:
+        exporter = MetricsExporter(make_client([trip("t1", start)]))
+        exporter.refresh()
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+    assert 'bonusdrive_kilometers_day{date="2025-03-31"} 10.0' in exporter.metrics().decode()
+
+
+def test_page_before_first_refresh():
+    page = MetricsExporter(make_client([])).metrics().decode()
+
+    assert "bonusdrive_refresh_errors_total 0" in page
+    assert "bonusdrive_trips_total 0" in page
+
+
+def rejected(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+@pytest.mark.parametrize(("error", "login_again"), [
+    (rejected(401), True),
+    (rejected(403), True),
+    (rejected(500), False),
+    (requests.ConnectionError("down"), False),
+])
+def test_run_logs_in_again_only_on_rejected_sessions(error, login_again):
+    client = make_client([])
+    client.authenticated = True
+    exporter = MetricsExporter(client)
+
+    def fail(*args):
+        # one round of run() only
+        exporter.stop()
+        raise error
+
+    client.get_scores.side_effect = fail
+    exporter.run()
+
+    assert exporter.refresh_errors == 1
+    assert client.authenticate.called == login_again
+    assert client.authenticated is not login_again
@@ -0,0 +1,55 @@
+import time
+from unittest.mock import MagicMock
+
+from allianz_bonusdrive_client.fleet import Account, FleetPoller
+from allianz_bonusdrive_client.utils.ratelimit import TokenBucket
+
+
+def make_client(account):
+    client = MagicMock()
+    client.authenticated = False
+    client.tgt = f"tgt-{account.name}"
+    if account.name == "broken":
+        client.authenticate.side_effect = RuntimeError("Failed to obtain Service Ticket")
+    client.get_trips.return_value = [account.name]
+    return client
+
+
+def test_fleet_poller_streams_results_and_errors():
+    accounts = [Account("a", tgt="x"), Account("b", email="b@example.com", password="pw"), Account("broken", tgt="y")]
+    poller = FleetPoller(accounts, interval=0.01, jitter=0.5, client_factory=make_client)
+
+    seen = {}
+    for result in poller.poll():
+        seen.setdefault(result.account.name, []).append(result)
+        if all(len(seen.get(account.name, [])) >= 2 for account in accounts):
+            poller.stop()
+
+    assert [r.result for r in seen["a"][:2]] == [["a"], ["a"]]
+    assert all(isinstance(r.error, RuntimeError) for r in seen["broken"])
+    assert accounts[1].tgt == "tgt-b"
+
+
+def test_fleet_poller_reuses_logged_in_clients():
+    clients = []
+
+    def factory(account):
+        clients.append(make_client(account))
+        return clients[-1]
+
+    poller = FleetPoller([Account("a", tgt="x")], interval=0.01, client_factory=factory)
+    for count, _ in enumerate(poller.poll(), start=1):
+        clients[0].authenticated = True
+        if count == 3:
+            poller.stop()
+
+    assert len(clients) == 1
+    clients[0].authenticate.assert_called_once()
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=100, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.04
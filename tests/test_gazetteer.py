@@ -0,0 +1,59 @@
+import random
+
+from allianz_bonusdrive_client.client import BonusdriveAPIClient
+from allianz_bonusdrive_client.utils.gazetteer import OfflineGeocoder, haversine_km
+from allianz_bonusdrive_client.utils.photon import place_name
+
+GEONAMES = (
+    "2950159\tBerlin\tBerlin\t\t52.52437\t13.41053\tP\tPPLC\tDE\t\t16\t00\t11000\t11000000\t3426354\t\t74\tEurope/Berlin\t2022-01-01\n"
+    "2867714\tMünchen\tMuenchen\t\t48.13743\t11.57549\tP\tPPLA\tDE\t\t02\t091\t09162\t09162000\t1260391\t\t524\tEurope/Berlin\t2022-01-01\n"
+    "2950158\tBerliner Dom\tBerliner Dom\t\t52.51905\t13.40107\tS\tCH\tDE\t\t16\t00\t11000\t11000000\t0\t\t34\tEurope/Berlin\t2022-01-01\n"
+)
+
+
+def test_geonames_nearest_place(tmp_path):
+    path = tmp_path / "cities.txt"
+    path.write_text(GEONAMES, encoding="utf-8")
+    geocoder = OfflineGeocoder.open(str(path))
+
+    # only populated places by default
+    assert len(geocoder) == 2
+    assert place_name(geocoder.reverse_geocode(52.51, 13.39)) == "Berlin, DE"
+    assert place_name(geocoder.reverse_geocode(48.2, 11.6)) == "München, DE"
+    # nothing within 50 km
+    assert place_name(geocoder.reverse_geocode(50.0, 8.0)) == ""
+
+
+def test_matches_brute_force():
+    rng = random.Random(1)
+    places = [(rng.uniform(47, 55), rng.uniform(6, 15)) for _ in range(2000)]
+    geocoder = OfflineGeocoder(
+        [str(i) for i in range(len(places))],
+        [lat for lat, _ in places],
+        [lon for _, lon in places],
+        ["DE"] * len(places),
+    )
+    for _ in range(200):
+        lat, lon = rng.uniform(47, 55), rng.uniform(6, 15)
+        expected = min(range(len(places)), key=lambda i: haversine_km(lat, lon, *places[i]))
+        assert geocoder.nearest(lat, lon)[0] == expected
+
+
+def test_binary_round_trip(tmp_path):
+    csv_path = tmp_path / "places.csv"
+    csv_path.write_text("name,lat,lon,country\nHamburg,53.55073,9.99302,DE\nWien,48.20849,16.37208,AT\n", encoding="utf-8")
+    bin_path = tmp_path / "places.bin"
+    OfflineGeocoder.open(str(csv_path)).save(str(bin_path))
+
+    geocoder = OfflineGeocoder.open(str(bin_path))
+    assert geocoder.names == ["Hamburg", "Wien"]
+    assert geocoder.countries == ["DE", "AT"]
+    assert geocoder.latitudes[1] == 48.20849
+    assert place_name(geocoder.reverse_geocode(48.2, 16.4)) == "Wien, AT"
+
+
+def test_client_uses_geocoder():
+    geocoder = OfflineGeocoder(["Köln"], [50.93333], [6.95], ["DE"])
+    client = BonusdriveAPIClient("https://example.com", "user", "pass", geocoder=geocoder)
+
+    assert client.lookup_place(50.94, 6.96) == "Köln, DE"
@@ -0,0 +1,34 @@
+from allianz_bonusdrive_client.utils.geo import ClusterGrid, load_json, save_json
+
+
+def test_nearest_within_radius_and_group():
+    grid = ClusterGrid(100)
+    grid.add(1, 52.5200, 13.4050)
+    grid.add(2, 52.5200, 13.4050, "braking")
+    grid.add(3, 52.5205, 13.4050)
+
+    # ~30 m from 1, ~25 m from 3
+    assert grid.nearest(52.52028, 13.4050) == 3
+    assert grid.nearest(52.5200, 13.4060, "braking") == 2
+    # ~140 m east
+    assert grid.nearest(52.5200, 13.4071, "braking") is None
+    assert grid.nearest(52.5200, 13.4050, "cornering") is None
+
+
+def test_pull_keeps_the_mean_and_moves_cells():
+    grid = ClusterGrid(10)
+    grid.add(1, 52.0, 13.0)
+    assert grid.pull(1, 52.0001, 13.0, 1 / 2) == (52.00005, 13.0)
+    # far enough to change cells, still found at the new position only
+    for visits in range(3, 30):
+        grid.pull(1, 52.001, 13.0, 1 / visits)
+    assert grid.nearest(52.0, 13.0) is None
+    assert grid.nearest(52.001, 13.0) == 1
+
+
+def test_json_round_trip(tmp_path):
+    path = tmp_path / "index" / "data.json"
+    assert load_json(path) == {}
+    save_json(path, {"radius": 50.0, "names": ["Zuhause"]})
+    assert load_json(path) == {"radius": 50.0, "names": ["Zuhause"]}
+    assert [p.name for p in path.parent.iterdir()] == ["data.json"]
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from allianz_bonusdrive_client.client import parse_trip
+from allianz_bonusdrive_client.geofence import Geofences, Zone
+from tests.conftest import trip_data
+
+# a square office with a courtyard, and a home zone further east
+OFFICE = [(52.50, 13.30), (52.50, 13.32), (52.52, 13.32), (52.52, 13.30)]
+COURTYARD = [(52.505, 13.305), (52.505, 13.315), (52.515, 13.315), (52.515, 13.305)]
+HOME = [(52.50, 13.40), (52.50, 13.42), (52.51, 13.41)]
+PARK = [(52.53, 13.34), (52.53, 13.36), (52.55, 13.36), (52.55, 13.34)]
+
+
+@pytest.fixture
+def fences():
+    return Geofences([
+        Zone("Büro", [OFFICE, COURTYARD], "BUSINESS"),
+        Zone("Zuhause", [HOME], "PRIVATE"),
+        Zone("Park", [PARK]),
+    ])
+
+
+def test_contains(fences):
+    inside = fences.contains([(52.501, 13.301), (52.51, 13.31), (52.503, 13.41), (52.509, 13.419), (10.0, 10.0), (np.nan, np.nan)])
+    assert inside.tolist() == [
+        [True, False, False],
+        # courtyard is a hole
+        [False, False, False],
+        [False, True, False],
+        # inside the bounding box, outside the triangle
+        [False, False, False],
+        [False, False, False],
+        [False, False, False],
+    ]
+
+
+def test_classify_and_tag(fences):
+    trips = [
+        trip_data("home-office", [(52.503, 13.41), (52.54, 13.35), (52.501, 13.301)]),
+        trip_data("office-home", [(52.501, 13.301), (52.503, 13.41)]),
+        trip_data("through-park", [(52.6, 13.2), (52.54, 13.35), (52.6, 13.5)]),
+        trip_data("elsewhere", [(48.1, 11.5), (48.2, 11.6)]),
+        {"tripId": "no-geometry", "geometry": ""},
+    ]
+    zones = {result.tripId: result for result in fences.classify(trips, through=True)}
+    assert (zones["home-office"].start, zones["home-office"].end) == (["Zuhause"], ["Büro"])
+    assert zones["home-office"].through == ["Büro", "Zuhause", "Park"]
+    # the end zone wins
+    assert zones["home-office"].purpose == "BUSINESS"
+    assert zones["office-home"].purpose == "PRIVATE"
+    # a zone without purpose
+    assert zones["through-park"].through == ["Park"] and zones["through-park"].purpose is None
+    assert zones["elsewhere"].start == [] and zones["no-geometry"].through == []
+    assert fences.classify(trips[2:3])[0].through == []
+
+    parsed = [parse_trip(trip) for trip in trips[:4]]
+    assert fences.tag(parsed) == 2
+    assert [trip.purpose for trip in parsed] == ["BUSINESS", "PRIVATE", "PRIVATE", "PRIVATE"]
+
+
+def test_from_geojson(tmp_path):
+    path = tmp_path / "zones.geojson"
+    square = [[13.30, 52.50], [13.32, 52.50], [13.32, 52.52], [13.30, 52.52], [13.30, 52.50]]
+    path.write_text(json.dumps({
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "properties": {"name": "Büro", "purpose": "BUSINESS"}, "geometry": {"type": "Polygon", "coordinates": [square]}},
+            {"type": "Feature", "properties": {}, "geometry": {"type": "MultiPolygon", "coordinates": [[square], [[[lon + 1, lat] for lon, lat in square]]]}},
+            {"type": "Feature", "properties": {}, "geometry": {"type": "Point", "coordinates": [13.3, 52.5]}},
+        ],
+    }))
+    fences = Geofences.from_geojson(path)
+    assert [(zone.name, zone.purpose) for zone in fences.zones] == [("Büro", "BUSINESS"), ("Zone 2", None), ("Zone 2", None)]
+    assert fences.contains([(52.51, 14.31)]).tolist() == [[False, False, True]]
@@ -0,0 +1,18 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from allianz_bonusdrive_client.utils.geometry import decode_many, encode
+
+
+def test_decode_many_splits_per_line():
+    rng = random.Random(1)
+    points = [(rng.uniform(-89, 89), rng.uniform(-179, 179)) for _ in range(500)]
+
+    lines = [encode(points[:3]), None, encode(points[3:10]), encode(points[10:])]
+    decoded, counts = decode_many(lines)
+
+    assert counts.tolist() == [3, 0, 7, 490]
+    assert np.allclose(decoded, np.array(points), atol=1e-6)
@@ -0,0 +1,131 @@
+import zlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from allianz_bonusdrive_client.heatmap import Heatmap, densify, encode_png, to_pixels
+from allianz_bonusdrive_client.utils.geometry import encode
+
+LINE = [(52.5, 13.40), (52.5, 13.45)]
+
+
+def test_to_pixels():
+    pixels = to_pixels(np.array([[0.0, 0.0], [85.05112878, -180.0]]), zoom=0)
+    assert pixels == pytest.approx(np.array([[128.0, 128.0], [0.0, 0.0]]), abs=1e-6)
+
+
+def test_densify():
+    dense = densify(np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 0.5]]))
+    assert len(dense) == 12
+    assert np.abs(np.diff(dense, axis=0)).max() <= 1.0
+
+
+def test_trips_counted_once_per_pixel(tmp_path):
+    heatmap = Heatmap(tmp_path, zooms=[10, 14])
+    assert heatmap.add_points("t1", LINE)
+    assert not heatmap.add_points("t1", LINE)
+    assert heatmap.add({"tripId": "t2", "geometry": encode(LINE)})
+
+    pixels = to_pixels(np.array(LINE[:1]), 14).astype(int)[0]
+    tile = heatmap.tile(14, pixels[0] >> 8, pixels[1] >> 8)
+    assert tile[pixels[1] & 255, pixels[0] & 255] == 2
+    assert tile.max() == 2
+    # a zoom 10 pixel is crossed by many zoom 14 pixels of the same trip, still counts 2
+    assert max(heatmap.tile(10, x, y).max() for (z, x, y) in heatmap._dirty if z == 10) == 2
+
+
+def test_save_only_changed_tiles(tmp_path):
+    heatmap = Heatmap(tmp_path, zooms=[12])
+    heatmap.add_points("t1", LINE)
+    assert heatmap.save() > 0
+    png = next((tmp_path / "tiles" / "12").rglob("*.png"))
+    assert png.read_bytes().startswith(b"\x89PNG")
+
+    heatmap = Heatmap(tmp_path, zooms=[12])
+    assert not heatmap.add_points("t1", LINE)
+    heatmap.add_points("t2", [(48.1, 11.5), (48.1, 11.51)])
+    assert heatmap.save() == 1
+
+
+def test_encode_png():
+    rgba = np.zeros((2, 3, 4), dtype=np.uint8)
+    rgba[1, 2] = [1, 2, 3, 4]
+    png = encode_png(rgba)
+
+    idat_start = png.index(b"IDAT") + 4
+    idat_length = int.from_bytes(png[idat_start - 8:idat_start - 4], "big")
+    raw = zlib.decompress(png[idat_start:idat_start + idat_length])
+    assert raw == b"\0" + bytes(12) + b"\0" + bytes(8) + bytes([1, 2, 3, 4])
+
+
+def test_interrupted_save_counts_every_trip_once(tmp_path, monkeypatch):
+    import allianz_bonusdrive_client.heatmap as heatmap_module
+
+    def interrupt(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    pixels = to_pixels(np.array(LINE[:1]), 12).astype(int)[0]
+    key = (12, pixels[0] >> 8, pixels[1] >> 8)
+    heatmap = Heatmap(tmp_path, zooms=[12])
+    heatmap.add_points("t1", LINE)
+    heatmap.save()
+
+    # killed after committing the trips, before replacing the counts
+    heatmap = Heatmap(tmp_path, zooms=[12])
+    heatmap.add_points("t2", LINE)
+    replace = heatmap_module.os.replace
+
+    def replace_only_meta(src, dst):
+        if not str(dst).endswith("heatmap.json"):
+            interrupt()
+        replace(src, dst)
+
+    monkeypatch.setattr(heatmap_module.os, "replace", replace_only_meta)
+    with pytest.raises(KeyboardInterrupt):
+        heatmap.save()
+    monkeypatch.undo()
+
+    heatmap = Heatmap(tmp_path, zooms=[12])
+    assert heatmap.trip_ids == {"t1", "t2"}
+    assert heatmap.tile(*key).max() == 2
+    assert heatmap.save() >= 1
+
+    # killed before committing: neither the trip nor its counts are saved
+    heatmap = Heatmap(tmp_path, zooms=[12])
+    heatmap.add_points("t3", LINE)
+    monkeypatch.setattr(Heatmap, "_write_meta", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        heatmap.save()
+    monkeypatch.undo()
+
+    heatmap = Heatmap(tmp_path, zooms=[12])
+    assert heatmap.trip_ids == {"t1", "t2"}
+    assert heatmap.tile(*key).max() == 2
+
+
+def test_tiles_pushed_out_of_memory_are_kept(tmp_path):
+    # crosses ~70 zoom 14 tiles, added twice to load tiles that were pushed out
+    trips = {"t1": [(52.5, 13.0), (52.5, 14.5)], "t2": [(52.5, 14.5), (52.5, 13.0)], "t3": LINE}
+    small, large = Heatmap(tmp_path / "small", zooms=[10, 14], max_tiles=4), Heatmap(tmp_path / "large", zooms=[10, 14])
+    for heatmap in (small, large):
+        for tripId, points in trips.items():
+            heatmap.add_points(tripId, points)
+    assert len(small._tiles) <= 4
+
+    assert small.save() == large.save() > 4
+    small_pngs = sorted(p.relative_to(tmp_path / "small") for p in (tmp_path / "small" / "tiles").rglob("*.png"))
+    large_pngs = sorted(p.relative_to(tmp_path / "large") for p in (tmp_path / "large" / "tiles").rglob("*.png"))
+    assert small_pngs == large_pngs
+    for path in small_pngs:
+        assert (tmp_path / "small" / path).read_bytes() == (tmp_path / "large" / path).read_bytes()
+    assert not list((tmp_path / "small").rglob("*.new"))
+
+
+def test_zoom_levels_must_match(tmp_path):
+    heatmap = Heatmap(tmp_path, zooms=[12])
+    heatmap.add_points("t1", LINE)
+    heatmap.save()
+
+    with pytest.raises(ValueError):
+        Heatmap(tmp_path, zooms=[12, 14])
@@ -0,0 +1,78 @@
+import random
+import time
+
+from allianz_bonusdrive_client.hotspots import HotspotIndex
+from allianz_bonusdrive_client.store import TripStore
+from tests.conftest import trip_data
+
+JUNCTION = (52.5200, 13.4050)
+CURVE = (52.5300, 13.3800)
+
+
+def trip_with_events(tripId, braking=(), cornering=()):
+    trip = trip_data(tripId)
+    trip["events"] = {
+        "MultiLevelBrakingViolation": [
+            {"latitude": lat, "longitude": lon, "timeStamp": 1700000000000 + i, "level": level} for i, (lat, lon, level) in enumerate(braking)
+        ],
+        "MultiLevelCorneringViolation": [
+            {"latitude": lat, "longitude": lon, "timeStamp": 1700000000000, "level": level} for lat, lon, level in cornering
+        ],
+        "PostedSpeedLimitViolation": None,
+    }
+    return trip
+
+
+def test_recurring_hotspots_ranked_by_weight():
+    index = HotspotIndex(radius=50)
+    # a few meters apart each time
+    index.learn(trip_with_events("t1", braking=[(*JUNCTION, 3), (JUNCTION[0] + 0.0001, JUNCTION[1], 3)], cornering=[(*CURVE, 1)]))
+    index.learn(trip_with_events("t2", braking=[(JUNCTION[0], JUNCTION[1] + 0.0002, 2)], cornering=[(CURVE[0] + 0.0001, CURVE[1], 1)]))
+    # only once, not recurring
+    index.learn(trip_with_events("t3", braking=[(48.0, 11.0, 3)]))
+
+    junction, curve = index.ranked()
+    assert junction.event_type == "MultiLevelBrakingViolation"
+    assert (junction.events, junction.trips, junction.weight) == (3, 2, 8.0)
+    assert abs(junction.latitude - JUNCTION[0]) < 0.0001 and abs(junction.longitude - JUNCTION[1]) < 0.0001
+    assert (curve.events, curve.trips) == (2, 2)
+    assert index.ranked(["harsh_cornering"]) == [curve]
+    assert index.ranked(["speeding"]) == []
+
+
+def test_event_types_are_kept_apart():
+    index = HotspotIndex()
+    index.learn(trip_with_events("t1", braking=[(*JUNCTION, 1)], cornering=[(*JUNCTION, 1)]))
+    assert len(index.hotspots) == 2
+
+
+def test_update_from_store_is_incremental(tmp_path):
+    store = TripStore(tmp_path)
+    store.add(trip_with_events("t1", braking=[(*JUNCTION, 1)]))
+    path = tmp_path / "hotspots.json"
+    index = HotspotIndex(path)
+    assert index.update(store) == 1
+    index.save()
+
+    store.add(trip_with_events("t2", braking=[(*JUNCTION, 2)]))
+    index = HotspotIndex(path)
+    assert index.update(store) == 1
+    assert index.update(store) == 0
+    (hotspot,) = index.ranked()
+    assert (hotspot.events, hotspot.trips, hotspot.weight) == (2, 2, 3.0)
+
+
+def test_many_events_scale_linearly():
+    rng = random.Random(1)
+    spots = [(52.3 + rng.random() * 0.4, 13.1 + rng.random() * 0.6) for _ in range(2000)]
+    trips = [
+        trip_with_events(f"t{i}", braking=[(lat + rng.gauss(0, 0.0001), lon + rng.gauss(0, 0.0001), rng.randint(1, 3)) for lat, lon in rng.sample(spots, 10)])
+        for i in range(5000)
+    ]
+    index = HotspotIndex()
+    start = time.perf_counter()
+    index.update(trips)
+    # 50000 events
+    assert time.perf_counter() - start < 10
+    assert sum(hotspot.events for hotspot in index.hotspots.values()) == 50000
+    assert len(index.ranked(limit=None)) <= 2100
@@ -0,0 +1,27 @@
+import io
+import json
+
+from allianz_bonusdrive_client.utils.dataclasses import BadgeLevel
+from allianz_bonusdrive_client.utils.jsonio import NDJSONWriter, dumps
+
+
+def test_dumps_is_compact_and_handles_dataclasses():
+    assert json.loads(dumps({"a": [1, 2]})) == {"a": [1, 2]}
+    assert b" " not in dumps({"a": [1, 2]})
+    assert json.loads(dumps(BadgeLevel(1, 0.0, 10.0))) == {"level": 1, "minimumValue": 0.0, "maximumValue": 10.0}
+
+
+def test_ndjson_writer_buffers_until_flush():
+    stream = io.StringIO()
+    with NDJSONWriter(stream, buffer_size=1 << 20) as writer:
+        writer.write_all({"tripId": i} for i in range(3))
+        assert stream.getvalue() == ""
+    assert [json.loads(line) for line in stream.getvalue().splitlines()] == [{"tripId": i} for i in range(3)]
+
+
+def test_ndjson_writer_uses_binary_buffer():
+    raw = io.BytesIO()
+    stream = io.TextIOWrapper(raw, encoding="utf-8")
+    writer = NDJSONWriter(stream, flush_each=True)
+    writer.write({"ort": "München"})
+    assert raw.getvalue() == dumps({"ort": "München"}) + b"\n"
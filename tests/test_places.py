@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import pytest
+
+from allianz_bonusdrive_client.places import PlaceIndex
+from allianz_bonusdrive_client.utils.geometry import encode, format_coordinates
+
+HOME = (52.520008, 13.404954)
+WORK = (52.500000, 13.300000)
+
+
+def make_trip(tripId, start, end, start_name=None, end_name=None):
+    return SimpleNamespace(
+        tripId=tripId,
+        geometry=encode([start, (52.51, 13.35), end]),
+        decoded_geometry=None,
+        start_point_string=start_name,
+        end_point_string=end_name,
+    )
+
+
+def test_endpoints_cluster_into_places():
+    index = PlaceIndex()
+    # a few meters apart, same place
+    index.learn(make_trip("t1", HOME, WORK, start_name="Alexanderplatz, Berlin"))
+    index.learn(make_trip("t2", WORK, (HOME[0] + 0.0003, HOME[1] + 0.0003)))
+
+    assert len(index.places) == 2
+    home = index.place_for(*HOME)
+    assert home.visits == 2
+    assert home.name == "Alexanderplatz, Berlin"
+    assert index.place_for(*WORK).display_name() == f"Ort {index.place_for(*WORK).id}"
+    # far from any place
+    assert index.place_for(48.0, 11.0) is None
+
+
+def test_places_need_min_visits():
+    index = PlaceIndex(min_visits=2)
+    index.learn(make_trip("t1", HOME, WORK))
+    assert index.place_for(*HOME) is None
+
+    index.learn(make_trip("t2", HOME, WORK))
+    assert index.place_for(*HOME) is not None
+    assert index.routes([make_trip("t3", HOME, WORK)]) == {(index.place_for(*HOME).id, index.place_for(*WORK).id): 1}
+
+
+def test_trips_are_learned_once():
+    index = PlaceIndex()
+    trip = make_trip("t1", HOME, WORK)
+    index.learn(trip)
+    assert index.learn(trip) is None
+    assert index.places[1].visits == 1
+
+
+def test_persisted_with_labels(tmp_path):
+    path = tmp_path / "places.json"
+    index = PlaceIndex(path)
+    index.learn(make_trip("t1", HOME, WORK))
+    index.learn(make_trip("t2", WORK, HOME))
+    index.set_label(index.place_for(*HOME).id, "Zuhause")
+    index.save()
+
+    index = PlaceIndex(path)
+    assert index.place_for(*HOME).display_name() == "Zuhause"
+    assert [place.visits for place in index.known()] == [2, 2]
+    assert index.learn(make_trip("t2", WORK, HOME)) is None
+
+
+def test_saved_radius_is_kept(tmp_path):
+    path = tmp_path / "places.json"
+    index = PlaceIndex(path, radius=50.0)
+    index.learn(make_trip("t1", HOME, WORK))
+    index.save()
+
+    index = PlaceIndex(path)
+    assert index.radius == 50.0
+    # 100 m away, a place of its own with the saved radius
+    index.learn(make_trip("t2", (HOME[0] + 0.0009, HOME[1]), WORK))
+    assert len(index.places) == 3
+
+
+def test_unknown_label_id(tmp_path):
+    index = PlaceIndex()
+    with pytest.raises(ValueError):
+        index.set_label(1, "Zuhause")
+
+
+def test_coordinates_are_no_name():
+    index = PlaceIndex()
+    # without a geocoder, trips carry their formatted coordinates
+    start, end = index.learn(make_trip("t1", HOME, WORK, start_name=format_coordinates(*HOME), end_name=format_coordinates(*WORK)))
+    assert start.name is None and end.name is None
+    assert start.display_name() == f"Ort {start.id}"
+
+
+def test_mixed_trip_ids_are_saved(tmp_path):
+    path = tmp_path / "places.json"
+    index = PlaceIndex(path)
+    index.learn(make_trip(7, HOME, WORK))
+    index.learn(make_trip("t1", WORK, HOME))
+    index.save()
+
+    index = PlaceIndex(path)
+    assert index.trip_ids == {"7", "t1"}
+    assert index.learn(make_trip(7, HOME, WORK)) is None
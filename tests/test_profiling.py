@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from allianz_bonusdrive_client.client import BonusdriveAPIClient
+from allianz_bonusdrive_client.utils import profiling
+from allianz_bonusdrive_client.utils.profiling import phase, profile, timed
+from tests.conftest import BASE_URL, FakeServer
+
+
+@timed("outer")
+def outer():
+    with phase("inner") as timing:
+        timing.bytes = 10
+    with phase("inner"):
+        # same name, counted once
+        with phase("inner"):
+            pass
+
+
+def test_nested_phases():
+    with profile() as profiler:
+        outer()
+        thread = threading.Thread(target=outer)
+        thread.start()
+        thread.join()
+
+    assert set(profiler.stats) == {("outer",), ("outer", "inner")}
+    assert profiler.stats[("outer", "inner")].calls == 4
+    assert profiler.stats[("outer", "inner")].bytes == 20
+    outer_stats = profiler.stats[("outer",)]
+    assert outer_stats.nested <= outer_stats.wall <= profiler.wall
+    assert "  inner" in profiler.report()
+    assert [line.rsplit(" ", 1)[0] for line in profiler.folded().splitlines()] == ["outer", "outer;inner"]
+
+
+def test_nothing_recorded_outside_profile():
+    assert phase("anything") is profiling._NO_PHASE
+    with phase("anything") as timing:
+        timing.bytes = 5
+    with profile():
+        with pytest.raises(RuntimeError):
+            with profile():
+                pass
+
+
+def test_client_phases():
+    client = BonusdriveAPIClient(BASE_URL, None, None, tgt="TGT", adapter=FakeServer())
+    with profile(cprofile=True) as profiler:
+        client.authenticate()
+        client.get_trips_raw(amount=1)
+        client.get_vehicleId()
+
+    assert {("login",), ("logbook",), ("logbook", "transfer"), ("logbook", "json"), ("vehicles", "transfer")} <= set(profiler.stats)
+    assert profiler.stats[("logbook", "transfer")].bytes == len('{"items": [{"trip": {"tripId": "t1"}}]}')
+    assert profiler.cprofile.getstats()
+
+
+def test_vectorized_decoding_phases():
+    pytest.importorskip("numpy")
+    from allianz_bonusdrive_client.utils.geometry import decode_array, decode_many, encode
+
+    line = encode([(52.5, 13.4), (52.51, 13.41)])
+    with profile() as profiler:
+        decode_array(line)
+        decode_many([line, None, line])
+
+    assert profiler.stats[("polyline",)].calls == 2
@@ -0,0 +1,130 @@
+import random
+from datetime import date, datetime, timezone
+
+import pytest
+
+from allianz_bonusdrive_client.query import F, TripIndex
+from allianz_bonusdrive_client.store import TripStore
+from tests.conftest import trip_data
+
+HOUR = 3_600_000
+
+
+def make_trip(tripId, start_hour, kilometers, overall, alerts=False, vehicle="v1"):
+    trip = trip_data(tripId)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp() * 1000 + start_hour * HOUR
+    trip.update(
+        tripStartTimestampUtc=int(start),
+        tripStartTimestampLocal=int(start + HOUR),
+        kilometers=kilometers,
+        hasAlerts=alerts,
+        vehicle={"vehicleId": vehicle},
+    )
+    trip["tripScores"] = {"scores": {**trip["tripScores"]["scores"], "overall": overall}, "scoreType": 1}
+    return trip
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TripStore(tmp_path)
+    store.add(make_trip("a", 0, 12.0, 90))
+    store.add(make_trip("b", 22, 80.0, 60, alerts=True))
+    store.add(make_trip("c", 24 * 40, 55.0, 65, vehicle="v2"))
+    store.add(make_trip("d", 24 * 40 + 2, 5.0, 50, alerts=True))
+    return store
+
+
+def test_predicates(store):
+    index = TripIndex(store)
+    assert sorted(index.where(F.kilometers > 50, F.score_overall < 70).ids()) == ["b", "c"]
+    assert index.where(F.kilometers > 50, F.start_utc >= datetime(2025, 2, 1, tzinfo=timezone.utc)).ids() == ["c"]
+    # local start hour: b at 23:00, d at 03:00
+    assert sorted(index.where(F.hasAlerts == True, (F.hour >= 22) | (F.hour < 5)).ids()) == ["b", "d"]
+    assert sorted(index.where(F.vehicleId != "v1").ids()) == ["c"]
+    assert index.where(F.vehicleId.isin(["v1", "v2"])).count() == 4
+    with pytest.raises(ValueError):
+        F.vehicleId > "v1"
+    with pytest.raises(ValueError):
+        F.nope
+
+
+def test_order_and_limit(store):
+    index = TripIndex(store)
+    assert index.query().order_by("-kilometers").limit(2).ids() == ["b", "c"]
+    assert index.query().order_by("kilometers").limit(2, offset=1).ids() == ["a", "c"]
+    assert index.where(F.hasAlerts == True).order_by("start_utc").ids() == ["b", "d"]
+    (summary,) = index.where(F.kilometers < 10).summaries()
+    assert summary["tripId"] == "d" and summary["score_overall"] == 50
+    assert [trip["tripId"] for trip in index.where(F.kilometers == 80.0)] == ["b"]
+
+
+def test_missing_values(store):
+    store.add(dict(make_trip("e", 5, 1.0, 40), kilometers=None))
+    index = TripIndex(store)
+
+    assert index.where(F.kilometers == None).ids() == ["e"]
+    assert sorted(index.where(F.kilometers != None).ids()) == ["a", "b", "c", "d"]
+    assert sorted(index.where(F.kilometers.isin([None, 5.0])).ids()) == ["d", "e"]
+
+
+def test_refresh_reads_only_changes(store):
+    index = TripIndex(store)
+    store.add(make_trip("e", 5, 100.0, 40))
+    # the other trips come from index.json
+    index = TripIndex(store, refresh=False)
+    assert len(index) == 4
+    assert index.refresh() == 1
+    assert index.query().order_by("-kilometers").limit(1).ids() == ["e"]
+
+    (store.trips_dir / "a.json").unlink()
+    assert index.refresh() == 1
+    assert sorted(index.query().ids()) == ["b", "c", "d", "e"]
+    assert index.refresh() == 0
+
+
+def test_matches_a_scan(tmp_path):
+    rng = random.Random(3)
+    store = TripStore(tmp_path)
+    trips = [make_trip(f"t{i}", rng.randrange(24 * 90), round(rng.uniform(1, 120), 1), rng.randrange(40, 100), rng.random() < 0.2) for i in range(300)]
+    for trip in trips:
+        store.add(trip)
+    index = TripIndex(store)
+
+    expected = sorted(
+        (trip for trip in trips if trip["kilometers"] > 30 and (trip["hasAlerts"] or trip["tripScores"]["scores"]["overall"] < 60)),
+        key=lambda trip: -trip["kilometers"],
+    )
+    query = index.where(F.kilometers > 30, (F.hasAlerts == True) | (F.score_overall < 60)).order_by("-kilometers")
+    assert query.count() == len(expected)
+    # walking the sort index and sorting the candidates
+    for limit in (3, None):
+        assert [index.columns["kilometers"][index.ids.index(tripId)] for tripId in query.limit(limit).ids()] == [trip["kilometers"] for trip in expected][:limit]
+
+
+def test_ties_keep_the_same_order_in_both_plans(tmp_path):
+    store = TripStore(tmp_path)
+    for i in range(20):
+        store.add(make_trip(f"t{i:02}", i, float(i % 3), 80))
+    index = TripIndex(store)
+
+    for field in ("kilometers", "-kilometers"):
+        query = index.query().order_by(field)
+        # limit 3 walks the sort index, no limit sorts all rows
+        assert query.limit(3).ids() == query.ids()[:3]
+        assert query.limit(3, offset=4).ids() == query.ids()[4:7]
+
+
+def test_naive_dates_are_utc(store, monkeypatch):
+    import time
+
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        index = TripIndex(store)
+        # b starts 2025-01-01 23:00 local, c and d on day 41
+        assert sorted(index.where(F.start_local >= date(2025, 1, 2)).ids()) == ["c", "d"]
+        assert index.where(F.start_local >= datetime(2025, 1, 1, 23)).ids() == ["b", "c", "d"]
+        assert sorted(index.where(F.start_utc < datetime(2025, 1, 1, 22, 30)).ids()) == ["a", "b"]
+    finally:
+        monkeypatch.undo()
+        time.tzset()
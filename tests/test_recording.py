@@ -0,0 +1,64 @@
+import gzip
+import json
+
+import pytest
+import requests
+
+from allianz_bonusdrive_client.client import BonusdriveAPIClient
+from allianz_bonusdrive_client.utils.recording import RecordingAdapter, ReplayAdapter, request_key
+from tests.conftest import BASE_URL, FakeServer
+
+
+def test_request_key_sorts_params():
+    assert request_key("get", "https://a/b?x=2&expand=v&expand=e") == "GET https://a/b?expand=e&expand=v&x=2"
+
+
+def test_record_then_replay(tmp_path):
+    path = tmp_path / "responses.jsonl.gz"
+    server = FakeServer()
+    recorder = RecordingAdapter(path, adapter=server)
+    client = BonusdriveAPIClient(BASE_URL, None, None, tgt="TGT-secret", adapter=recorder)
+    client.authenticate()
+    recorded = client.get_trips_raw(amount=1)
+    recorder.close()
+
+    archive = gzip.open(path, "rt").read()
+    # login tickets are not stored
+    assert "ST-secret" not in archive and "TGT-secret" not in archive
+
+    replay = ReplayAdapter(path)
+    assert len(replay) == len(server.requests)
+    client = BonusdriveAPIClient(BASE_URL, None, None, tgt="TGT", adapter=replay)
+    client.authenticate()
+    assert client.userId == 42
+    assert client.get_trips_raw(amount=1) == recorded
+
+    with pytest.raises(requests.ConnectionError):
+        client.get_trips_raw(amount=2)
+
+
+def test_recording_survives_being_killed(tmp_path):
+    server = FakeServer()
+    path = tmp_path / "responses.jsonl.gz"
+    recorder = RecordingAdapter(path, adapter=server)
+    client = BonusdriveAPIClient(BASE_URL, None, None, tgt="TGT", adapter=recorder)
+    client.authenticate()
+    # never closed, as if the process was killed, and the last write cut off
+    with open(path, "ab") as f:
+        f.write(gzip.compress(b'{"key": "GET https://a/x"}\n')[:16])
+
+    assert len(ReplayAdapter(path)) == len(server.requests) > 0
+
+
+def test_replay_repeats_in_order(tmp_path):
+    path = tmp_path / "responses.jsonl.gz"
+    with gzip.open(path, "wt") as f:
+        for body in ("first", "second"):
+            record = {"key": "GET https://a/x", "status": 200, "headers": {}, "encoding": "text", "body": body}
+            f.write(json.dumps(record) + "\n")
+
+    session = requests.Session()
+    session.mount("https://", ReplayAdapter(path, strict=False))
+
+    assert [session.get("https://a/x").text for _ in range(3)] == ["first", "second", "second"]
+    assert session.get("https://a/unknown").status_code == 404
@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from allianz_bonusdrive_client.client import date_range
+from allianz_bonusdrive_client.server import ResponseCache, TripService
+
+
+def make_client():
+    client = MagicMock()
+    client.authenticated = False
+    client.authenticate.side_effect = lambda: setattr(client, "authenticated", True)
+
+    def get_trips_raw(amount, offset):
+        time.sleep(0.05)
+        return [{"trip": {"tripId": f"t{offset + i}"}} for i in range(amount)]
+
+    client.get_trips_raw.side_effect = get_trips_raw
+    client.get_trip_details_raw.side_effect = lambda tripId: {"tripId": tripId}
+    return client
+
+
+def test_concurrent_misses_share_one_upstream_call():
+    client = make_client()
+    service = TripService({"me": client})
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(service.handle("/me/trips?amount=2"))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.get_trips_raw.call_count == 1
+    assert client.authenticate.call_count == 1
+    assert {body for body, _, _ in results} == {b'[{"trip":{"tripId":"t0"}},{"trip":{"tripId":"t1"}}]'}
+    # different parameters are a different request
+    assert service.handle("/me/trips?amount=2")[1] == "HIT"
+    assert service.handle("/me/trips?amount=2&offset=2")[1] == "MISS"
+
+
+def test_cache_expiry_and_stale_on_error():
+    now = [0.0]
+    cache = ResponseCache(clock=lambda: now[0])
+
+    assert cache.get("k", 10, lambda: b"1") == (b"1", "MISS", 10)
+    assert cache.get("k", 10, lambda: b"2")[:2] == (b"1", "HIT")
+    now[0] = 11
+    assert cache.get("k", 10, lambda: b"2")[:2] == (b"2", "MISS")
+
+    now[0] = 30
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    assert cache.get("k", 10, fail)[:2] == (b"2", "STALE")
+    with pytest.raises(RuntimeError):
+        cache.get("other", 10, fail)
+
+
+def test_only_rejected_sessions_log_in_again():
+    client = make_client()
+    service = TripService({"me": client})
+    service.handle("/me/trips")
+
+    client.get_trip_details_raw.side_effect = requests.ConnectionError("offline")
+    with pytest.raises(requests.ConnectionError):
+        service.handle("/me/trips/t1")
+    assert client.authenticated
+
+    response = requests.Response()
+    response.status_code = 403
+    client.get_trip_details_raw.side_effect = requests.HTTPError(response=response)
+    with pytest.raises(requests.HTTPError):
+        service.handle("/me/trips/t2")
+    assert not client.authenticated
+
+
+def test_badges_and_scores_default_to_the_current_dates():
+    client = make_client()
+    client.get_badges_raw.return_value = []
+    client.get_scores_raw.return_value = []
+    service = TripService({"me": client})
+    endDate, startDate = date_range()
+
+    service.handle("/me/badges?type=monthly")
+    client.get_badges_raw.assert_called_once_with(type="monthly", endDate=endDate, startDate=startDate)
+    service.handle("/me/scores?startDate=2025-01-01")
+    client.get_scores_raw.assert_called_once_with(endDate=endDate, startDate="2025-01-01")
+
+
+def test_cache_is_bounded():
+    cache = ResponseCache(max_entries=2)
+    for key in "abc":
+        cache.get(key, 10, lambda: b"x")
+
+    assert len(cache) == 2
+
+
+def test_http():
+    service = TripService({"me": make_client()})
+    thread = threading.Thread(target=service.serve_forever, kwargs={"port": 0}, daemon=True)
+    thread.start()
+    host, port = service.wait_ready(5)
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/me/trips/t7") as response:
+            assert json.load(response) == {"tripId": "t7"}
+            assert response.headers["X-Cache"] == "MISS"
+            assert response.headers["Cache-Control"] == "max-age=86400"
+        with urllib.request.urlopen(f"http://{host}:{port}/accounts") as response:
+            assert json.load(response) == ["me"]
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"http://{host}:{port}/someone/trips")
+        assert e.value.code == 404
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"http://{host}:{port}/me/trips?amount=x")
+        assert e.value.code == 400
+    finally:
+        service.shutdown()
+        thread.join(5)
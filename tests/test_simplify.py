@@ -0,0 +1,60 @@
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from allianz_bonusdrive_client.store import TripStore
+from allianz_bonusdrive_client.utils.geometry import decode, encode
+from allianz_bonusdrive_client.utils.simplify import simplify, simplify_polyline, simplify_trip
+
+
+def wiggly_line(n=2000):
+    # ~10 km east-west with a 1 m wobble and one 500 m detour in the middle
+    points = []
+    for i in range(n):
+        lon = 13.0 + 0.15 * i / n
+        lat = 52.0 + math.sin(i) * 0.000009
+        if n // 2 - 50 < i < n // 2 + 50:
+            lat += 0.0045
+        points.append((lat, lon))
+    return points
+
+
+def test_simplify_keeps_shape_within_tolerance():
+    points = wiggly_line()
+
+    simplified = simplify(points, tolerance=5)
+
+    assert simplified[0] == points[0]
+    assert simplified[-1] == points[-1]
+    assert len(simplified) < len(points) / 50
+    # the detour is kept
+    assert max(lat for lat, _ in simplified) > 52.004
+
+
+def test_simplify_short_or_disabled():
+    points = [(52.0, 13.0), (52.1, 13.1)]
+    assert simplify(points, 10) == points
+    assert simplify(wiggly_line(10), 0) == wiggly_line(10)
+
+
+def test_simplify_polyline_and_trip():
+    encoded = encode(wiggly_line())
+
+    assert len(simplify_polyline(encoded, 5)) < len(encoded) / 10
+    assert simplify_polyline(None, 5) is None
+
+    trip = {"tripId": "t1", "geometry": encoded, "snappedGeometry": [{"geometry": encoded, "confidence": 1.0}]}
+    simplified = simplify_trip(trip, 5)
+    assert trip["geometry"] == encoded
+    assert simplified["snappedGeometry"][0]["confidence"] == 1.0
+    assert simplified["snappedGeometry"][0]["geometry"] == simplified["geometry"]
+    assert len(decode(simplified["geometry"])) < 50
+
+
+def test_store_simplifies(tmp_path):
+    store = TripStore(tmp_path, simplify_tolerance=5)
+    store.add({"tripId": "t1", "geometry": encode(wiggly_line())})
+
+    assert len(decode(store.get("t1")["geometry"])) < 50
@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from allianz_bonusdrive_client.tripmetrics import compute_metrics, metrics_table
+from allianz_bonusdrive_client.utils.geometry import encode
+
+# 0.01 degrees of latitude are ~1.112 km
+SQUARE = [(52.0, 13.0), (52.01, 13.0), (52.01, 13.016), (52.0, 13.016)]
+
+
+def test_compute_metrics():
+    metrics = compute_metrics("t1", encode(SQUARE), kilometers=3.4)
+
+    assert metrics.points == 4
+    assert metrics.path_km == pytest.approx(3.32, abs=0.01)
+    assert metrics.path_ratio == pytest.approx(metrics.path_km / 3.4)
+    assert metrics.start_end_km == pytest.approx(1.095, abs=0.01)
+    assert metrics.turns == 2
+    assert (metrics.min_latitude, metrics.max_longitude) == (52.0, 13.016)
+
+
+def test_no_geometry():
+    metrics = compute_metrics("t1", None, kilometers=1.0)
+
+    assert metrics.points == 0
+    assert metrics.path_ratio is None
+
+
+def test_metrics_table_in_parallel():
+    trips = [{"tripId": f"t{i}", "geometry": encode(SQUARE[: 2 + i % 3]), "kilometers": 1.0} for i in range(30)]
+
+    table = metrics_table(trips, processes=2, parallel_from=10)
+
+    assert [metrics.tripId for metrics in table] == [f"t{i}" for i in range(30)]
+    assert table == metrics_table(trips, processes=1)
+
+
+def test_decode_array_matches_decode():
+    import random
+
+    import numpy as np
+
+    from allianz_bonusdrive_client.utils.geometry import decode, decode_array
+
+    rng = random.Random(1)
+    points = [(rng.uniform(-89, 89), rng.uniform(-179, 179)) for _ in range(500)]
+    encoded = encode(points)
+
+    assert np.array_equal(decode_array(encoded), np.array(decode(encoded)))
+    assert decode_array(None).shape == (0, 2)
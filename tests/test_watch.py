@@ -0,0 +1,98 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from allianz_bonusdrive_client.watch import TripWatcher
+
+NOON = datetime(2025, 6, 2, 12, 0).timestamp()
+NIGHT = datetime(2025, 6, 2, 3, 0).timestamp()
+
+
+def logbook(*trips):
+    return [
+        {"trip": {"tripId": tripId, "tripProcessingEndTimestampUtc": processed, "tripEndTimestampUtc": 0}}
+        for tripId, processed in trips
+    ]
+
+
+def make_client():
+    client = MagicMock()
+    client.get_trip_details.side_effect = lambda tripId: f"details-{tripId}"
+    return client
+
+
+def test_first_poll_only_sets_the_baseline():
+    client = make_client()
+    client.get_trips_raw.return_value = logbook(("t1", 1))
+    watcher = TripWatcher(client, clock=lambda: NOON)
+
+    assert watcher.poll() == []
+    client.get_trips_raw.assert_called_with(amount=5, expand=())
+    client.get_trip_details.assert_not_called()
+
+
+def test_new_and_reprocessed_trips_are_reported():
+    client = make_client()
+    watcher = TripWatcher(client, clock=lambda: NOON)
+    client.get_trips_raw.return_value = logbook(("t1", 1))
+    watcher.poll()
+
+    client.get_trips_raw.return_value = logbook(("t3", 3), ("t2", 2), ("t1", 1))
+    assert watcher.poll() == ["details-t2", "details-t3"]
+
+    client.get_trips_raw.return_value = logbook(("t3", 4), ("t2", 2), ("t1", 1))
+    assert watcher.poll() == ["details-t3"]
+
+    assert watcher.poll() == []
+
+
+def test_interval_adapts():
+    client = make_client()
+    client.get_trips_raw.return_value = logbook(("t1", 1))
+    now = NOON
+    watcher = TripWatcher(client, fast_interval=60, slow_interval=600, backoff=2, clock=lambda: now)
+
+    intervals = []
+    for _ in range(6):
+        watcher.poll()
+        intervals.append(watcher.interval)
+    assert intervals == [120, 240, 480, 600, 600, 600]
+
+    client.get_trips_raw.return_value = logbook(("t2", 2), ("t1", 1))
+    watcher.poll()
+    assert watcher.interval == 60
+
+    now = NIGHT
+    watcher.poll()
+    assert watcher.interval == watcher.night_interval
+
+
+def test_transient_errors_back_off_and_keep_polling():
+    client = make_client()
+    watcher = TripWatcher(client, fast_interval=60, slow_interval=600, backoff=2, clock=lambda: NOON)
+    client.get_trips_raw.return_value = logbook(("t1", 1))
+    watcher.poll()
+
+    client.get_trips_raw.side_effect = requests.ConnectionError("offline")
+    assert watcher.poll() == []
+    assert watcher.interval == 240
+
+    client.get_trips_raw.side_effect = None
+    client.get_trips_raw.return_value = logbook(("t3", 3), ("t2", 2), ("t1", 1))
+    client.get_trip_details.side_effect = requests.Timeout("slow")
+    assert watcher.poll() == []
+    assert watcher.interval == 120
+
+    # the trips whose details failed are reported once they can be fetched
+    client.get_trip_details.side_effect = lambda tripId: f"details-{tripId}"
+    assert watcher.poll() == ["details-t2", "details-t3"]
+
+
+def test_other_errors_still_raise():
+    client = make_client()
+    watcher = TripWatcher(client, clock=lambda: NOON)
+    client.get_trips_raw.side_effect = RuntimeError("Failed to obtain TGT")
+    with pytest.raises(RuntimeError):
+        watcher.poll()